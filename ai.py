@@ -1,6 +1,13 @@
-from pygame import Vector2
+from geometry import Vector2
 from carrom import Carrom
 from math import sqrt, cos, radians
+from path_index import PathIndex
+from calibration import get_calibration
+import numpy as np
+
+
+""" Distance (in coin radii) the calibrated shots send the coin past its target point, into the pocket """
+POCKET_MARGIN = 1.0
 
 
 def check_along_path(start: Vector2, end: Vector2, distance, coins, round_start=False, round_end=False):
@@ -36,13 +43,79 @@ def ___(angle_):
     return angle_ if angle_ <= 180 else angle_ - 360
 
 
-def ai(carrom: Carrom, max_angle, max_speed, decelerate, e, dt, max_cut_shot_angle=70, max_rebound_cut_shot_angle=70):
-    """ Carrom Ai which knows to play direct shots, rebound shots and cuts """
+def ai(carrom: Carrom, max_angle, max_speed, decelerate, e, dt, max_cut_shot_angle=70, max_rebound_cut_shot_angle=70,
+       cache=None, verify=0, calibrate=False):
+    """ Carrom Ai which knows to play direct shots, rebound shots and cuts, if a decision_cache.DecisionCache is
+    given, the shot is looked up in it first and cached after the decision. Plays the first shot of get_shots, or
+    if verify is set, the best of that many candidate shots (see verify_shots). If calibrate is set, the speeds are
+    looked up in the calibration tables of the simulation parameters """
+    if cache is not None:
+        from decision_cache import get_striker_choice
+
+        def decide():
+            ai(carrom, max_angle, max_speed, decelerate, e, dt, max_cut_shot_angle, max_rebound_cut_shot_angle,
+               verify=verify, calibrate=calibrate)
+            return get_striker_choice(carrom)
+        cache.decide(carrom, 'ai', (max_angle, max_speed, decelerate, e, dt, max_cut_shot_angle,
+                                    max_rebound_cut_shot_angle, verify, calibrate), decide)
+        return
+    calibration = get_calibration(carrom.board, dt, decelerate, e, max_speed) if calibrate else None
+    shots = get_shots(carrom, max_angle, max_speed, decelerate, e, dt, max_cut_shot_angle, max_rebound_cut_shot_angle,
+                      calibration)
+    if verify:
+        shot, score = verify_shots(carrom, shots, verify, decelerate, e, dt)
+    else:
+        shot, score = next(shots, None), None
+    if shot is None:
+        print("Nothing done..")
+        return
+    category, striker_position, striker_speed, striker_angle, description = shot
+    carrom.striker.position = striker_position
+    carrom.striker.velocity.from_polar((striker_speed, striker_angle))
+    print("AI", carrom.current_player(), description if score is None else description + " (score %d)" % score)
+
+
+def get_candidates(categories, num_candidates):
+    """ Takes num_candidates of the shots (lists by category, in the order of get_shots), the best ones of each
+    category in turns """
+    candidates = []
+    for rank in range(max((len(category) for category in categories.values()), default=0)):
+        candidates += [category[rank] for category in categories.values() if rank < len(category)]
+    return candidates[:num_candidates]
+
+
+def verify_shots(carrom: Carrom, shots, num_candidates, decelerate, e, dt):
+    """ Takes num_candidates of the shots, the best ones of each category in turns, simulates them together with
+    random_ai.score_batch, and returns the shot with the best outcome and its score (None, None if there are no
+    shots). Ties go to the earlier candidate, so the first shot of get_shots is kept unless another does better """
+    from random_ai import score_batch
+    categories = {}
+    for shot in shots:
+        categories.setdefault(shot[0], []).append(shot)
+    candidates = get_candidates(categories, num_candidates)
+    if not candidates:
+        return None, None
+    choices = [(position.x, striker_angle, striker_speed, None) for _, position, striker_speed, striker_angle, _
+               in candidates]
+    scores = score_batch(carrom, choices, False, dt, decelerate, e)
+    best = max(range(len(candidates)), key=lambda index: (scores[index], -index))
+    return candidates[best], scores[best]
+
+
+def get_shots(carrom: Carrom, max_angle, max_speed, decelerate, e, dt, max_cut_shot_angle=70,
+              max_rebound_cut_shot_angle=70, calibration=None):
+    """ Generates the shots the ai knows, in its order of preference: direct shots, rebound shots, doubling, cuts,
+    rebound cuts and simple hits (hits which may face penalty last). Each shot is the category, striker position,
+    striker speed, striker angle and a description. The shots are generated lazily, so taking the first one costs
+    no more than finding it. The speeds are looked up in the calibration.Calibration if given, else computed with
+    the formulas of continuous motion """
     player, opponent = carrom.player_turn, (carrom.player_turn + 1) % 2
     """ Coins on the board and the coins which player can hit """
     board_coins = carrom.player_coins[0] + carrom.player_coins[1]
     if not carrom.pocketed_queen:
         board_coins.append(carrom.queen)
+    """ Positions of the coins on the board are indexed once, to check the paths of the shots """
+    path_index = PathIndex(board_coins)
 
     if not carrom.pocketed_queen and len(carrom.player_coins[player]) == 1:
         """ If only one coin and queen, then hit only queen """
@@ -70,8 +143,7 @@ def ai(carrom: Carrom, max_angle, max_speed, decelerate, e, dt, max_cut_shot_ang
     """ Try hitting direct shots if any """
     for center in pocket_centers:
         for coin in playable_coins:
-            if not check_along_path(coin.position, center, 2 * coin_radius,
-                                    [coin_ for coin_ in board_coins if coin_ != coin]) and center.y != coin.position.y:
+            if not path_index.is_blocked(coin.position, center, 2 * coin_radius, coin) and center.y != coin.position.y:
                 scale_factor = (center.y - y_position) / (center.y - coin.position.y)
                 striker_position = center + (coin.position - center) * scale_factor
                 angle_of_attack = ___((center - striker_position).angle_to(direction_vec))
@@ -80,20 +152,16 @@ def ai(carrom: Carrom, max_angle, max_speed, decelerate, e, dt, max_cut_shot_ang
                                      (attack_vector.length() - coin_radius - striker_radius)
                 if (x_limits[0] <= striker_position.x <= x_limits[1]) and abs(angle_of_attack) <= max_angle \
                         and scale_factor > 1 and \
-                        not check_along_path(striker_position, collision_position, coin_radius + striker_radius,
-                                             [coin_ for coin_ in board_coins if coin_ != coin], round_end=True):
-                    carrom.striker.position = striker_position
+                        not path_index.is_blocked(striker_position, collision_position, coin_radius + striker_radius,
+                                                  coin, round_end=True):
                     striker_speed = straight_shot_speed(carrom, striker_position, coin.position, center,
-                                                        decelerate, e)
+                                                        decelerate, e, calibration)
                     striker_angle = -90 - angle_of_attack if player == 0 else 90 - angle_of_attack
-                    carrom.striker.velocity.from_polar((striker_speed, striker_angle))
-                    print("AI", carrom.current_player(), "Hits Direct Strike")
-                    return
+                    yield 'direct', striker_position, striker_speed, striker_angle, "Hits Direct Strike"
     """ Try hitting rebound shots, striker hits the board frame and then hits the inline coin """
     for index, center in enumerate(board.pocket_centers):
         for coin in playable_coins:
-            if not check_along_path(coin.position, center, 2 * carrom.board.coin_radius,
-                                    [coin_ for coin_ in board_coins if coin_ != coin]) and \
+            if not path_index.is_blocked(coin.position, center, 2 * carrom.board.coin_radius, coin) and \
                     center.y != coin.position.y and center.x != coin.position.x:
                 """ Rebound with top or bottom """
                 rebound_y = board.diagonal_pocket_opposite[index][1]
@@ -104,22 +172,21 @@ def ai(carrom: Carrom, max_angle, max_speed, decelerate, e, dt, max_cut_shot_ang
                 collision_position = rebound_position + attack_vector.normalize() * \
                                      (attack_vector.length() - coin_radius - striker_radius)
                 if container.left <= rebound_position.x <= container.right and scale_factor > 1 and \
-                        not check_along_path(rebound_position, collision_position, coin_radius + striker_radius,
-                                             [coin_ for coin_ in board_coins if coin_ != coin], round_end=True):
+                        not path_index.is_blocked(rebound_position, collision_position, coin_radius + striker_radius,
+                                                  coin, round_end=True):
                     scale_factor = (rebound_position.y - y_position) / (rebound_position.y - center.y)
                     striker_position = rebound_position - (center - rebound_position).reflect(
                         normal_vec) * scale_factor
                     if x_limits[0] <= striker_position.x <= x_limits[1]:
                         angle_of_attack = ___((rebound_position - striker_position).angle_to(direction_vec))
-                        if not check_along_path(rebound_position, striker_position, coin_radius + striker_radius,
-                                                board_coins) and abs(angle_of_attack) <= max_angle:
-                            carrom.striker.position = striker_position
+                        if not path_index.is_blocked(rebound_position, striker_position, coin_radius + striker_radius) \
+                                and abs(angle_of_attack) <= max_angle:
                             striker_speed = rebound_shot_speed(carrom, striker_position, coin.position,
-                                                               rebound_position, center, decelerate, e)
+                                                               rebound_position, center, decelerate, e,
+                                                               calibration)
                             striker_angle = -90 - angle_of_attack if player == 0 else 90 - angle_of_attack
-                            carrom.striker.velocity.from_polar((striker_speed, striker_angle))
-                            print("AI", carrom.current_player(), "Tries Rebound Shot (top/bottom)")
-                            return
+                            yield 'rebound', striker_position, striker_speed, striker_angle, \
+                                "Tries Rebound Shot (top/bottom)"
                 """ Rebound with left or right """
                 rebound_x = board.diagonal_pocket_opposite[index][0]
                 normal_vec = board.normal_vectors[index][0]
@@ -129,22 +196,21 @@ def ai(carrom: Carrom, max_angle, max_speed, decelerate, e, dt, max_cut_shot_ang
                 collision_position = rebound_position + attack_vector.normalize() * \
                                      (attack_vector.length() - coin_radius - striker_radius)
                 if container.top <= rebound_position.y <= container.bottom and scale_factor > 1 and \
-                        not check_along_path(rebound_position, collision_position, coin_radius + striker_radius,
-                                             [coin_ for coin_ in board_coins if coin_ != coin], round_end=True):
+                        not path_index.is_blocked(rebound_position, collision_position, coin_radius + striker_radius,
+                                                  coin, round_end=True):
                     scale_factor = (rebound_position.y - y_position) / (rebound_position.y - center.y)
                     striker_position = rebound_position + (center - rebound_position).reflect(
                         normal_vec) * scale_factor
                     if x_limits[0] <= striker_position.x <= x_limits[1]:
                         angle_of_attack = ___((rebound_position - striker_position).angle_to(direction_vec))
-                        if not check_along_path(rebound_position, striker_position, coin_radius + striker_radius,
-                                                board_coins) and abs(angle_of_attack) <= max_angle:
-                            carrom.striker.position = striker_position
+                        if not path_index.is_blocked(rebound_position, striker_position, coin_radius + striker_radius) \
+                                and abs(angle_of_attack) <= max_angle:
                             striker_speed = rebound_shot_speed(carrom, striker_position, coin.position,
-                                                               rebound_position, center, decelerate, e)
+                                                               rebound_position, center, decelerate, e,
+                                                               calibration)
                             striker_angle = -90 - angle_of_attack if player == 0 else 90 - angle_of_attack
-                            carrom.striker.velocity.from_polar((striker_speed, striker_angle))
-                            print("AI", carrom.current_player(), "Tries Rebound Shot (left/right)")
-                            return
+                            yield 'rebound', striker_position, striker_speed, striker_angle, \
+                                "Tries Rebound Shot (left/right)"
 
     """ Try doubling, hit the coin onto the frame, then goes to the pocket,
     NOTE:this may not always work, if coin is close to the frame, chances are that it will hit the striker again """
@@ -171,18 +237,19 @@ def ai(carrom: Carrom, max_angle, max_speed, decelerate, e, dt, max_cut_shot_ang
 
                 if (x_limits[0] <= striker_position.x <= x_limits[1]) and abs(angle_of_attack) <= max_angle \
                         and scale_factor > 1 and \
-                        not check_along_path(striker_position, collision_position, striker_radius + coin_radius,
-                                             [coin_ for coin_ in board_coins if coin_ != coin], round_end=True) and \
-                        not check_along_path(coin.position, rebound_position, 2 * coin_radius,
-                                             [coin_ for coin_ in board_coins if coin_ != coin]) and \
-                        not check_along_path(rebound_position, center, 2 * coin_radius, board_coins):
+                        not path_index.is_blocked(striker_position, collision_position, striker_radius + coin_radius,
+                                                  coin, round_end=True) and \
+                        not path_index.is_blocked(coin.position, rebound_position, 2 * coin_radius, coin) and \
+                        not path_index.is_blocked(rebound_position, center, 2 * coin_radius):
                     striker_speed = doubling_shot_speed(carrom, striker_position, coin.position, rebound_position,
-                                                        center, decelerate, e)
-                    carrom.striker.position = striker_position
+                                                        center, decelerate, e, calibration)
                     striker_angle = -90 - angle_of_attack if player == 0 else 90 - angle_of_attack
-                    carrom.striker.velocity.from_polar((striker_speed, striker_angle))
-                    print("AI", carrom.current_player(), "Hits Doubling shot")
-                    return
+                    yield 'doubling', striker_position, striker_speed, striker_angle, "Hits Doubling shot"
+    """ Striker positions along the base line, the sweeps below evaluate the shots from all of them at once, and
+    pick the best of the feasible ones """
+    striker_x = np.arange(int(x_limits[0]), int(x_limits[1] + 1), dtype=float)
+    striker_y = np.full_like(striker_x, y_position)
+
     """ Try cut shots, within the given angle, may not always work, due to in-accuracies in simulation 
     due to discretization of simulations """
     for center in pocket_centers:
@@ -190,165 +257,154 @@ def ai(carrom: Carrom, max_angle, max_speed, decelerate, e, dt, max_cut_shot_ang
             expected_position = center + (coin.position - center).normalize() * \
                                 (center.distance_to(coin.position) + striker_radius + coin_radius)
             """ Also check if expected position is with board.. """
-            if not check_along_path(coin.position, center, 2 * coin_radius,
-                                    [coin_ for coin_ in board_coins if coin_ != coin])\
+            if not path_index.is_blocked(coin.position, center, 2 * coin_radius, coin)\
                     and check_inside_container(expected_position, striker_radius, container):
-                for striker_x in range(int(x_limits[0]), int(x_limits[1] + 1), 1):
-                    striker_position = Vector2(striker_x, y_position)
-                    force_angle = ___((center - coin.position).angle_to(expected_position - striker_position))
-                    angle_of_attack = ___((expected_position - striker_position).angle_to(direction_vec))
-                    if abs(force_angle) <= max_cut_shot_angle and abs(angle_of_attack) <= max_angle and \
-                            not check_along_path(striker_position, expected_position, striker_radius + coin_radius,
-                                                 [coin_ for coin_ in board_coins if coin_ != coin], round_end=True):
-                        striker_speed = cut_shot_speed(carrom, striker_position, coin.position,
-                                                       expected_position, force_angle,
-                                                       center, decelerate, e, dt)
-                        carrom.striker.position = striker_position
-                        striker_angle = -90 - angle_of_attack if player == 0 else 90 - angle_of_attack
-                        carrom.striker.velocity.from_polar((striker_speed, striker_angle))
-                        print("AI", carrom.current_player(), "Cut Shot with angle:", "%0.2f" % force_angle, "degrees",
-                              "Speed:", striker_speed)
-                        return
+                attack_x, attack_y = expected_position.x - striker_x, expected_position.y - striker_y
+                force_angle = sweep_angles(center.x - coin.position.x, center.y - coin.position.y, attack_x, attack_y)
+                angle_of_attack = sweep_angles(attack_x, attack_y, direction_vec.x, direction_vec.y)
+                feasible = (abs(force_angle) <= max_cut_shot_angle) & (abs(angle_of_attack) <= max_angle)
+                clear_paths(feasible, path_index, striker_x, striker_y, expected_position.x, expected_position.y,
+                            striker_radius + coin_radius, coin, round_end=True)
+                """ Thinner cuts are less accurate """
+                index = best_shot(feasible, abs(force_angle))
+                if index is not None:
+                    striker_position = Vector2(striker_x[index], y_position)
+                    force_angle, angle_of_attack = float(force_angle[index]), float(angle_of_attack[index])
+                    striker_speed = cut_shot_speed(carrom, striker_position, coin.position,
+                                                   expected_position, force_angle,
+                                                   center, decelerate, e, dt, calibration)
+                    striker_angle = -90 - angle_of_attack if player == 0 else 90 - angle_of_attack
+                    yield 'cut', striker_position, striker_speed, striker_angle, \
+                        "Cut Shot with angle: %0.2f degrees Speed: %s" % (force_angle, striker_speed)
     """ Also try out rebound cut shots, if possible, not accurate though """
     for center in pocket_centers:
         for coin in playable_coins:
             expected_position = center + (coin.position - center).normalize() * \
                                 (center.distance_to(coin.position) + striker_radius + coin_radius)
             """ Also check if expected position is with board.. """
-            if not check_along_path(coin.position, center, 2 * coin_radius,
-                                    [coin_ for coin_ in board_coins if coin_ != coin])\
+            if not path_index.is_blocked(coin.position, center, 2 * coin_radius, coin)\
                     and check_inside_container(expected_position, striker_radius, container):
-                for striker_x in range(int(x_limits[0]), int(x_limits[1] + 1), 1):
-                    striker_position = Vector2(striker_x, y_position)
-                    rebound_x__ = lambda rebound_y_: \
-                        expected_position.x + (striker_position.x - expected_position.x) * \
-                        (expected_position.y - rebound_y_) / (expected_position.y + striker_position.y - 2 * rebound_y_)
-                    rebound_y__ = lambda rebound_x_: \
-                        expected_position.y + (striker_position.y - expected_position.y) * \
-                        (expected_position.x - rebound_x_) / (expected_position.x + striker_position.x - 2 * rebound_x_)
-                    rebounds = [
-                        Vector2(container.left + striker_radius, rebound_y__(container.left + striker_radius)),
-                        Vector2(container.right - striker_radius, rebound_y__(container.right - striker_radius)),
-                        Vector2(rebound_x__(container.top + striker_radius), container.top + striker_radius),
-                        Vector2(rebound_x__(container.bottom - striker_radius), container.bottom - striker_radius),
-                    ]
-                    for rebound_position in rebounds:
-                        angle_of_attack = ___((rebound_position - striker_position).angle_to(direction_vec))
-                        force_angle = ___((center - coin.position).angle_to(expected_position - rebound_position))
-                        if abs(force_angle) <= max_rebound_cut_shot_angle and abs(angle_of_attack) <= max_angle and \
-                                not check_along_path(rebound_position, expected_position, striker_radius + coin_radius,
-                                                     [coin_ for coin_ in board_coins if coin_ != coin],
-                                                     round_end=True) and \
-                                not check_along_path(rebound_position, striker_position, coin_radius + striker_radius,
-                                                     board_coins):
-                            carrom.striker.position = striker_position
-                            striker_speed = rebound_cut_shot_speed(
-                                carrom, striker_position, coin.position, rebound_position, expected_position,
-                                force_angle, center, decelerate, e, dt)
-                            striker_angle = -90 - angle_of_attack if player == 0 else 90 - angle_of_attack
-                            carrom.striker.velocity.from_polar((striker_speed, striker_angle))
-                            print("AI", carrom.current_player(), "Tries Rebound Cut Shot with angle:",
-                                  "%0.2f" % force_angle, "degrees", "Speed:", striker_speed)
-                            return
-
-    """ Simply hit straight at some coin """
-    for coin in playable_coins:
-        for striker_x in range(int(x_limits[0]), int(x_limits[1] + 1), 1):
-            striker_position = Vector2(striker_x, y_position)
-            angle_of_attack = ___((coin.position - striker_position).angle_to(direction_vec))
-            attack_vector = coin.position - striker_position
-            collision_position = striker_position + attack_vector.normalize() * \
-                                 (attack_vector.length() - coin_radius - striker_radius)
-            if not check_along_path(striker_position, collision_position, striker_radius + coin_radius,
-                                    [coin_ for coin_ in board_coins if coin_ != coin], round_end=True) and \
-                    abs(angle_of_attack) <= max_angle:
+                """ Each striker position with a rebound on each of the four walls """
+                shot_x, shot_y = np.tile(striker_x, 4), np.tile(striker_y, 4)
+                rebound_x, rebound_y = sweep_rebounds(shot_x, shot_y, expected_position, striker_radius, container)
+                angle_of_attack = sweep_angles(rebound_x - shot_x, rebound_y - shot_y, direction_vec.x,
+                                               direction_vec.y)
+                force_angle = sweep_angles(center.x - coin.position.x, center.y - coin.position.y,
+                                           expected_position.x - rebound_x, expected_position.y - rebound_y)
+                feasible = np.isfinite(rebound_x + rebound_y) & (abs(force_angle) <= max_rebound_cut_shot_angle) & \
+                    (abs(angle_of_attack) <= max_angle)
+                clear_paths(feasible, path_index, rebound_x, rebound_y, expected_position.x, expected_position.y,
+                            striker_radius + coin_radius, coin, round_end=True)
+                clear_paths(feasible, path_index, rebound_x, rebound_y, shot_x, shot_y, coin_radius + striker_radius)
+                index = best_shot(feasible, abs(force_angle))
+                if index is not None:
+                    striker_position = Vector2(shot_x[index], y_position)
+                    rebound_position = Vector2(rebound_x[index], rebound_y[index])
+                    force_angle, angle_of_attack = float(force_angle[index]), float(angle_of_attack[index])
+                    striker_speed = rebound_cut_shot_speed(
+                        carrom, striker_position, coin.position, rebound_position, expected_position,
+                        force_angle, center, decelerate, e, dt, calibration)
+                    striker_angle = -90 - angle_of_attack if player == 0 else 90 - angle_of_attack
+                    yield 'rebound cut', striker_position, striker_speed, striker_angle, \
+                        "Tries Rebound Cut Shot with angle: %0.2f degrees Speed: %s" % (force_angle, striker_speed)
+
+    """ Simply hit straight at some coin, and if nothing can be hit either way don't worry about the fouls, try
+    hitting the coin anyway """
+    for check_paths in (True, False):
+        for coin in playable_coins:
+            attack_x, attack_y = coin.position.x - striker_x, coin.position.y - striker_y
+            angle_of_attack = sweep_angles(attack_x, attack_y, direction_vec.x, direction_vec.y)
+            feasible = abs(angle_of_attack) <= max_angle
+            if check_paths:
+                """ Path of the striker till it touches the coin """
+                length = np.hypot(attack_x, attack_y)
+                scale = (length - coin_radius - striker_radius) / length
+                clear_paths(feasible, path_index, striker_x, striker_y, striker_x + attack_x * scale,
+                            striker_y + attack_y * scale, striker_radius + coin_radius, coin, round_end=True)
+            """ Straighter hits are more accurate """
+            index = best_shot(feasible, abs(angle_of_attack))
+            if index is not None:
                 """ Simply hit the coins with max speed """
-                carrom.striker.position = striker_position
+                angle_of_attack = float(angle_of_attack[index])
                 striker_angle = -90 - angle_of_attack if player == 0 else 90 - angle_of_attack
-                carrom.striker.velocity.from_polar((max_speed, striker_angle))
-                print("AI", carrom.current_player(), "does a simply direct hit with angle:",
-                      "%0.2f" % angle_of_attack, "degrees")
-                return
-
-    """ Simply hit rebound shot at some coin """
-    rebound_x__ = lambda striker_pos_, coin_pos_, rebound_y_: coin_pos_.x + (striker_pos_.x - coin_pos_.x) * \
-                                                              (coin_pos_.y - rebound_y_) / (
-                                                                      coin_pos_.y + striker_pos_.y - 2 * rebound_y_)
-    rebound_y__ = lambda striker_pos_, coin_pos_, rebound_x_: coin_pos_.y + (striker_pos_.y - coin_pos_.y) * \
-                                                              (coin_pos_.x - rebound_x_) / (
-                                                                      coin_pos_.x + striker_pos_.x - 2 * rebound_x_)
-
-    for coin in playable_coins:
-        for striker_x in range(int(x_limits[0]), int(x_limits[1] + 1), 1):
-            striker_position, c_pos, s_radius = Vector2(striker_x, y_position), coin.position, striker_radius
-            c_left, c_right, c_top, c_bottom = container.left, container.right, container.top, container.bottom
-            rebounds = [
-                Vector2(c_left + s_radius, rebound_y__(striker_position, c_pos, c_left + s_radius)),
-                Vector2(c_right - s_radius, rebound_y__(striker_position, c_pos, c_right - s_radius)),
-                Vector2(rebound_x__(striker_position, c_pos, c_top + s_radius), c_top + s_radius),
-                Vector2(rebound_x__(striker_position, c_pos, c_bottom - s_radius), c_bottom - s_radius),
-            ]
-            for rebound_position in rebounds:
-                angle_of_attack = ___((rebound_position - striker_position).angle_to(direction_vec))
-                attack_vector = coin.position - rebound_position
-                collision_position = rebound_position + attack_vector.normalize() * \
-                                     (attack_vector.length() - coin_radius - striker_radius)
-                if abs(angle_of_attack) <= max_angle and \
-                        not check_along_path(rebound_position, collision_position, striker_radius + coin_radius,
-                                             [coin_ for coin_ in board_coins if coin_ != coin], round_end=True) and \
-                        not check_along_path(rebound_position, striker_position, coin_radius + striker_radius,
-                                             board_coins):
-                    """ Simply hit the coins with max speed """
-                    carrom.striker.position = striker_position
-                    striker_angle = -90 - angle_of_attack if player == 0 else 90 - angle_of_attack
-                    carrom.striker.velocity.from_polar((max_speed, striker_angle))
-                    print("AI", carrom.current_player(), "does a simply rebound hit with angle:",
-                          "%0.2f" % angle_of_attack, "degrees")
-                    return
-    """ If nothing can be hit either way don't worry about the fouls try hitting the coin """
-    """ Simply hit straight at some coin """
-    for coin in playable_coins:
-        for striker_x in range(int(x_limits[0]), int(x_limits[1] + 1), 1):
-            striker_position = Vector2(striker_x, y_position)
-            angle_of_attack = ___((coin.position - striker_position).angle_to(direction_vec))
-            attack_vector = coin.position - striker_position
-            if abs(angle_of_attack) <= max_angle:
+                yield 'hit', Vector2(striker_x[index], y_position), max_speed, striker_angle, \
+                    "does a simply direct hit with angle: %0.2f degrees" % angle_of_attack + \
+                    ("" if check_paths else " may face penalty")
+
+        """ Simply hit rebound shot at some coin """
+        for coin in playable_coins:
+            shot_x, shot_y = np.tile(striker_x, 4), np.tile(striker_y, 4)
+            rebound_x, rebound_y = sweep_rebounds(shot_x, shot_y, coin.position, striker_radius, container)
+            angle_of_attack = sweep_angles(rebound_x - shot_x, rebound_y - shot_y, direction_vec.x, direction_vec.y)
+            attack_x, attack_y = coin.position.x - rebound_x, coin.position.y - rebound_y
+            feasible = np.isfinite(rebound_x + rebound_y) & (abs(angle_of_attack) <= max_angle)
+            if check_paths:
+                length = np.hypot(attack_x, attack_y)
+                scale = (length - coin_radius - striker_radius) / length
+                clear_paths(feasible, path_index, rebound_x, rebound_y, rebound_x + attack_x * scale,
+                            rebound_y + attack_y * scale, striker_radius + coin_radius, coin, round_end=True)
+                clear_paths(feasible, path_index, rebound_x, rebound_y, shot_x, shot_y, coin_radius + striker_radius)
+            """ Shorter paths are more accurate """
+            index = best_shot(feasible, np.hypot(rebound_x - shot_x, rebound_y - shot_y) + np.hypot(attack_x, attack_y))
+            if index is not None:
                 """ Simply hit the coins with max speed """
-                carrom.striker.position = striker_position
+                angle_of_attack = float(angle_of_attack[index])
                 striker_angle = -90 - angle_of_attack if player == 0 else 90 - angle_of_attack
-                carrom.striker.velocity.from_polar((max_speed, striker_angle))
-                print("AI", carrom.current_player(), "does a simply direct hit with angle:",
-                      "%0.2f" % angle_of_attack, "degrees", "may face penalty")
-                return
-    for coin in playable_coins:
-        for striker_x in range(int(x_limits[0]), int(x_limits[1] + 1), 1):
-            striker_position, c_pos, s_radius = Vector2(striker_x, y_position), coin.position, striker_radius
-            c_left, c_right, c_top, c_bottom = container.left, container.right, container.top, container.bottom
-            rebounds = [
-                Vector2(c_left + s_radius, rebound_y__(striker_position, c_pos, c_left + s_radius)),
-                Vector2(c_right - s_radius, rebound_y__(striker_position, c_pos, c_right - s_radius)),
-                Vector2(rebound_x__(striker_position, c_pos, c_top + s_radius), c_top + s_radius),
-                Vector2(rebound_x__(striker_position, c_pos, c_bottom - s_radius), c_bottom - s_radius),
-            ]
-            for rebound_position in rebounds:
-                angle_of_attack = ___((rebound_position - striker_position).angle_to(direction_vec))
-                attack_vector = coin.position - rebound_position
-                if abs(angle_of_attack) <= max_angle:
-                    """ Simply hit the coins with max speed """
-                    carrom.striker.position = striker_position
-                    striker_angle = -90 - angle_of_attack if player == 0 else 90 - angle_of_attack
-                    carrom.striker.velocity.from_polar((max_speed, striker_angle))
-                    print("AI", carrom.current_player(), "does a simply rebound hit with angle:",
-                          "%0.2f" % angle_of_attack, "degrees", "may face penalty")
-                    return
-    print("Nothing done..")
+                yield 'rebound hit', Vector2(shot_x[index], y_position), max_speed, striker_angle, \
+                    "does a simply rebound hit with angle: %0.2f degrees" % angle_of_attack + \
+                    ("" if check_paths else " may face penalty")
+
+
+def sweep_angles(from_x, from_y, to_x, to_y):
+    """ Same as ___(Vector2(from_x, from_y).angle_to(Vector2(to_x, to_y))), for arrays (or numbers) """
+    angles = np.degrees(np.arctan2(to_y, to_x) - np.arctan2(from_y, from_x)) % 360
+    return np.where(angles <= 180, angles, angles - 360)
+
+
+def sweep_rebounds(start_x, start_y, target: Vector2, radius, container):
+    """ Points at the given radius from the walls, from which a shot from the start positions reflects towards the
+    target. The start positions are given four times, for rebounds on the left, right, top and bottom walls, in
+    that order. Returns infinity (or nan) where there is no such point """
+    count = len(start_x) // 4
+    rebound_x, rebound_y = np.empty_like(start_x), np.empty_like(start_y)
+    rebound_x[:2 * count] = np.repeat([container.left + radius, container.right - radius], count)
+    rebound_y[2 * count:] = np.repeat([container.top + radius, container.bottom - radius], count)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        walls_x = rebound_x[:2 * count]
+        rebound_y[:2 * count] = target.y + (start_y[:2 * count] - target.y) * (target.x - walls_x) / \
+            (target.x + start_x[:2 * count] - 2 * walls_x)
+        walls_y = rebound_y[2 * count:]
+        rebound_x[2 * count:] = target.x + (start_x[2 * count:] - target.x) * (target.y - walls_y) / \
+            (target.y + start_y[2 * count:] - 2 * walls_y)
+    return rebound_x, rebound_y
+
+
+def clear_paths(feasible, path_index, start_x, start_y, end_x, end_y, distance, exclude=None, round_end=False):
+    """ Unsets the feasible flags of the shots whose path from start to end is blocked by the coins (other than
+    exclude), only the feasible shots are checked """
+    indices = np.flatnonzero(feasible)
+    if len(indices) == 0:
+        return
+    count = len(feasible)
+    starts = np.column_stack((np.broadcast_to(start_x, count), np.broadcast_to(start_y, count)))[indices]
+    ends = np.column_stack((np.broadcast_to(end_x, count), np.broadcast_to(end_y, count)))[indices]
+    feasible[indices] = ~path_index.blocked(starts, ends, distance, exclude, round_end=round_end)
+
+
+def best_shot(feasible, cost):
+    """ Index of the feasible shot with the least cost, or None """
+    if not feasible.any():
+        return None
+    return int(np.argmin(np.where(feasible, cost, np.inf)))
 
 
 def straight_shot_speed(carrom: Carrom, striker_position: Vector2, coin_position: Vector2,
-                        pocket_center: Vector2, decelerate, e):
+                        pocket_center: Vector2, decelerate, e, calibration=None):
     board = carrom.board
     distance_coin_pocket = pocket_center.distance_to(coin_position)
     distance_striker_coin = striker_position.distance_to(coin_position)
+    if calibration is not None:
+        return calibrated_speed(calibration, board, distance_striker_coin, distance_coin_pocket)
     col_coin_speed = sqrt(2 * distance_coin_pocket * decelerate)
     col_striker_speed = col_coin_speed * (board.COIN_MASS + board.STRIKER_MASS) / ((1 + e) * board.STRIKER_MASS)
     striker_speed = sqrt(col_striker_speed ** 2 + 2 * decelerate * distance_striker_coin)
@@ -356,10 +412,12 @@ def straight_shot_speed(carrom: Carrom, striker_position: Vector2, coin_position
 
 
 def rebound_shot_speed(carrom: Carrom, striker_position: Vector2, coin_position: Vector2, rebound_position: Vector2,
-                       pocket_center: Vector2, decelerate, e):
+                       pocket_center: Vector2, decelerate, e, calibration=None):
     board = carrom.board
     distance_striker_coin = striker_position.distance_to(rebound_position) + rebound_position.distance_to(coin_position)
     distance_coin_pocket = pocket_center.distance_to(coin_position)
+    if calibration is not None:
+        return calibrated_speed(calibration, board, distance_striker_coin, distance_coin_pocket)
     col_coin_speed = sqrt(2 * distance_coin_pocket * decelerate)
     col_striker_speed = col_coin_speed * (board.COIN_MASS + board.STRIKER_MASS) / ((1 + e) * board.STRIKER_MASS)
     striker_speed = sqrt(col_striker_speed ** 2 + 2 * decelerate * distance_striker_coin)
@@ -367,10 +425,12 @@ def rebound_shot_speed(carrom: Carrom, striker_position: Vector2, coin_position:
 
 
 def doubling_shot_speed(carrom: Carrom, striker_position: Vector2, coin_position: Vector2, rebound_position: Vector2,
-                        pocket_center: Vector2, decelerate, e):
+                        pocket_center: Vector2, decelerate, e, calibration=None):
     board = carrom.board
     distance_striker_coin = striker_position.distance_to(coin_position)
     distance_coin_pocket = pocket_center.distance_to(rebound_position) + rebound_position.distance_to(coin_position)
+    if calibration is not None:
+        return calibrated_speed(calibration, board, distance_striker_coin, distance_coin_pocket)
     col_coin_speed = sqrt(2 * distance_coin_pocket * decelerate)
     col_striker_speed = col_coin_speed * (board.COIN_MASS + board.STRIKER_MASS) / ((1 + e) * board.STRIKER_MASS)
     striker_speed = sqrt(col_striker_speed ** 2 + 2 * decelerate * distance_striker_coin)
@@ -378,11 +438,13 @@ def doubling_shot_speed(carrom: Carrom, striker_position: Vector2, coin_position
 
 
 def cut_shot_speed(carrom: Carrom, striker_position: Vector2, coin_position: Vector2, expected_position: Vector2,
-                   force_angle, pocket_center: Vector2, decelerate, e, dt):
+                   force_angle, pocket_center: Vector2, decelerate, e, dt, calibration=None):
     board = carrom.board
     distance_coin_pocket = pocket_center.distance_to(coin_position)
     """ Added a little more to be on the safer side """
     distance_striker_coin = striker_position.distance_to(expected_position)
+    if calibration is not None:
+        return calibrated_cut_speed(calibration, board, distance_striker_coin, distance_coin_pocket, force_angle)
     col_coin_speed = sqrt(2 * distance_coin_pocket * decelerate)
     col_striker_speed = col_coin_speed * (board.COIN_MASS + board.STRIKER_MASS) / \
                         ((1 + e) * board.STRIKER_MASS * cos(radians(force_angle)))
@@ -396,11 +458,14 @@ def cut_shot_speed(carrom: Carrom, striker_position: Vector2, coin_position: Vec
 
 
 def rebound_cut_shot_speed(carrom: Carrom, striker_position: Vector2, coin_position: Vector2, rebound_position: Vector2,
-                           expected_position: Vector2, force_angle, pocket_center: Vector2, decelerate, e, dt):
+                           expected_position: Vector2, force_angle, pocket_center: Vector2, decelerate, e, dt,
+                           calibration=None):
     board = carrom.board
     distance_striker_coin = striker_position.distance_to(rebound_position) + \
         rebound_position.distance_to(expected_position)
     distance_coin_pocket = pocket_center.distance_to(coin_position)
+    if calibration is not None:
+        return calibrated_cut_speed(calibration, board, distance_striker_coin, distance_coin_pocket, force_angle)
     col_coin_speed = sqrt(2 * distance_coin_pocket * decelerate)
     col_striker_speed = col_coin_speed * (board.COIN_MASS + board.STRIKER_MASS) / \
                         ((1 + e) * board.STRIKER_MASS * cos(radians(force_angle)))
@@ -411,3 +476,21 @@ def rebound_cut_shot_speed(carrom: Carrom, striker_position: Vector2, coin_posit
     time = time - (time % dt)
     striker_speed = (distance_striker_coin + decelerate * time ** 2 / 2) / time
     return striker_speed
+
+
+def calibrated_speed(calibration, board, distance_striker_coin, distance_coin_pocket):
+    """ Speed of a straight hit from the calibration tables, the striker travels till it touches the coin, and the
+    coin into the pocket """
+    col_coin_speed = calibration.get_speed(distance_coin_pocket + POCKET_MARGIN * board.coin_radius)
+    col_striker_speed = col_coin_speed / calibration.get_transfer(0)
+    """ The striker may be placed touching the coin already """
+    distance = max(0.0, distance_striker_coin - board.striker_radius - board.coin_radius)
+    return calibration.get_speed(distance, col_striker_speed)
+
+
+def calibrated_cut_speed(calibration, board, distance_striker_coin, distance_coin_pocket, force_angle):
+    """ Speed of a cut from the calibration tables, timed so that the striker reaches the contact at the end of a
+    step """
+    col_coin_speed = calibration.get_speed(distance_coin_pocket + POCKET_MARGIN * board.coin_radius)
+    col_striker_speed = col_coin_speed / calibration.get_transfer(force_angle)
+    return calibration.get_timed_speed(distance_striker_coin, col_striker_speed)
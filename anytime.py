@@ -0,0 +1,178 @@
+from carrom import Carrom
+from random_ai import get_choices, set_choice, score_choices, robust_scores, get_noise, CrossEntropy
+from math import ceil
+from time import perf_counter
+import random
+
+""" Anytime decisions, the ais as generators which yield the best shot found so far after every step of their work
+(a simulated choice, a search iteration), so that a decision can be cut short at a deadline or cancelled and still
+return the best shot found so far. A shot is yielded as a choice of random_ai (striker x position, striker angle,
+striker speed, carrom men orientation or None) and its score (or None if it was not simulated). The carrom is
+restored to its state when the generator is closed. """
+
+
+def get_chunk_size(batch=False, workers=0, coordinator=None):
+    """ Number of choices simulated between the yields of the random searches, choices simulated in a batch, by
+    the rollout pool or on the workers of the coordinator (a job for each of them) are simulated a few at a time,
+    so that the deadline is checked between them """
+    if batch:
+        return 16
+    if coordinator is not None:
+        from distributed import CHUNK_SIZE
+        return CHUNK_SIZE * max(1, coordinator.num_workers)
+    if workers:
+        return 2 * workers
+    return 1
+
+
+def score_chunk(carrom: Carrom, state, choices, permit_orientation, dt, decelerate, e, batch, workers, variants,
+                risk, noise, rng, coordinator=None):
+    """ Scores of the choices, by random_ai.robust_scores if variants is more than 1, else random_ai.score_choices """
+    if variants > 1:
+        return robust_scores(carrom, state, choices, permit_orientation, dt, decelerate, e, variants, noise, risk, rng,
+                             batch, workers, coordinator=coordinator)
+    return score_choices(carrom, state, choices, permit_orientation, dt, decelerate, e, batch, workers,
+                         coordinator=coordinator)
+
+
+def random_decisions(carrom: Carrom, max_angle, max_speed, decelerate, e, dt, permit_orientation=False,
+                     num_choices=None, rng=random, batch=False, workers=0, variants=1, risk=0.0, noise=None,
+                     coordinator=None):
+    """ Random search, yields the best choice after every simulated choice, num_choices are simulated (or till
+    closed if None). The choices are simulated in a batch, by the rollout pool of workers or on the workers of the
+    coordinator (a chunk of them between the yields) and scored under execution noise if variants is more than 1,
+    as by random_ai.ai """
+    state = carrom.snapshot()
+    chunk_size = get_chunk_size(batch, workers, coordinator)
+    if variants > 1 and noise is None:
+        noise = get_noise(max_angle, max_speed)
+    max_score, best_choice, count = None, None, 0
+    try:
+        while num_choices is None or count < num_choices:
+            choices = get_choices(carrom, max_angle, max_speed,
+                                  chunk_size if num_choices is None else min(chunk_size, num_choices - count), rng)
+            if not permit_orientation:
+                choices = [choice[:3] + (None,) for choice in choices]
+            scores = score_chunk(carrom, state, choices, permit_orientation, dt, decelerate, e, batch, workers,
+                                 variants, risk, noise, rng, coordinator)
+            count += len(choices)
+            for choice, score in zip(choices, scores):
+                if max_score is None or score > max_score:
+                    max_score, best_choice = score, choice
+            yield best_choice, max_score
+    finally:
+        carrom.restore(state)
+
+
+def cross_entropy_decisions(carrom: Carrom, max_angle, max_speed, decelerate, e, dt, permit_orientation=False,
+                            num_choices=40, iterations=4, rng=random, batch=False, workers=0, variants=1, risk=0.0,
+                            noise=None, coordinator=None):
+    """ Cross entropy search, num_choices are simulated in iterations batches and the distribution is refit after
+    each batch, yields the best choice after every simulated choice (or chunk of them, as random_decisions) """
+    search = CrossEntropy(carrom, max_angle, max_speed, rng=rng)
+    batch_size = ceil(num_choices / iterations)
+    chunk_size = get_chunk_size(batch, workers, coordinator)
+    if variants > 1 and noise is None:
+        noise = get_noise(max_angle, max_speed)
+    state = carrom.snapshot()
+    max_score, best_choice = None, None
+    try:
+        for start in range(0, num_choices, batch_size):
+            choices = search.sample(min(batch_size, num_choices - start))
+            scores = []
+            for chunk_start in range(0, len(choices), chunk_size):
+                chunk = choices[chunk_start:chunk_start + chunk_size]
+                if not permit_orientation:
+                    chunk = [choice[:3] + (None,) for choice in chunk]
+                scores += score_chunk(carrom, state, chunk, permit_orientation, dt, decelerate, e, batch, workers,
+                                      variants, risk, noise, rng, coordinator)
+                for choice, score in zip(chunk, scores[chunk_start:]):
+                    if max_score is None or score > max_score:
+                        max_score, best_choice = score, choice
+                yield best_choice, max_score
+            search.update(choices, scores)
+    finally:
+        carrom.restore(state)
+
+
+def heuristic_decisions(carrom: Carrom, max_angle, max_speed, decelerate, e, dt, verify=0, calibrate=False,
+                        rng=random):
+    """ Yields the first shot of the heuristic ai straight away (a random shot drawn with rng if it has none), and
+    then, if verify is set, the best so far of verify of its candidate shots (as ai.verify_shots) with its score
+    after each of them is simulated. The speeds are calibrated if calibrate is set """
+    from ai import get_shots, get_candidates
+    from calibration import get_calibration
+    from random_ai import score_batch
+    calibration = get_calibration(carrom.board, dt, decelerate, e, max_speed) if calibrate else None
+    shots = get_shots(carrom, max_angle, max_speed, decelerate, e, dt, calibration=calibration)
+    shot = next(shots, None)
+    if shot is None:
+        yield get_choices(carrom, max_angle, max_speed, 1, rng)[0][:3] + (None,), None
+        return
+    best_choice, max_score = (shot[1].x, shot[3], shot[2], None), None
+    yield best_choice, max_score
+    if not verify:
+        return
+    """ The shots are generated one by one, and the candidates are simulated one by one """
+    categories = {shot[0]: [shot]}
+    for shot in shots:
+        categories.setdefault(shot[0], []).append(shot)
+        yield best_choice, max_score
+    for _, position, striker_speed, striker_angle, _ in get_candidates(categories, verify):
+        choice = (position.x, striker_angle, striker_speed, None)
+        score, = score_batch(carrom, [choice], False, dt, decelerate, e)
+        if max_score is None or score > max_score:
+            max_score, best_choice = score, choice
+        yield best_choice, max_score
+
+
+def mcts_decisions(carrom: Carrom, max_angle, max_speed, decelerate, e, dt, permit_orientation=False, rng=random,
+                   **kwargs):
+    """ Monte Carlo tree search, yields the best shot after every iteration, searches till closed """
+    from mcts_ai import MCTS
+    search = MCTS(carrom, max_angle, max_speed, decelerate, e, dt, permit_orientation, rng, **kwargs)
+    try:
+        while True:
+            search.iterate()
+            node = search.get_best_child()
+            if node is None:
+                """ Game is over, there is nothing to search """
+                yield search.get_choice(search.get_best_shot(), search.player), None
+                return
+            yield search.get_choice(node.shot, search.player), node.get_mean()
+    finally:
+        carrom.restore(search.root.state)
+
+
+def lookahead_decisions(carrom: Carrom, max_angle, max_speed, decelerate, e, dt, permit_orientation=False,
+                        rng=random, **kwargs):
+    """ Two ply lookahead, yields the best shot after the evaluation of each of its most promising shots, the
+    search logs its nodes per second when closed """
+    from lookahead_ai import Lookahead
+    search = Lookahead(carrom, max_angle, max_speed, decelerate, e, dt, permit_orientation, rng, **kwargs)
+    return search.decisions()
+
+
+def decide(decisions, deadline=None, cancel=None, poll=None):
+    """ Consumes the decisions till they are exhausted, the deadline (perf_counter time) is passed or cancel
+    (threading.Event) is set, poll is called after every decision. Returns the last (best) shot and its score,
+    the first one is always waited for """
+    best = None
+    try:
+        for best in decisions:
+            if poll is not None:
+                poll()
+            if (deadline is not None and perf_counter() >= deadline) or (cancel is not None and cancel.is_set()):
+                break
+    finally:
+        decisions.close()
+    return best
+
+
+def play(carrom: Carrom, decisions, time_budget=None, cancel=None, poll=None):
+    """ Decides within the time budget (seconds) and sets up the striker (and orientation) for the shot,
+    returns the shot and its score """
+    deadline = None if time_budget is None else perf_counter() + time_budget
+    choice, score = decide(decisions, deadline, cancel, poll)
+    set_choice(carrom, choice, choice[3] is not None)
+    return choice, score
@@ -0,0 +1,134 @@
+from collections import namedtuple
+import numpy as np
+from geometry import Vector2
+from physics import board_arrays, resolve_collisions, integrate, check_pocketed, check_moving
+
+""" Summary of a simulated shot, pocketed is the list of coins pocketed (in order) and first_collision is
+the pair of coins that collided first or None """
+Outcome = namedtuple('Outcome', ['pocketed', 'pocketed_striker', 'pocketed_queen', 'first_collision'])
+
+
+class BatchResult:
+    """ Final states of a batch of boards, simulated in lockstep from the same carrom """
+    def __init__(self, carrom, coins, position, velocity, pocketed_step, first_collision, num_steps):
+        self.striker, self.queen = carrom.striker, carrom.queen
+        """ Coins in the simulation order """
+        self.coins = coins
+        """ Final positions and velocities (2, boards, coins) """
+        self.position = position
+        self.velocity = velocity
+        """ Step at which a coin was pocketed (boards, coins), -1 if it was not pocketed """
+        self.pocketed_step = pocketed_step
+        """ Indices of the first pair of coins that collided (boards, 2), -1 if no collision """
+        self.first_collision = first_collision
+        self.num_steps = num_steps
+
+    def __len__(self):
+        return self.position.shape[1]
+
+    def get_pocketed(self, board):
+        """ Returns the indices of the coins pocketed on the given board, in the order they were pocketed """
+        pocketed = np.flatnonzero(self.pocketed_step[board] >= 0)
+        return pocketed[np.argsort(self.pocketed_step[board, pocketed], kind='stable')].tolist()
+
+    def get_outcome(self, board):
+        """ Returns the outcome summary of the shot simulated on the given board """
+        pocketed = [self.coins[index] for index in self.get_pocketed(board)]
+        first_collision = None
+        if self.first_collision[board, 0] >= 0:
+            first_collision = [self.coins[index] for index in self.first_collision[board].tolist()]
+        return Outcome([coin for coin in pocketed if coin is not self.striker and coin is not self.queen],
+                       self.striker in pocketed, self.queen in pocketed, first_collision)
+
+    def get_outcomes(self):
+        return [self.get_outcome(board) for board in range(len(self))]
+
+    def apply(self, carrom, board):
+        """ Updates the given carrom to the final state of the given board, the carrom must be in the same state
+        as the carrom that was simulated (for example a copy of it), call apply_rules to proceed the game """
+        coins = carrom.get_simulation_coins()
+        assert len(coins) == len(self.coins)
+        for coin, x, y, vx, vy in zip(coins, *self.position[:, board].tolist(), *self.velocity[:, board].tolist()):
+            coin.position = Vector2(x, y)
+            coin.velocity = Vector2(vx, vy)
+        for index in self.get_pocketed(board):
+            carrom.pocket_coin(coins[index])
+        if not carrom.first_collision and self.first_collision[board, 0] >= 0:
+            carrom.first_collision = [coins[index] for index in self.first_collision[board].tolist()]
+
+
+def simulate_batch(carrom, shots, dt, decelerate, e, max_steps=None):
+    """ Simulates the given shots from the current state of the carrom, all the boards are simulated in lockstep with
+    the array kernels. Each shot is a tuple of striker position, striker velocity and orientation of the carrom men
+    (None to keep the current positions, only allowed for the first strike). The carrom itself is not changed.
+    The result is identical to simulating each shot on a copy of the carrom """
+    coins = carrom.get_simulation_coins()
+    num_boards, num_coins = len(shots), len(coins)
+    position = np.empty((2, num_boards, num_coins))
+    position[0], position[1] = [coin.position.x for coin in coins], [coin.position.y for coin in coins]
+    velocity = np.empty((2, num_boards, num_coins))
+    velocity[0], velocity[1] = [coin.velocity.x for coin in coins], [coin.velocity.y for coin in coins]
+
+    """ Place the striker and rotate the carrom men as given by the shots """
+    index = {id(coin): index for index, coin in enumerate(coins)}
+    striker = index[id(carrom.striker)]
+    orientations = {}
+    for board, (striker_position, striker_velocity, orientation) in enumerate(shots):
+        position[:, board, striker] = striker_position[0], striker_position[1]
+        velocity[:, board, striker] = striker_velocity[0], striker_velocity[1]
+        if orientation is not None:
+            if orientation not in orientations:
+                orientations[orientation] = [(index[id(coin)], position_.x, position_.y) for coin, position_ in
+                                             zip(carrom.coins, carrom.get_carrom_men_positions(orientation))
+                                             if id(coin) in index]
+            for coin, x, y in orientations[orientation]:
+                position[:, board, coin] = x, y
+
+    radius = np.array([coin.radius for coin in coins], dtype=float)
+    mass = np.array([coin.mass for coin in coins], dtype=float)
+    pairs = np.triu_indices(num_coins, 1)
+    low, high, pocket_centers = board_arrays(carrom.board)
+    pocket_radius = carrom.board.pocket_radius
+    if carrom.first_collision:
+        first_collision = np.tile([coins.index(coin) for coin in carrom.first_collision], (num_boards, 1))
+    else:
+        first_collision = np.full((num_boards, 2), -1)
+    pocketed_step = np.full((num_boards, num_coins), -1)
+
+    """ Boards still being simulated, and their working copies, boards are dropped once all coins stop moving """
+    active = np.arange(num_boards)
+    position_, velocity_, first_collision_ = position.copy(), velocity.copy(), first_collision.copy()
+    step = 0
+    while len(active) and (max_steps is None or step < max_steps):
+        resolve_collisions(position_, velocity_, radius, mass, pairs, e, first_collision_)
+        integrate(position_, velocity_, radius, low, high, dt, decelerate)
+        pocketed = check_pocketed(position_, radius, pocket_centers, pocket_radius)
+        if pocketed.any():
+            """ Keep the state of the pocketed coins at the time they were pocketed """
+            rows, columns = np.nonzero(pocketed)
+            pocketed_step[active[rows], columns] = step
+            position[:, active[rows], columns] = position_[:, rows, columns]
+            velocity[:, active[rows], columns] = velocity_[:, rows, columns]
+            position_[:, rows, columns] = np.nan
+            velocity_[:, rows, columns] = 0.0
+        step += 1
+        moving = check_moving(velocity_)
+        if not moving.all():
+            store_boards(position, velocity, first_collision, active, position_, velocity_, first_collision_,
+                         ~moving)
+            active = active[moving]
+            position_, velocity_, first_collision_ = position_[:, moving], velocity_[:, moving], \
+                first_collision_[moving]
+    """ Boards still moving after max_steps """
+    store_boards(position, velocity, first_collision, active, position_, velocity_, first_collision_,
+                 np.ones(len(active), dtype=bool))
+    return BatchResult(carrom, coins, position, velocity, pocketed_step, first_collision, step)
+
+
+def store_boards(position, velocity, first_collision, active, position_, velocity_, first_collision_, done):
+    """ Copy the state of the given working boards back to the result arrays, pocketed coins keep their state """
+    boards = active[done]
+    on_board = ~np.isnan(position_[0, done])
+    position[:, boards] = np.where(on_board, position_[:, done], position[:, boards])
+    velocity[:, boards] = np.where(on_board, velocity_[:, done], velocity[:, boards])
+    first_collision[boards] = first_collision_[done]
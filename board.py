@@ -1,6 +1,4 @@
-from pygame import Rect
-from pygame import Vector2
-import pygame
+from geometry import Vector2, Rect
 from math import radians, sqrt
 from coin import Coin
 
@@ -144,36 +142,6 @@ class Board:
         self.center_outer_radius = m * Board.CENTER_OUTER_RADIUS
         self.center_inner_radius = m * Board.CENTER_INNER_RADIUS
 
-    def draw(self, win):
-        """ This function is called to draw the carrom board and its components on the given window"""
-        """ Draw the board and the frame """
-        pygame.draw.rect(win, (100, 0, 0), self.board)
-        pygame.draw.rect(win, (128, 100, 100), self.container)
-        """ Draw the pockets """
-        for pocket_center in self.pocket_centers:
-            pygame.draw.circle(win, (128, 128, 128), (int(pocket_center.x), int(pocket_center.y)),
-                               int(self.pocket_radius))
-        """ Draw the base lines """
-        for index, base_line in enumerate(self.base_lines):
-            pygame.draw.line(win, (100, 50, 50), base_line[0], base_line[1], 3 if index % 2 == 0 else 1)
-        """ Draw the base circles """
-
-        for base_circle_center in self.base_circle_centers:
-            pygame.draw.circle(win, (100, 50, 50), base_circle_center, int(self.base_radius), 1)
-            pygame.draw.circle(win, (100, 50, 50), base_circle_center, int(self.base_inner_radius))
-        """ Draw the center circles """
-
-        pygame.draw.circle(win, (100, 50, 50), self.container.center, int(self.center_outer_radius), 2)
-        pygame.draw.circle(win, (100, 50, 50), self.container.center, int(self.center_inner_radius))
-        """ Draw the arrow lines """
-        for arrow_line in self.arrow_lines:
-            pygame.draw.line(win, (100, 50, 50), arrow_line[0], arrow_line[1])
-
-        """ Draw the arrow arcs """
-        for arrow_arc in self.arrow_arcs:
-            arrow_arc[0].normalize()
-            pygame.draw.arc(win, (100, 50, 50), arrow_arc[0], arrow_arc[1], arrow_arc[2], 2)
-
     def get_container(self):
         """ Return the container to which the carrom coins are restricted to """
         return self.container
@@ -187,15 +155,6 @@ class Board:
                 return True
         return False
 
-    def draw_captured_coins(self, win, player, captured_coins):
-        """ This function draws the captured coins of the player on the frame """
-        # print("Captured Coins,", player, captured_coins)
-        for index, coin in enumerate(captured_coins):
-            x_offset = int(self.m * (Board.FRAME_LENGTH + index * Board.COIN_RADIUS * 3))
-            y_offset = int(self.board.bottom - 2 * self.coin_radius) if player == 0 else \
-                int(self.board.top + 2 * self.coin_radius)
-            pygame.draw.circle(win, coin.color, (x_offset, y_offset), int(self.coin_radius))
-
     """ Functions for striker positions """
 
     def get_striker_x_limits(self):
@@ -215,39 +174,3 @@ class Board:
     def get_striker_position(self, player):
         """ Returns the start position of the striker for the given player """
         return Vector2(self.get_striker_x_position(), self.get_striker_y_position(player))
-
-    """ Function to display notification, draws at the bottom end"""
-
-    def show_notification(self, win, message: str):
-        font_size = self.frame_width // 3
-        font = pygame.font.Font('freesansbold.ttf', font_size)
-        text = font.render(message, True, (0, 0, 0))
-        text_rect = text.get_rect()
-        text_rect.center = (self.board.right - self.frame_width - text_rect.width,
-                            self.board.bottom - self.frame_width // 2)
-        win.blit(text, text_rect)
-
-    """ Function to draw the speed and angle indication of the striker """
-
-    def draw_striker_arrow_pointer(self, win, striker, max_speed, draw_arrow=True):
-        striker_center = striker.position
-        if not draw_arrow:
-            """ Draw a simple line, from striker along orientation of velocity """
-            arrow_position = striker_center + striker.velocity * self.container.width / (3 * max_speed)
-            pygame.draw.line(win, (0, 0, 0), (int(striker_center.x), int(striker_center.y)),
-                             (int(arrow_position.x), int(arrow_position.y)))
-        else:
-            """ Draw a arrow """
-            velocity_indicator = striker.velocity * self.container.width / (3 * max_speed)
-            v_length = velocity_indicator.length()
-            """ Added a length greater than 1 to prevent draw arc from throwing an exception """
-            if v_length > 3:
-                arrow_box = Rect(int(striker_center.x - v_length), int(striker_center.y - v_length),
-                                 int(2 * v_length), int(2 * v_length))
-                pygame.draw.arc(win, (255, 100, 0), arrow_box,
-                                radians(velocity_indicator.angle_to(Vector2(1, 0)) - 30),
-                                radians(velocity_indicator.angle_to(Vector2(1, 0)) + 30), 1)
-                position_1 = striker_center + velocity_indicator * 1.1
-                position_2 = striker_center + velocity_indicator * 0.2
-                pygame.draw.line(win, (255, 100, 0), (int(position_1.x), int(position_1.y)),
-                                 (int(position_2.x), int(position_2.y)))
@@ -0,0 +1,71 @@
+from heapq import heapify, heappop, heappush
+from math import floor
+
+""" Offsets of a cell and its neighbouring cells in the uniform grid """
+NEIGHBOURHOOD = tuple((dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1))
+
+
+class SpatialHash:
+    """ Uniform grid of the coins, cell size must be at least the diameter of the largest coin,
+    so that coins which can touch lie in the same or neighbouring cells """
+    def __init__(self, coins, cell_size):
+        self.coins = coins
+        self.cell_size = cell_size
+        self.cells = {}
+        for index, coin in enumerate(coins):
+            self.cells.setdefault(self.get_cell(coin), []).append(index)
+
+    def get_cell(self, coin):
+        return floor(coin.position.x / self.cell_size), floor(coin.position.y / self.cell_size)
+
+    def neighbours(self, index, margin=0.0):
+        """ Returns the indices of the coins whose bounding box overlaps with the bounding box of the given coin,
+        grown by the margin, the cell size must be at least the diameter of the largest coin plus the margin """
+        coin = self.coins[index]
+        x, y = self.get_cell(coin)
+        neighbours = []
+        for dx, dy in NEIGHBOURHOOD:
+            for other in self.cells.get((x + dx, y + dy), ()):
+                other_coin = self.coins[other]
+                reach = coin.radius + other_coin.radius + margin
+                if other != index and abs(coin.position.x - other_coin.position.x) <= reach and \
+                        abs(coin.position.y - other_coin.position.y) <= reach:
+                    neighbours.append(other)
+        return neighbours
+
+
+def collision_pairs(coins, cell_size, awake_coins=None):
+    """ Yields the pairs of coins which may collide, in the same order as combinations(coins, 2), but only the pairs
+    whose bounding boxes overlap and where at least one of the coins is moving. Pairs where both the coins are at rest
+    can't change the velocities or be the first collision. A coin at rest may be set in motion by an earlier collision
+    in the same update, so its pairs that come later in the order are added once it starts moving.
+    awake_coins, if given, are the coins known to be moving, which saves checking the velocities of all the coins """
+    if awake_coins is None:
+        moving = [coin.check_moving() for coin in coins]
+    else:
+        awake_coins = set(awake_coins)
+        moving = [coin in awake_coins for coin in coins]
+    if not any(moving):
+        return
+    grid = SpatialHash(coins, cell_size)
+    pairs = set()
+    for index, is_moving in enumerate(moving):
+        if is_moving:
+            pairs.update((min(index, other), max(index, other)) for other in grid.neighbours(index))
+    heap = list(pairs)
+    heapify(heap)
+    while heap:
+        pair = heappop(heap)
+        coin1, coin2 = coins[pair[0]], coins[pair[1]]
+        if not (moving[pair[0]] or moving[pair[1]]):
+            continue
+        yield coin1, coin2
+        """ The pair may have collided, add the later pairs of a coin that was set in motion """
+        for index in pair:
+            if not moving[index] and coins[index].check_moving():
+                moving[index] = True
+                for other in grid.neighbours(index):
+                    later = (min(index, other), max(index, other))
+                    if later > pair and later not in pairs:
+                        pairs.add(later)
+                        heappush(heap, later)
@@ -0,0 +1,120 @@
+from coin import Coin
+from geometry import Vector2, Rect
+from bisect import bisect_left
+from math import cos, sin, radians
+import logging
+
+""" Speed calibration of the ai shots, measured on the stepped motion of Coin.update instead of the closed forms of
+continuous motion. The travel table holds the distance a coin travels before coming to rest for every speed of a
+single simulated run from the largest speed (the speeds of a run decrease by decelerate * dt every step, so the
+distance left from any speed of it is the same as of a run started at that speed). It is inverted by bisection, the
+speed needed to travel a distance and arrive with a given speed is the one whose distance left exceeds that of the
+arrival speed by the distance. The transfer table holds the ratio of the speed of a coin at rest after it is hit to
+the speed of the striker hitting it, by the cut angle, measured by colliding them with Carrom's collision check and
+response, at contact reached at the end of a step (as the cut shots are timed). """
+
+""" Margin (in pixels) by which the timed cut shots pass the contact point, so that the contact is detected in the
+step it is reached in spite of rounding """
+CONTACT_MARGIN = 1e-6
+""" Travel tables cover speeds up to this multiple of the largest striker speed, the speed of a shot may exceed the
+largest striker speed a little, and lookups beyond the table are clamped """
+TABLE_SPEED_FACTOR = 5
+
+
+class Calibration:
+    """ Travel and transfer tables for the given simulation parameters and board (for the radii and masses) """
+    def __init__(self, board, dt, decelerate, e, max_speed=200.0, angle_step=1.0, max_cut_angle=89.0):
+        self.dt, self.decelerate, self.e = dt, decelerate, e
+        self.board = board
+        """ Coins travel in a container they never reach """
+        self.container = Rect(-1e9, -1e9, 2e9, 2e9)
+        self.speeds, self.distances = self.simulate_travel(max_speed)
+        """ Number of lookups beyond the travel table, which were clamped to its end """
+        self.out_of_range = 0
+        self.angles = [angle_step * i for i in range(int(max_cut_angle / angle_step) + 1)]
+        self.transfers = [self.simulate_transfer(angle) for angle in self.angles]
+
+    def simulate_travel(self, max_speed):
+        """ Speeds of a run from max_speed till rest and the distance left from each of them, in increasing order """
+        coin = Coin(self.board.coin_radius, self.board.COIN_MASS, Vector2(0, 0), self.container)
+        coin.velocity = Vector2(max_speed, 0)
+        speeds, positions = [], []
+        while coin.check_moving():
+            speeds.append(coin.velocity.x)
+            positions.append(coin.position.x)
+            coin.update(self.dt, self.decelerate)
+        speeds.append(0.0)
+        positions.append(coin.position.x)
+        return speeds[::-1], [coin.position.x - position for position in positions[::-1]]
+
+    def simulate_transfer(self, angle, speed=10.0):
+        """ Ratio of the speed of the coin to the speed of the striker hitting it at the cut angle (degrees) """
+        board = self.board
+        contact_distance = board.striker_radius + board.coin_radius
+        coin = Coin(board.coin_radius, board.COIN_MASS, Vector2(0, 0), self.container)
+        striker = Coin(board.striker_radius, board.STRIKER_MASS, Vector2(0, 0), self.container)
+        striker.position = Vector2(-contact_distance * cos(radians(angle)) + CONTACT_MARGIN,
+                                   contact_distance * sin(radians(angle)))
+        striker.velocity = Vector2(speed, 0)
+        assert striker.check_collision(coin)
+        striker.collide(coin, self.e)
+        return coin.velocity.length() / speed
+
+    @staticmethod
+    def interpolate(xs, ys, x):
+        """ Piecewise linear interpolation of the table (xs increasing), clamped to its ends """
+        index = bisect_left(xs, x)
+        if index == 0:
+            return ys[0]
+        if index == len(xs):
+            return ys[-1]
+        x0, x1 = xs[index - 1], xs[index]
+        return ys[index - 1] + (ys[index] - ys[index - 1]) * (x - x0) / (x1 - x0)
+
+    def check_range(self, value, table):
+        """ Warns (once) about a lookup beyond the end of the table, which gets clamped """
+        if value > table[-1]:
+            self.out_of_range += 1
+            if self.out_of_range == 1:
+                logging.warning("Calibration lookup %.1f beyond the table (up to %.1f) is clamped, build the "
+                                "calibration for a larger max_speed" % (value, table[-1]))
+
+    def get_distance(self, speed):
+        """ Distance a coin travels from the speed till it comes to rest """
+        self.check_range(speed, self.speeds)
+        return self.interpolate(self.speeds, self.distances, speed)
+
+    def get_speed(self, distance, final_speed=0.0):
+        """ Speed at which a coin travels the distance and arrives with at least the final speed """
+        distance += self.get_distance(final_speed)
+        self.check_range(distance, self.distances)
+        return self.interpolate(self.distances, self.speeds, distance)
+
+    def get_transfer(self, angle):
+        """ Ratio of the speeds of the coin after and of the striker before a hit at the cut angle (degrees) """
+        return self.interpolate(self.angles, self.transfers, abs(angle))
+
+    def get_timed_speed(self, distance, final_speed=0.0):
+        """ Speed at which the striker travels the distance, arriving with at least the final speed, at the end of a
+        step, so that the contact is detected without overlap. The position after n steps from speed v is
+        n * dt * v - decelerate * dt ** 2 * n * (n - 1) / 2, as long as the speed stays above decelerate * dt """
+        dt, decelerate = self.dt, self.decelerate
+        speed = self.get_speed(distance, final_speed)
+        """ Steps taken to reach the distance, rounded down so that the striker arrives faster """
+        steps = max(1, int((speed - final_speed) / (decelerate * dt)))
+        distance += CONTACT_MARGIN
+        return (distance + decelerate * dt * dt * steps * (steps - 1) / 2) / (steps * dt)
+
+
+""" Calibrations by their board geometry and simulation parameters, built on first use """
+calibrations = {}
+
+
+def get_calibration(board, dt, decelerate, e, max_speed=40):
+    """ Returns the calibration for the board and parameters, building it on first use with travel tables for the
+    largest striker speed max_speed (or rebuilding it, if built for a smaller one) """
+    key = board.striker_radius, board.coin_radius, board.STRIKER_MASS, board.COIN_MASS, dt, decelerate, e
+    table_speed = TABLE_SPEED_FACTOR * max_speed
+    if key not in calibrations or calibrations[key].speeds[-1] < table_speed:
+        calibrations[key] = Calibration(board, dt, decelerate, e, table_speed)
+    return calibrations[key]
@@ -1,22 +1,55 @@
 from coin import CarromMen, Queen, Striker
-from pygame import Rect
-from pygame import Vector2
+from geometry import Vector2, Rect
 import logging
 import sys
 from math import sqrt
-from itertools import combinations
 from board import Board
+from broadphase import collision_pairs
+from fast_forward import FastForward, fast_forward_wait, can_reach_pocket
+from stepper import AdaptiveStepper
+from collections import namedtuple
 
 logging.basicConfig(stream=sys.stderr, level=logging.INFO)
 
+""" Mutable state of the carrom, as returned by Carrom.snapshot, coins are referred by their index in Carrom.coins
+followed by the queen and the striker, positions and velocities are (x, y) tuples in the same order """
+CarromState = namedtuple('CarromState', ['positions', 'velocities', 'player_coins', 'pocketed_coins',
+                                         'current_pocketed', 'foul_count', 'has_queen', 'pocketed_queen',
+                                         'queen_on_hold', 'pocketed_striker', 'player_turn', 'game_over', 'winner',
+                                         'reason', 'first_collision'])
+
 
 class Carrom:
-    def __init__(self, board_rect: Rect):
-        """ Must be a squared """
+    """ Physics engines which can be used to simulate the carrom, 'object' updates each of the coin objects,
+    'numpy' keeps the state of all the coins in arrays and updates them with vectorized operations,
+    'event' jumps from one collision (or wall, pocket, stop) event to the next instead of fixed time steps,
+    'deterministic' gives the same results on every platform and records a hash of the state after every step """
+    ENGINES = ('object', 'numpy', 'event', 'deterministic')
+
+    def __init__(self, board_rect: Rect, engine='object', fast_forward=False, tolerance=None, quantize_bits=None):
+        """ Must be a squared, if fast_forward is set the object engine advances the coins straight to their resting
+        points (or pockets) once none of the moving coins can reach another coin. If tolerance is given, each update
+        is made of adaptive steps which are shorter when coins are close to each other or to the pockets, and longer
+        when everything is far apart. If quantize_bits is given, the deterministic engine rounds positions and
+        velocities to multiples of 2 ** -quantize_bits after every step """
+        assert engine in Carrom.ENGINES
         board = Board(board_rect)
         self.board = board
+        """ Engine used to simulate the carrom, the physics object is created on first update """
+        self.engine = engine
+        self.physics = None
+        self.quantize_bits = quantize_bits
+        """ Coins moving in the current shot (in the simulation order) for the object engine, None in between shots,
+        coins at rest are not updated till a collision sets them in motion """
+        self.awake_coins = None
+        self.fast_forward = fast_forward
+        self.stepper = AdaptiveStepper(self, tolerance) if tolerance is not None and engine != 'event' else None
+        """ Number of updates before checking again if the shot can be fast forwarded """
+        self.fast_forward_wait = 0
+        """ Whether the shot being simulated ends once settled, see simulate """
+        self.settle = False
         self.center = Vector2(board.container.center)
-        self.queen = Queen(board.coin_radius, Board.COIN_MASS, self.center, board.container)
+        self.queen = Queen(board.coin_radius, Board.COIN_MASS, Vector2(self.center), board.container)
         self.striker = Striker(board.striker_radius, Board.STRIKER_MASS, board.container)
         """ Coins player order defined in a way suitable for rotate method """
         self.coins = [CarromMen(i % 2, board.coin_radius, Board.COIN_MASS, self.center, board.container) for i in range(6)] \
@@ -52,22 +85,34 @@ class Carrom:
         self.reason = None
         self.first_collision = None
 
-    def rotate_carrom_men(self, init_rotation=60):
-        """ if player wants to rotate the carrom men at the start call this function """
+    def get_carrom_men_positions(self, init_rotation=60):
+        """ Returns the start positions of the carrom men (in the order of coins), rotated by the given angle """
+        positions = []
         vec = Vector2(0, -1)
         vec.rotate_ip(init_rotation)
         vec.scale_to_length(self.board.coin_radius * 2)
-        for index, coin in enumerate(self.coins):
+        for index in range(len(self.coins)):
             if index == 6:
                 vec.scale_to_length(self.board.coin_radius * 4)
             elif index == 12:
                 vec.scale_to_length(self.board.coin_radius * (2 * sqrt(3)))
                 vec.rotate_ip(30)
-            coin.position = self.center + vec
+            positions.append(self.center + vec)
             vec.rotate_ip(60)
+        return positions
+
+    def rotate_carrom_men(self, init_rotation=60):
+        """ if player wants to rotate the carrom men at the start call this function """
+        for coin, position in zip(self.coins, self.get_carrom_men_positions(init_rotation)):
+            coin.position = position
 
     def check_moving(self):
         """ This function is used to check if some coin is moving on the board """
+        if self.physics is not None and self.physics.active:
+            """ Shot is being simulated by the physics engine """
+            return self.physics.check_moving()
+        if self.awake_coins is not None:
+            return len(self.awake_coins) > 0
         coins = self.player_coins[0] + self.player_coins[1]
         if not self.pocketed_striker:
             coins.append(self.striker)
@@ -76,11 +121,8 @@ class Carrom:
         """ Return true there exist some coin which is moving"""
         return any(coin.check_moving() for coin in coins)
 
-    def update(self, dt, decelerate, e):
-        """ After striking, this function is used to update the positions of the coins on the board,
-         call this function to proceed the simulation by given delta time. decelerate is used to model friction
-         e is the coefficient of restitution for collision between coins. """
-        """ coins will contain the list of coins to consider for simulation """
+    def get_simulation_coins(self):
+        """ Returns the list of coins to consider for simulation, in the order in which collisions are checked """
         """ Sort it so that first check collisions with the player coins and the striker and then with others """
         coins = sorted(self.player_coins[0] + self.player_coins[1],
                        key=lambda coin_: coin_.get_player() == self.player_turn, reverse=True)
@@ -88,31 +130,205 @@ class Carrom:
             coins.append(self.striker)
         if not self.pocketed_queen:
             coins.append(self.queen)
+        return coins
+
+    def get_board_coins(self):
+        """ Returns the coins on the board in a fixed order, independent of the player turn: carrom men in the
+        order of coins, then the queen and the striker """
+        coins = [coin for coin in self.coins if coin in self.player_coins[coin.get_player()]]
+        if not self.pocketed_queen:
+            coins.append(self.queen)
+        if not self.pocketed_striker:
+            coins.append(self.striker)
+        return coins
+
+    def update(self, dt, decelerate, e):
+        """ After striking, this function is used to update the positions of the coins on the board,
+         call this function to proceed the simulation by given delta time. decelerate is used to model friction
+         e is the coefficient of restitution for collision between coins. """
+        if self.stepper is not None:
+            """ Delta time is split into adaptive steps, or covered by a longer step of an earlier update """
+            self.stepper.advance(dt, decelerate, e)
+            return
+        self.step(dt, decelerate, e)
+
+    def step(self, dt, decelerate, e):
+        """ Proceed the simulation by a single step of given delta time """
+        if self.engine != 'object':
+            self.__update_physics__(dt, decelerate, e)
+            return
+        """ coins will contain the list of coins to consider for simulation """
+        coins = self.get_simulation_coins()
+        if self.awake_coins is None:
+            """ Start of the shot, velocities may have been set from outside """
+            self.awake_coins = [coin for coin in coins if coin.check_moving()]
+            self.fast_forward_wait = 0
 
-        """ Check for collisions and change velocities on collision """
-        for coin1, coin2 in combinations(coins, 2):
+        """ Check for collisions and change velocities on collision, only the pairs that can touch are checked """
+        collided = False
+        for coin1, coin2 in collision_pairs(coins, 2 * self.board.striker_radius, self.awake_coins):
             if coin1.check_collision(coin2):
                 if not self.first_collision and (coin1.check_moving() or coin2.check_moving()):
                     """ Detect the first collision between coins """
                     self.first_collision = [coin1, coin2]
                 coin1.collide(coin2, e)
+                collided = True
+        if collided:
+            """ Collisions may have set coins in motion """
+            self.awake_coins = [coin for coin in coins if coin.check_moving()]
+            self.fast_forward_wait = 0
+        if (self.fast_forward or self.settle) and self.awake_coins:
+            """ Coins are only stopped (if settling) or fast forwarded once none of the moving coins can reach another
+            coin, a coin at rest may still be set in motion by a collision, faster than the coin that hit it """
+            if self.fast_forward_wait == 0:
+                self.fast_forward_wait = fast_forward_wait(self.awake_coins, coins, dt, decelerate)
+                if self.fast_forward_wait == 0:
+                    self.__fast_forward__(dt, decelerate)
+                    return
+            self.fast_forward_wait -= 1
 
-        for coin in coins:
+        """ Coins at rest neither move nor get pocketed, so only the awake coins are updated """
+        awake_coins = []
+        for coin in self.awake_coins:
             """ Update the position of each of the coins """
             coin.update(dt, decelerate)
             """ Now check if pocketed """
             if self.board.pocketed(coin):
-                if coin == self.striker:
-                    self.pocketed_striker = True
-                elif coin == self.queen:
-                    self.pocketed_queen = True
-                else:
-                    assert isinstance(coin, CarromMen)
-                    """ Move coins to pocketed coins for that player """
-                    self.player_coins[coin.get_player()].remove(coin)
-                    self.pocketed_coins[coin.get_player()].append(coin)
-                    """ Also add to the current pocketed, this is kept to return them back to board in case of foul"""
-                    self.current_pocketed.append(coin)
+                self.pocket_coin(coin)
+            elif coin.check_moving():
+                awake_coins.append(coin)
+        """ Friction put the rest of the coins to sleep, shot is over if none are awake """
+        self.awake_coins = awake_coins or None
+
+    def __fast_forward__(self, dt, decelerate):
+        """ Advance the moving coins to the end of the shot, none of them can collide any more. If the shot is to
+        settle, the coins which can't reach a pocket either are stopped where they are """
+        pocketed = []
+        for index, coin in enumerate(self.awake_coins):
+            if self.settle and not can_reach_pocket(coin, self.board, dt, decelerate):
+                coin.velocity = Vector2()
+                continue
+            step = FastForward(coin, self.board, dt, decelerate).advance()
+            if step is not None:
+                pocketed.append((step, index, coin))
+        """ Pocket the coins in the order they would have been pocketed by stepping """
+        for _, _, coin in sorted(pocketed, key=lambda pocket: pocket[:2]):
+            self.pocket_coin(coin)
+        self.awake_coins = None
+
+    def simulate(self, dt, decelerate, e, settle=False):
+        """ Proceed the simulation of the shot till all the coins stop moving,
+        the event engine simulates the whole shot in a single update. If settle is set, the object engine ends the
+        shot as soon as the outcome is decided, once none of the moving coins can reach another coin: the ones that
+        can reach a pocket are fast forwarded and the rest are stopped where they are. The pocketed coins and the
+        first collision are the same as of the full shot, but not the final positions, so it is meant for rollouts
+        which only score the shot """
+        if self.engine == 'event':
+            dt = float('inf')
+        self.settle = settle
+        try:
+            while self.check_moving():
+                self.update(dt, decelerate, e)
+        finally:
+            self.settle = False
+
+    def pocket_coin(self, coin):
+        """ This function updates the state of the carrom, once the given coin was pocketed """
+        if coin == self.striker:
+            self.pocketed_striker = True
+        elif coin == self.queen:
+            self.pocketed_queen = True
+        else:
+            assert isinstance(coin, CarromMen)
+            """ Move coins to pocketed coins for that player """
+            self.player_coins[coin.get_player()].remove(coin)
+            self.pocketed_coins[coin.get_player()].append(coin)
+            """ Also add to the current pocketed, this is kept to return them back to board in case of foul"""
+            self.current_pocketed.append(coin)
+
+    def __update_physics__(self, dt, decelerate, e):
+        """ Proceed the simulation using the physics engine, coins are loaded into the engine at the start of the
+        shot, and written back to the coin objects when all the coins stop moving """
+        if self.physics is None:
+            if self.engine == 'event':
+                from event_physics import EventPhysics
+                self.physics = EventPhysics(self.board)
+            elif self.engine == 'deterministic':
+                from deterministic import DeterministicPhysics
+                self.physics = DeterministicPhysics(self.board, self.quantize_bits)
+            else:
+                from physics import ArrayPhysics
+                self.physics = ArrayPhysics(self.board)
+        if not self.physics.active:
+            self.physics.load(self.get_board_coins() if self.engine == 'deterministic' else self.get_simulation_coins())
+        pocketed, first_collision = self.physics.update(dt, decelerate, e)
+        if not self.first_collision and first_collision:
+            """ Detect the first collision between coins """
+            self.first_collision = first_collision
+        for coin in pocketed:
+            self.pocket_coin(coin)
+        if not self.physics.check_moving():
+            self.physics.sync()
+            self.physics.unload()
+
+    def sync(self):
+        """ Write back the state of the physics engine to the coins, in case a shot is being simulated """
+        if self.physics is not None and self.physics.active:
+            self.physics.sync()
+
+    def __getstate__(self):
+        """ Physics engine is not pickled (or copied), the coins hold the state of the carrom """
+        self.sync()
+        state = self.__dict__.copy()
+        state['physics'] = None
+        return state
+
+    def snapshot(self):
+        """ Returns the mutable state of the carrom (the board geometry is not copied), which can be restored later
+        with restore, this is much cheaper than copying the carrom. Must not be called while a shot is simulated """
+        self.sync()
+        assert self.awake_coins is None and (self.physics is None or not self.physics.active)
+        coins = self.coins + [self.queen, self.striker]
+        index = {id(coin): index for index, coin in enumerate(coins)}
+
+        def indices(coins_):
+            return tuple(index[id(coin)] for coin in coins_)
+        return CarromState(tuple((coin.position.x, coin.position.y) for coin in coins),
+                           tuple((coin.velocity.x, coin.velocity.y) for coin in coins),
+                           (indices(self.player_coins[0]), indices(self.player_coins[1])),
+                           (indices(self.pocketed_coins[0]), indices(self.pocketed_coins[1])),
+                           indices(self.current_pocketed), tuple(self.foul_count), tuple(self.has_queen),
+                           self.pocketed_queen, self.queen_on_hold, self.pocketed_striker, self.player_turn,
+                           self.game_over, self.winner, self.reason,
+                           indices(self.first_collision) if self.first_collision else None)
+
+    def restore(self, state: CarromState):
+        """ Restores the carrom to the given state, which was returned by snapshot of this carrom """
+        if self.physics is not None and self.physics.active:
+            self.physics.unload()
+        self.awake_coins = None
+        if self.stepper is not None:
+            self.stepper.ahead = 0.0
+        coins = self.coins + [self.queen, self.striker]
+        for coin, position, velocity in zip(coins, state.positions, state.velocities):
+            """ Coins get new vectors, so that the vectors of the state before restore are not shared """
+            coin.position = Vector2(position)
+            coin.velocity = Vector2(velocity)
+        self.player_coins = ([coins[index] for index in state.player_coins[0]],
+                             [coins[index] for index in state.player_coins[1]])
+        self.pocketed_coins = ([coins[index] for index in state.pocketed_coins[0]],
+                               [coins[index] for index in state.pocketed_coins[1]])
+        self.current_pocketed = [coins[index] for index in state.current_pocketed]
+        self.foul_count = list(state.foul_count)
+        self.has_queen = list(state.has_queen)
+        self.pocketed_queen = state.pocketed_queen
+        self.queen_on_hold = state.queen_on_hold
+        self.pocketed_striker = state.pocketed_striker
+        self.player_turn = state.player_turn
+        self.game_over = state.game_over
+        self.winner = state.winner
+        self.reason = state.reason
+        self.first_collision = [coins[index] for index in state.first_collision] if state.first_collision else None
 
     def __handle_fouls__(self, player):
         """ This function is used to handle player fouls of the given player, if any foul for the given player,
@@ -309,24 +525,3 @@ class Carrom:
                 """ If no player coin was pocketed or no coin was pocketed, the change the turn """
                 logging.debug(self.current_player() + " Pocketed Nothing")
                 self.__update_turn__(change=True)
-
-    def draw(self, win):
-        """ Draws all board with all the coins on the board and those that were captured """
-        self.board.draw(win)
-        """ Draw the coins (including striker and queen) on the board """
-        coins = self.player_coins[0] + self.player_coins[1]
-        if not self.pocketed_striker:
-            coins.append(self.striker)
-        if not self.pocketed_queen:
-            coins.append(self.queen)
-        for coin in coins:
-            coin.draw(win)
-        """ Draw the captured coins """
-        captured_coins_0 = self.pocketed_coins[0].copy()
-        if self.has_queen[0]:
-            captured_coins_0.append(self.queen)
-        captured_coins_1 = self.pocketed_coins[1].copy()
-        if self.has_queen[1]:
-            captured_coins_1.append(self.queen)
-        self.board.draw_captured_coins(win, 0, captured_coins_0)
-        self.board.draw_captured_coins(win, 1, captured_coins_1)
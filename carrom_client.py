@@ -2,6 +2,7 @@ import socket
 from socket_utils import read_message, write_message
 import pygame
 from carrom import Carrom
+from render import draw_carrom, show_notification, draw_striker_arrow_pointer
 import pickle
 import tkinter
 
@@ -117,9 +118,9 @@ def handle_user_input(win_, carrom_, max_angle=90, max_speed=40, permit_rotation
             get_user_input = False
 
         """ Update the striker position on the board """
-        carrom_.draw(win_)
-        carrom_.board.show_notification(win_, "Your Turn To Strike")
-        carrom_.board.draw_striker_arrow_pointer(win_, carrom_.striker, max_speed)
+        draw_carrom(win_, carrom_)
+        show_notification(win_, carrom_.board, "Your Turn To Strike")
+        draw_striker_arrow_pointer(win_, carrom_.board, carrom_.striker, max_speed)
         pygame.display.flip()
 
     if permit_rotation:
@@ -153,8 +154,8 @@ with connect_to_server() as sock:
     pygame.display.set_caption("PyCarrom Client: Player " + player_color)
 
     """ Draw the carrom board, first time """
-    carrom.draw(win)
-    carrom.board.show_notification(win, "Wait for your turn!")
+    draw_carrom(win, carrom)
+    show_notification(win, carrom.board, "Wait for your turn!")
     pygame.display.update()
     """ Handle the events, else screen is not updated """
     for event in pygame.event.get():
@@ -188,8 +189,9 @@ with connect_to_server() as sock:
             if carrom.check_moving() or carrom.player_turn != player_id:
                 print("Waiting for opponents turn or for simulation to complete ...")
                 """ if it is not current turn to strike, just draw the carrom """
-                carrom.draw(win)
-                carrom.board.show_notification(win, "Simulating.." if carrom.check_moving() else "Opponent's Move!")
+                draw_carrom(win, carrom)
+                show_notification(win, carrom.board,
+                                  "Simulating.." if carrom.check_moving() else "Opponent's Move!")
                 pygame.display.flip()
                 """ Handle the events, else screen is not updated """
                 for event in pygame.event.get():
@@ -209,8 +211,8 @@ with connect_to_server() as sock:
         message = "Connection Failed !!"
 
     """ Display End Game Message or Connection Failed message """
-    carrom.draw(win)
-    carrom.board.show_notification(win, "Game Over..")
+    draw_carrom(win, carrom)
+    show_notification(win, carrom.board, "Game Over..")
     font = pygame.font.Font('freesansbold.ttf', carrom.board.frame_width)
     text = font.render(message, True, (0, 0, 255))
     text_rect = text.get_rect()
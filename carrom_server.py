@@ -1,22 +1,34 @@
 import socket
 from socket_utils import write_message, read_message
 from carrom import Carrom
-from pygame import Rect
+from geometry import Rect
 import pickle
+import argparse
+
+parser = argparse.ArgumentParser(description="PyCarrom server, hosts a carrom game between two clients")
+parser.add_argument('--port', '-p', type=int, default=9901, help="port to listen on")
+parser.add_argument('--width', '-w', type=int, default=700, help="carrom board width")
+parser.add_argument("--dt", type=float, default=0.1, help="simulation interval")
+parser.add_argument("--decelerate", type=float, default=0.3, help="deceleration due to friction")
+parser.add_argument("--e", type=float, default=0.9, help="co-efficient of restitution for collisions")
+parser.add_argument("--num_updates", type=int, default=10, help="number of updates before sending to clients")
+parser.add_argument("--tolerance", type=float, default=None,
+                    help="enable adaptive steps (of up to 4 dt), with the given collision tolerance (in pixels)")
+args = parser.parse_args()
 
 # TODO: Currently client controls the maximum striker speed and angle, the server must limit as well
-server_host, server_port = '', 9901
+server_host, server_port = '', args.port
 server_address = (server_host, server_port)
 encoding = 'utf-8'
 
 """ Width of carrom board to create """
-width = 700
+width = args.width
 """ Collision parameters """
-dt = 0.1
-decelerate = 0.3
-e = 0.9
+dt = args.dt
+decelerate = args.decelerate
+e = args.e
 """ After how many simulations/updates to send the carrom data to clients """
-num_updates = 10
+num_updates = args.num_updates
 
 """ Create a listening socket which is bound to specified port """
 with socket.socket(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP) as listen_sock:
@@ -27,7 +39,7 @@ with socket.socket(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP) as li
     """ Accept client connections """
     while True:
         """ Create a carrom fo specified width """
-        carrom = Carrom(Rect(0, 0, width, width))
+        carrom = Carrom(Rect(0, 0, width, width), tolerance=args.tolerance)
 
         print("Waiting for clients to connect...")
         try:
@@ -81,7 +93,7 @@ with socket.socket(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP) as li
                         if carrom.check_moving():
                             """ Send data if moving """
                             i += 1
-                            if i % 10 == 0:
+                            if i % num_updates == 0:
                                 write_message(client_sock_0, carrom_data)
                                 write_message(client_sock_1, carrom_data)
                                 print("Sent carrom data to players after", i, "updates")
@@ -1,10 +1,10 @@
-from pygame import Vector2
-from pygame import Rect
-import pygame
+from geometry import Vector2, Rect
 
 
 class Coin:
     """ General class models a carrom coin or a striker, defines the physics components of the coin """
+    __slots__ = ('radius', 'mass', 'position', 'container', 'velocity')
+
     def __init__(self, radius, mass, position: Vector2, container: Rect):
         """ Initialized the coin with given parameters and place it at given position inside the container """
         self.radius = radius
@@ -77,11 +77,10 @@ class Coin:
         """ Checks if the current coin is moving or not based on the velocity """
         return self.velocity.length() > 0
 
-    def draw(self, win):
-        raise NotImplementedError("draw function not implemented")
-
 
 class CarromMen(Coin):
+    __slots__ = ('player', 'color')
+
     def __init__(self, player, radius, mass, position: Vector2, container: Rect):
         """ Constructs a carrom men coin for a given player """
         assert player in (0, 1)
@@ -97,11 +96,10 @@ class CarromMen(Coin):
     def get_player(self):
         return self.player
 
-    def draw(self, win):
-        pygame.draw.circle(win, self.color, (int(self.position.x), int(self.position.y)), int(self.radius))
-
 
 class Queen(Coin):
+    __slots__ = ('color',)
+
     def __init__(self, radius, mass, position: Vector2, container: Rect):
         """ Constructs a queen coin """
         Coin.__init__(self, radius, mass, position, container)
@@ -112,14 +110,11 @@ class Queen(Coin):
         self.position = Vector2(self.container.center)
         self.velocity = Vector2()
 
-    def draw(self, win):
-        pygame.draw.circle(win, self.color, (int(self.position.x), int(self.position.y)), int(self.radius))
-
 
 class Striker(Coin):
+    __slots__ = ('color',)
+
     def __init__(self, radius, mass, container: Rect):
         """ Constructs a striker """
         Coin.__init__(self, radius, mass, Vector2(), container)
-
-    def draw(self, win):
-        pygame.draw.circle(win, (0, 0, 255), (int(self.position.x), int(self.position.y)), int(self.radius))
+        self.color = (0, 0, 255)
@@ -0,0 +1,108 @@
+from carrom import Carrom
+from random_ai import set_choice
+from rollout_pool import get_config
+from collections import OrderedDict
+import logging
+import os
+import pickle
+
+""" Cache of the decisions of the ais, keyed by a canonical encoding of the board: the positions of the coins of each
+player (sorted, since the coins of a player are interchangeable) and of the queen, rounded to the nearest multiple
+of quantum pixels, the queen status, the fouls and the turn. Positions which round to the same multiples map to the
+same key and get the same shot (close positions on either side of a rounding boundary don't), which is a choice of
+random_ai (striker x position, striker angle, striker speed, carrom men orientation or None). The key also holds the board rect and the simulation config of the carrom (as used for the
+rollouts), so decisions are only shared by equal boards and engines. The least recently used decisions are evicted
+once max_size is reached, and the cache can be saved to and loaded from a file to be reused between runs. """
+
+""" Version of the keys in saved caches, files with other versions are ignored on load """
+VERSION = 2
+
+
+def get_board_key(carrom: Carrom, quantum=1.0):
+    """ Canonical, hashable encoding of the board of the carrom, with the positions quantized to the quantum """
+    def quantized(coins):
+        return tuple(sorted((round(coin.position.x / quantum), round(coin.position.y / quantum)) for coin in coins))
+    queen = None if carrom.pocketed_queen else quantized([carrom.queen])
+    return (quantized(carrom.player_coins[0]), quantized(carrom.player_coins[1]), queen, carrom.queen_on_hold,
+            tuple(carrom.has_queen), tuple(carrom.foul_count), carrom.player_turn)
+
+
+def get_striker_choice(carrom: Carrom):
+    """ The shot set up on the striker of the carrom as a choice (without orientation) """
+    speed, angle = carrom.striker.velocity.as_polar()
+    return carrom.striker.position.x, angle, speed, None
+
+
+class DecisionCache:
+    """ Bounded LRU cache of the decisions, loaded from the path (if given and present) """
+    def __init__(self, max_size=4096, quantum=1.0, path=None):
+        self.max_size = max_size
+        self.quantum = quantum
+        self.path = path
+        self.entries = OrderedDict()
+        self.hits, self.misses, self.evictions = 0, 0, 0
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get_key(self, carrom: Carrom, name, params=()):
+        """ Key of the decision of the ai (name) with the params for the board of the carrom """
+        return name, tuple(params), get_config(carrom), get_board_key(carrom, self.quantum)
+
+    def get(self, key):
+        """ Returns the cached choice of the key, or None """
+        choice = self.entries.get(key)
+        if choice is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return choice
+
+    def put(self, key, choice):
+        """ Caches the choice, evicting the least recently used ones beyond max_size """
+        self.entries[key] = tuple(choice)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def decide(self, carrom: Carrom, name, params, decide):
+        """ Sets up the cached choice of the ai on the carrom, or calls decide (which sets up the striker and returns
+        its choice) on a miss and caches its choice. Returns the choice """
+        key = self.get_key(carrom, name, params)
+        choice = self.get(key)
+        if choice is None:
+            choice = decide()
+            self.put(key, choice)
+        else:
+            set_choice(carrom, choice, choice[3] is not None)
+        return choice
+
+    def get_stats(self):
+        """ Hit and miss counts, the hit rate, evictions and the number of cached decisions """
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions, 'size': len(self.entries)}
+
+    def save(self, path=None):
+        """ Writes the cached decisions to the path (or the path of the cache), through a temporary file so that an
+        interrupted save does not corrupt the previous one """
+        path = path if path is not None else self.path
+        with open(path + '.tmp', 'wb') as file:
+            pickle.dump({'version': VERSION, 'quantum': self.quantum, 'entries': list(self.entries.items())}, file)
+        os.replace(path + '.tmp', path)
+
+    def load(self, path=None):
+        """ Reads the cached decisions from the path (or the path of the cache), decisions saved with a different
+        quantum or key version are not comparable and are ignored """
+        path = path if path is not None else self.path
+        with open(path, 'rb') as file:
+            data = pickle.load(file)
+        if data.get('version') != VERSION or data['quantum'] != self.quantum:
+            logging.warning("Ignoring the decisions in %s, saved with another key version or quantum" % path)
+            return
+        for key, choice in data['entries']:
+            self.put(key, choice)
@@ -0,0 +1,169 @@
+from hashlib import blake2b
+from math import sqrt
+from struct import pack
+from geometry import Vector2
+
+""" Deterministic simulation, for lockstep games and replays. The state of the coins is kept in python floats and
+updated with the same formulas as the Coin class, but only with basic arithmetic and sqrt, which are correctly
+rounded in IEEE 754 doubles, so the results don't depend on the platform, the compiler (fused multiply adds in C
+extensions) or the math library. Coins are always processed in the canonical order (the order of Carrom.coins,
+followed by the queen and the striker), independent of the player turn. Optionally the positions and velocities are
+quantized to multiples of a power of two after every step, which also absorbs tiny differences in the initial state
+(like a striker velocity computed with the platform's sin and cos). """
+
+
+def quantize(value, scale):
+    """ Rounds the value to the nearest multiple of 1 / scale, scale is a power of two so this is exact """
+    return round(value * scale) / scale
+
+
+class DeterministicPhysics:
+    """ Simulates the coins of a board with the same interface as ArrayPhysics, and records a hash of the state
+    of the coins after every step """
+    def __init__(self, board, quantize_bits=None):
+        container = board.container
+        self.left, self.top, self.right, self.bottom = container.left, container.top, container.right, \
+            container.bottom
+        self.pocket_centers = [(center.x, center.y) for center in board.pocket_centers]
+        self.pocket_radius = board.pocket_radius
+        """ Positions and velocities are quantized to multiples of 2 ** -quantize_bits, if given """
+        self.scale = None if quantize_bits is None else float(2 ** quantize_bits)
+        """ Coins of the current shot, None if no shot is being simulated """
+        self.coins = None
+        """ Hash of the state after each step of the current (or last) shot """
+        self.hashes = []
+
+    @property
+    def active(self):
+        return self.coins is not None
+
+    def load(self, coins):
+        """ Copy the state of the given coins (coins on the board, in the canonical order) """
+        self.coins = coins
+        self.state = [[coin.position.x, coin.position.y, coin.velocity.x, coin.velocity.y] for coin in coins]
+        self.radius = [coin.radius for coin in coins]
+        self.mass = [coin.mass for coin in coins]
+        self.on_board = [True] * len(coins)
+        self.hashes = []
+        if self.scale is not None:
+            self.quantize()
+
+    def quantize(self):
+        scale = self.scale
+        for state in self.state:
+            state[:] = [quantize(value, scale) for value in state]
+
+    def get_hash(self):
+        """ Hash of the positions and velocities of the coins, and which of them are on the board """
+        values = [value for state in self.state for value in state]
+        data = pack('<%dd' % len(values), *values) + bytes(self.on_board)
+        return blake2b(data, digest_size=16).hexdigest()
+
+    def update(self, dt, decelerate, e):
+        """ Proceed the simulation by a step of given delta time, returns the coins pocketed and the first collision
+        (pair of coins or None) of this step """
+        state, radius, mass, on_board = self.state, self.radius, self.mass, self.on_board
+        first_collision = None
+        """ Collisions, pairs in the order of combinations, pairs where both the coins are at rest can't collide """
+        moving = [on_board[index] and (coin[2] != 0 or coin[3] != 0) for index, coin in enumerate(state)]
+        for i in range(len(state)):
+            if not on_board[i]:
+                continue
+            for j in range(i + 1, len(state)):
+                if not on_board[j] or not (moving[i] or moving[j]):
+                    continue
+                x1, y1, vx1, vy1 = state[i]
+                x2, y2, vx2, vy2 = state[j]
+                dx, dy = x1 - x2, y1 - y2
+                reach = radius[i] + radius[j]
+                if dx > reach or -dx > reach or dy > reach or -dy > reach or sqrt(dx * dx + dy * dy) > reach:
+                    continue
+                if (vx1 - vx2) * dx + (vy1 - vy2) * dy > 0:
+                    """ Moving away from each other """
+                    continue
+                if first_collision is None:
+                    first_collision = [self.coins[i], self.coins[j]]
+                length_squared = dx * dx + dy * dy
+                if sqrt(length_squared) == 0:
+                    continue
+                """ Same formulas as Coin.resultant_collision_velocity """
+                scale_i = ((1 + e) * mass[j] / (mass[i] + mass[j])) * ((vx1 - vx2) * dx + (vy1 - vy2) * dy) / \
+                    length_squared
+                scale_j = ((1 + e) * mass[i] / (mass[i] + mass[j])) * ((vx2 - vx1) * -dx + (vy2 - vy1) * -dy) / \
+                    length_squared
+                state[i][2:] = vx1 - scale_i * dx, vy1 - scale_i * dy
+                state[j][2:] = vx2 - scale_j * -dx, vy2 - scale_j * -dy
+                moving[i] = moving[j] = True
+
+        """ Integration, same as Coin.update, and the pocket checks """
+        pocketed = []
+        deceleration = decelerate * dt
+        pocket_reach = self.pocket_radius
+        for index, coin in enumerate(state):
+            if not moving[index]:
+                continue
+            x, y, vx, vy = coin
+            r = radius[index]
+            x, y = x + vx * dt, y + vy * dt
+            if x + r > self.right:
+                x -= 2 * (x + r - self.right)
+                vx = -vx
+            elif x - r < self.left:
+                x += 2 * (self.left - x + r)
+                vx = -vx
+            if y + r > self.bottom:
+                y -= 2 * (y + r - self.bottom)
+                vy = -vy
+            elif y - r < self.top:
+                y += 2 * (self.top - y + r)
+                vy = -vy
+            speed = sqrt(vx * vx + vy * vy)
+            if speed <= deceleration:
+                vx, vy = 0.0, 0.0
+            else:
+                vx, vy = vx - vx / speed * decelerate * dt, vy - vy / speed * decelerate * dt
+            coin[:] = x, y, vx, vy
+            for pocket_x, pocket_y in self.pocket_centers:
+                dx, dy = x - pocket_x, y - pocket_y
+                if sqrt(dx * dx + dy * dy) < pocket_reach - r:
+                    on_board[index] = False
+                    pocketed.append(self.coins[index])
+                    break
+        if self.scale is not None:
+            self.quantize()
+        self.hashes.append(self.get_hash())
+        return pocketed, first_collision
+
+    def check_moving(self):
+        return any(on_board and (state[2] != 0 or state[3] != 0) for on_board, state in zip(self.on_board, self.state))
+
+    def sync(self):
+        """ Write back the positions and velocities to the coin objects """
+        for coin, (x, y, vx, vy) in zip(self.coins, self.state):
+            coin.position = Vector2(x, y)
+            coin.velocity = Vector2(vx, vy)
+
+    def unload(self):
+        """ Shot is over, release the coins """
+        self.coins = None
+
+
+def state_hash(carrom):
+    """ Hash of the whole state of the carrom (coins and rules), same on every platform for the same state """
+    return blake2b(repr(carrom.snapshot()).encode(), digest_size=16).hexdigest()
+
+
+def replay(carrom, shots, dt, decelerate, e):
+    """ Plays the given shots on the carrom and returns the state hash after each of them. Each shot is a tuple of
+    striker position, striker velocity (as numbers, so that no trigonometry is needed) and orientation of the carrom
+    men or None. With the deterministic engine, the same starting state and shots give the same hashes everywhere """
+    hashes = []
+    for striker_position, striker_velocity, orientation in shots:
+        if orientation is not None:
+            carrom.rotate_carrom_men(orientation)
+        carrom.striker.position = Vector2(striker_position)
+        carrom.striker.velocity = Vector2(striker_velocity)
+        carrom.simulate(dt, decelerate, e)
+        carrom.apply_rules()
+        hashes.append(state_hash(carrom))
+    return hashes
@@ -0,0 +1,331 @@
+from socket_utils import write_message, read_message
+from collections import deque
+import argparse
+import logging
+import multiprocessing
+import pickle
+import socket
+import threading
+import time
+import traceback
+
+""" Distributed self-play and rollouts, a coordinator hands out jobs to worker processes (on any number of nodes)
+which connect to it over TCP, messages are pickled and framed by socket_utils (so the nodes must trust each other,
+as for the game server). A job is a game of the tournament (specs, seed and game config) or a chunk of rollouts
+(carrom config, carrom state and choices), and the result is the game result or the scores of the choices.
+Every worker runs one job at a time and gets the next one as soon as it returns a result, so faster workers take
+more jobs. Once no jobs are left to hand out, idle workers steal the jobs still running on other workers (run them
+as well, the first result wins), so a slow or hung worker does not hold up the end of a run. The jobs of a worker
+which is lost (its connection fails) are handed out again, a job failing more than max_retries times fails the run,
+as does a run without any workers connected for worker_timeout seconds. """
+
+
+def run_game(index, specs, seed, config):
+    from tournament import play_game
+    return play_game(index, specs, seed, config)
+
+
+def run_rollouts(carrom_config, state, choices, permit_orientation, dt, decelerate, e):
+    import rollout_pool
+    if rollout_pool.worker_carrom is None or rollout_config != carrom_config:
+        set_rollout_config(carrom_config)
+    return rollout_pool.evaluate_chunk(state, choices, permit_orientation, dt, decelerate, e)
+
+
+""" Carrom config of the rollouts of this worker process """
+rollout_config = None
+
+
+def set_rollout_config(carrom_config):
+    """ Creates the carrom the rollouts of this worker are simulated on """
+    global rollout_config
+    import rollout_pool
+    rollout_pool.init_worker(carrom_config)
+    rollout_config = carrom_config
+
+
+""" Number of workers a job runs on at most, once it is stolen """
+MAX_COPIES = 2
+
+""" Job kinds, a job is the kind followed by the arguments of its function """
+JOBS = {'game': run_game, 'rollouts': run_rollouts}
+
+
+def run_job(job):
+    kind, *arguments = job
+    return JOBS[kind](*arguments)
+
+
+class Coordinator:
+    """ Listens for workers on the address, and runs the jobs given to map on them. Only local workers can connect
+    by default, listen on '0.0.0.0' (or the address of the node) for workers on other nodes """
+    def __init__(self, host='127.0.0.1', port=0, max_retries=3, worker_timeout=30.0):
+        self.listen_sock = socket.create_server((host, port))
+        self.address = self.listen_sock.getsockname()[:2]
+        self.max_retries = max_retries
+        self.worker_timeout = worker_timeout
+        self.condition = threading.Condition()
+        """ State of the current run, generation tells the results of earlier runs apart """
+        self.generation = 0
+        self.jobs = []
+        self.pending = deque()
+        self.running = {}
+        self.failures = {}
+        self.results = {}
+        self.completed = []
+        self.error = None
+        self.num_workers = 0
+        """ Time since which no workers are connected """
+        self.idle_since = time.monotonic()
+        self.closed = False
+        threading.Thread(target=self.accept, daemon=True).start()
+
+    def accept(self):
+        """ Serves every worker which connects in a thread of its own """
+        while True:
+            try:
+                conn, _ = self.listen_sock.accept()
+            except OSError:
+                return
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=self.serve, args=(conn,), daemon=True).start()
+
+    def serve(self, conn):
+        """ Hands out jobs to the worker till the coordinator is closed or the worker is lost """
+        with conn:
+            with self.condition:
+                self.num_workers += 1
+                self.condition.notify_all()
+            try:
+                while True:
+                    job = self.next_job()
+                    if job is None:
+                        write_message(conn, pickle.dumps(('stop',)))
+                        return
+                    generation, index, job = job
+                    try:
+                        write_message(conn, pickle.dumps(('job', job)))
+                        status, result = pickle.loads(read_message(conn))
+                    except (OSError, EOFError, pickle.UnpicklingError):
+                        self.fail(generation, index, "worker lost")
+                        return
+                    if status == 'ok':
+                        self.complete(generation, index, result)
+                    else:
+                        self.fail(generation, index, result)
+            except OSError:
+                return
+            finally:
+                with self.condition:
+                    self.num_workers -= 1
+                    if not self.num_workers:
+                        self.idle_since = time.monotonic()
+                    self.condition.notify_all()
+
+    def next_job(self):
+        """ Waits for a job to run, a pending one or else one running on another worker (work stealing), returns
+        its generation, index and the job, or None once closed """
+        with self.condition:
+            while not self.closed:
+                if self.error is None:
+                    if self.pending:
+                        index = self.pending.popleft()
+                    else:
+                        """ The unfinished job running on the fewest workers """
+                        running = [(count, index) for index, count in self.running.items()
+                                   if 0 < count < MAX_COPIES and index not in self.results]
+                        index = min(running)[1] if running else None
+                    if index is not None:
+                        self.running[index] = self.running.get(index, 0) + 1
+                        return self.generation, index, self.jobs[index]
+                self.condition.wait()
+            return None
+
+    def complete(self, generation, index, result):
+        with self.condition:
+            if generation != self.generation:
+                return
+            self.running[index] -= 1
+            if index not in self.results:
+                self.results[index] = result
+                self.completed.append(index)
+                self.condition.notify_all()
+
+    def fail(self, generation, index, reason):
+        """ Hands out the job again, unless it failed too often or is still running (or done) elsewhere, the
+        failures of all the copies of a job count """
+        with self.condition:
+            if generation != self.generation:
+                return
+            self.running[index] -= 1
+            if index in self.results:
+                return
+            self.failures[index] = self.failures.get(index, 0) + 1
+            logging.warning("Job %d failed (%s), attempt %d" % (index, reason, self.failures[index]))
+            if self.failures[index] > self.max_retries:
+                self.error = "Job %d failed %d times: %s" % (index, self.failures[index], reason)
+            elif not self.running[index]:
+                self.pending.appendleft(index)
+            self.condition.notify_all()
+
+    def wait_for_workers(self, count, timeout=None):
+        """ Waits till count workers are connected, returns whether they are """
+        with self.condition:
+            return self.condition.wait_for(lambda: self.num_workers >= count, timeout)
+
+    def check_time(self, deadline):
+        """ Fails the run once the deadline passed or no workers were connected for worker_timeout seconds, returns
+        the seconds till it has to be checked again (None if never) """
+        now = time.monotonic()
+        waits = []
+        if deadline is not None:
+            if now >= deadline:
+                self.error = "Timed out with %d of %d jobs done" % (len(self.results), len(self.jobs))
+            waits.append(deadline - now)
+        if not self.num_workers:
+            if now - self.idle_since >= self.worker_timeout:
+                self.error = "No workers connected for %.1fs with %d of %d jobs done" % (
+                    now - self.idle_since, len(self.results), len(self.jobs))
+            waits.append(self.idle_since + self.worker_timeout - now)
+        if self.error is not None:
+            self.condition.notify_all()
+        return min(waits) if waits else None
+
+    def map(self, jobs, progress=None, timeout=None, poll=None):
+        """ Runs the jobs on the workers, progress (if given) is called with the index and the result of each job
+        as it completes, and poll (if given) periodically while waiting. Returns the results in the order of the
+        jobs, raises RuntimeError if a job failed too often, the run took longer than timeout seconds or no workers
+        were connected for worker_timeout seconds """
+        with self.condition:
+            self.generation += 1
+            self.jobs = list(jobs)
+            self.pending = deque(range(len(self.jobs)))
+            self.running, self.failures, self.results, self.completed = {}, {}, {}, []
+            self.error = None
+            """ Workers may connect after the start of the run """
+            self.idle_since = max(self.idle_since, time.monotonic())
+            self.condition.notify_all()
+            deadline = None if timeout is None else time.monotonic() + timeout
+            reported = 0
+            while True:
+                wait = self.check_time(deadline)
+                if len(self.completed) == reported and self.error is None:
+                    if poll is not None:
+                        self.condition.release()
+                        try:
+                            poll()
+                        finally:
+                            self.condition.acquire()
+                        wait = 0.02 if wait is None else min(wait, 0.02)
+                    self.condition.wait(wait)
+                    continue
+                new = self.completed[reported:]
+                reported = len(self.completed)
+                if progress is not None:
+                    """ Without the lock, so that the workers are not held up """
+                    self.condition.release()
+                    try:
+                        for index in new:
+                            progress(index, self.results[index])
+                    finally:
+                        self.condition.acquire()
+                if self.error is not None:
+                    raise RuntimeError(self.error)
+                if len(self.results) == len(self.jobs):
+                    return [self.results[index] for index in range(len(self.jobs))]
+
+    def close(self):
+        """ Stops the workers (once they finish their jobs) and stops listening """
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.listen_sock.close()
+
+
+""" Number of choices of a rollouts job """
+CHUNK_SIZE = 8
+
+
+class RemoteRolloutPool:
+    """ Same interface as rollout_pool.RolloutPool, the chunks of choices are simulated on the workers of the
+    coordinator, on carroms created with the given config (rollout_pool.get_config) """
+    def __init__(self, coordinator: Coordinator, config, chunk_size=CHUNK_SIZE):
+        self.coordinator = coordinator
+        self.config = config
+        self.chunk_size = chunk_size
+
+    def evaluate(self, state, choices, permit_orientation, dt, decelerate, e, poll=None):
+        """ Returns the scores of the choices simulated from the state, poll (if given) is called periodically while
+        waiting """
+        jobs = [('rollouts', self.config, state, choices[start:start + self.chunk_size], permit_orientation, dt,
+                 decelerate, e) for start in range(0, len(choices), self.chunk_size)]
+        return [score for scores in self.coordinator.map(jobs, poll=poll) for score in scores]
+
+    def close(self):
+        """ The coordinator is closed by its owner """
+        pass
+
+
+def connect(host, port, timeout=10.0):
+    """ Connects to the coordinator, retrying till the timeout (seconds) so that workers can start first """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            conn = socket.create_connection((host, port))
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            return conn
+        except OSError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.2)
+
+
+def run_worker(host, port, timeout=10.0):
+    """ Runs the jobs of the coordinator till it stops the worker or the connection is closed, returns the number
+    of jobs run """
+    logging.disable(logging.WARNING)
+    num_jobs = 0
+    with connect(host, port, timeout) as conn:
+        while True:
+            try:
+                message = pickle.loads(read_message(conn))
+            except (OSError, EOFError):
+                return num_jobs
+            if message[0] == 'stop':
+                return num_jobs
+            try:
+                reply = 'ok', run_job(message[1])
+            except Exception:
+                reply = 'error', traceback.format_exc()
+            write_message(conn, pickle.dumps(reply))
+            num_jobs += 1
+
+
+def start_workers(host, port, count):
+    """ Starts count worker processes on this node, returns them """
+    start_method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else None
+    context = multiprocessing.get_context(start_method)
+    workers = [context.Process(target=run_worker, args=(host, port), daemon=True) for _ in range(count)]
+    for worker in workers:
+        worker.start()
+    return workers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs carrom workers for a coordinator (tournament.py --listen)")
+    parser.add_argument('--host', default='localhost', help="host of the coordinator")
+    parser.add_argument('--port', '-p', type=int, default=9902, help="port of the coordinator")
+    parser.add_argument('--processes', type=int, default=multiprocessing.cpu_count(),
+                        help="number of worker processes on this node")
+    parser.add_argument('--timeout', type=float, default=10.0, help="seconds to wait for the coordinator")
+    args = parser.parse_args()
+    if args.processes == 1:
+        print("Ran", run_worker(args.host, args.port, args.timeout), "jobs")
+        return
+    workers = start_workers(args.host, args.port, args.processes)
+    for worker in workers:
+        worker.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,241 @@
+import numpy as np
+
+
+""" Event driven (continuous) simulation of the coins. Under constant deceleration every coin moves along a straight
+line till the next event, so the time of the next coin-coin, coin-wall and coin-pocket event as well as the time
+at which a coin stops can be computed analytically. The simulation jumps straight to the next event instead of
+advancing in fixed steps. Coins are stored as arrays of shape (coins, 2) """
+
+""" Tolerance used to decide if coins are already in contact """
+CONTACT_TOLERANCE = 1e-9
+""" Maximum number of events handled in a single update, guards against endless chains of contacts """
+MAX_EVENTS = 10000
+
+
+def travel_time(distance, speed, deceleration):
+    """ Time taken to travel the given distance along the direction of motion, starting with given speed """
+    root = np.sqrt(np.maximum(speed * speed - 2 * deceleration * distance, 0.0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(distance > 0, 2 * distance / (speed + root), 0.0)
+
+
+def ray_circle_distance(position, direction, center, radius):
+    """ Distance along the ray (position, direction) at which it enters the circle (center, radius),
+    zero if already inside and moving inwards, infinite if it never enters """
+    offset = position - center
+    b = (offset * direction).sum(axis=-1)
+    q = (offset * offset).sum(axis=-1) - radius * radius
+    discriminant = b * b - q
+    with np.errstate(invalid='ignore'):
+        distance = np.where(discriminant >= 0, -b - np.sqrt(discriminant), np.inf)
+    distance = np.where(q <= CONTACT_TOLERANCE * radius * radius, np.where(b < 0, 0.0, np.inf), distance)
+    return np.where(distance >= 0, distance, np.inf)
+
+
+def polynomial_value(coefficients, x):
+    """ Evaluate the polynomials (rows of coefficients, highest degree first) at x, using Horner's method """
+    value = np.zeros_like(x)
+    for coefficient in coefficients.T:
+        value = value * x + coefficient[:, None]
+    return value
+
+
+def contact_times(offset, relative_velocity, relative_deceleration, distance, horizon):
+    """ First time in [0, horizon] at which pairs of moving coins come into contact, while approaching each other.
+    Relative position of a pair is offset + relative_velocity * t + relative_deceleration * t^2, so the squared
+    distance is a quartic in t. Roots of all the quartics are found at once, as eigenvalues of companion matrices """
+    p, v, w = offset, relative_velocity, relative_deceleration
+
+    def dot(a, b):
+        return (a * b).sum(axis=-1)
+    coefficients = np.stack([dot(w, w), 2 * dot(v, w), dot(v, v) + 2 * dot(p, w), 2 * dot(p, v),
+                             dot(p, p) - distance * distance], axis=-1)
+    derivative = coefficients[:, :-1] * np.array([4.0, 3.0, 2.0, 1.0])
+    times = np.full(len(p), np.inf)
+    """ Drop the negligible higher order terms, they only produce spurious roots """
+    scale = np.abs(coefficients[:, 2:]).max(axis=-1)
+    quartic = np.abs(coefficients[:, 0]) > 1e-12 * scale
+    for index in np.flatnonzero(~quartic):
+        roots = np.roots(coefficients[index, 1:] if abs(coefficients[index, 1]) > 1e-12 * scale[index] else
+                         coefficients[index, 2:])
+        times[index] = earliest_contact(roots[None], coefficients[index:index + 1], derivative[index:index + 1],
+                                        horizon[index:index + 1])[0]
+    if quartic.any():
+        monic = coefficients[quartic, 1:] / coefficients[quartic, :1]
+        companion = np.zeros((len(monic), 4, 4))
+        companion[:, 0] = -monic
+        companion[:, [1, 2, 3], [0, 1, 2]] = 1.0
+        times[quartic] = earliest_contact(np.linalg.eigvals(companion), coefficients[quartic], derivative[quartic],
+                                          horizon[quartic])
+    """ Already in contact """
+    touching = coefficients[:, 4] <= CONTACT_TOLERANCE * distance * distance
+    times[touching] = np.where(coefficients[touching, 3] < 0, 0.0, np.inf)
+    return times
+
+
+def earliest_contact(roots, coefficients, derivative, horizon):
+    """ Smallest real root of each polynomial within [0, horizon], where the coins are approaching each other """
+    real = np.abs(roots.imag) <= 1e-9 * (1 + np.abs(roots.real))
+    times = roots.real
+    """ Refine the roots, to reduce the errors of the eigenvalue solver """
+    for _ in range(2):
+        slope = polynomial_value(derivative, times)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            times = np.where(slope != 0, times - polynomial_value(coefficients, times) / slope, times)
+    valid = real & (times >= 0) & (times <= horizon[:, None]) & (polynomial_value(derivative, times) < 0)
+    return np.where(valid, times, np.inf).min(axis=-1, initial=np.inf)
+
+
+class EventPhysics:
+    """ Simulates the coins of a board from one event to the next. It has the same interface as ArrayPhysics,
+    update proceeds the simulation by given time handling all events within it, run proceeds till all coins stop """
+    def __init__(self, board):
+        container = board.container
+        self.low = np.array([container.left, container.top], dtype=float)
+        self.high = np.array([container.right, container.bottom], dtype=float)
+        self.pocket_centers = np.array([(center.x, center.y) for center in board.pocket_centers], dtype=float)
+        self.pocket_radius = board.pocket_radius
+        """ Coins of the current shot, None if no shot is being simulated """
+        self.coins = None
+
+    @property
+    def active(self):
+        return self.coins is not None
+
+    def load(self, coins):
+        """ Copy the state of the given coins (coins on the board, in the simulation order) to the arrays """
+        self.coins = coins
+        self.position = np.array([(coin.position.x, coin.position.y) for coin in coins], dtype=float)
+        self.velocity = np.array([(coin.velocity.x, coin.velocity.y) for coin in coins], dtype=float)
+        self.radius = np.array([coin.radius for coin in coins], dtype=float)
+        self.mass = np.array([coin.mass for coin in coins], dtype=float)
+        self.on_board = np.ones(len(coins), dtype=bool)
+        """ Number of events handled, in the current shot """
+        self.num_events = 0
+
+    def next_event(self, decelerate):
+        """ Returns the time and the description of the next event, (kind, coin index, other index or axis) """
+        speed = np.sqrt((self.velocity * self.velocity).sum(axis=-1))
+        moving = np.flatnonzero(self.on_board & (speed > 0))
+        speed_ = speed[moving]
+        direction = self.velocity[moving] / speed_[:, None]
+        position, radius = self.position[moving], self.radius[moving]
+        with np.errstate(divide='ignore'):
+            reach = speed_ * speed_ / (2 * decelerate) if decelerate > 0 else np.full(len(moving), np.inf)
+            stop_time = speed_ / decelerate if decelerate > 0 else np.full(len(moving), np.inf)
+        events = [(stop_time.min(), ('stop', moving[stop_time.argmin()], None))]
+
+        """ Walls, distance along the direction of motion till the coin touches the wall """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            wall = np.where(direction > 0, (self.high - radius[:, None] - position) / direction,
+                            np.where(direction < 0, (self.low + radius[:, None] - position) / direction, np.inf))
+        wall = np.maximum(wall, 0.0)
+        """ The coins move at different speeds, so the earliest event is the one with the least time, not distance """
+        wall = np.where(wall <= reach[:, None], travel_time(wall, speed_[:, None], decelerate), np.inf)
+        index = np.unravel_index(wall.argmin(), wall.shape)
+        events.append((wall[index], ('wall', moving[index[0]], index[1])))
+
+        """ Pockets, distance along the direction of motion till the coin completely lies within the pocket """
+        pocket = ray_circle_distance(position[:, None], direction[:, None], self.pocket_centers,
+                                     (self.pocket_radius - radius)[:, None])
+        pocket = np.where(pocket <= reach[:, None], travel_time(pocket, speed_[:, None], decelerate), np.inf)
+        index = np.unravel_index(pocket.argmin(), pocket.shape)
+        events.append((pocket[index], ('pocket', moving[index[0]], None)))
+
+        """ Coins at rest, the moving coin travels along a straight line till it touches the coin at rest """
+        resting = np.flatnonzero(self.on_board & (speed == 0))
+        if len(resting):
+            contact = ray_circle_distance(position[:, None], direction[:, None], self.position[resting],
+                                          radius[:, None] + self.radius[resting])
+            contact = np.where(contact <= reach[:, None], travel_time(contact, speed_[:, None], decelerate), np.inf)
+            index = np.unravel_index(contact.argmin(), contact.shape)
+            events.append((contact[index], ('collide', moving[index[0]], resting[index[1]])))
+
+        """ Moving coins, relative motion is not along a straight line, so a quartic equation is solved """
+        horizon = min(event[0] for event in events)
+        first, second = np.triu_indices(len(moving), 1)
+        offset = position[first] - position[second]
+        distance = radius[first] + radius[second]
+        """ Coins can't meet, if they are too far apart to cover the gap before the next event """
+        horizon_ = np.minimum(horizon, np.minimum(stop_time[first], stop_time[second]))
+        travel = speed_[first] * horizon_ - decelerate * horizon_ * horizon_ / 2 + \
+            speed_[second] * horizon_ - decelerate * horizon_ * horizon_ / 2
+        close = np.sqrt((offset * offset).sum(axis=-1)) - distance <= travel
+        if close.any():
+            first, second = first[close], second[close]
+            times = contact_times(offset[close], self.velocity[moving[first]] - self.velocity[moving[second]],
+                                  -decelerate / 2 * (direction[first] - direction[second]), distance[close],
+                                  horizon_[close])
+            index = times.argmin()
+            events.append((times[index], ('collide', moving[first[index]], moving[second[index]])))
+        return min(events, key=lambda event: event[0])
+
+    def advance(self, time, decelerate):
+        """ Move all the coins along their direction of motion by given time """
+        speed = np.sqrt((self.velocity * self.velocity).sum(axis=-1, keepdims=True))
+        moving = (speed > 0) & self.on_board[:, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            direction = np.where(moving, self.velocity / speed, 0.0)
+        travel_time_ = np.minimum(time, speed / decelerate) if decelerate > 0 else time
+        self.position += direction * (speed * travel_time_ - decelerate * travel_time_ * travel_time_ / 2)
+        self.velocity = direction * np.maximum(speed - decelerate * time, 0.0)
+
+    def collide(self, i, j, e):
+        """ Update the velocities of the coins on collision, the same way as Coin.collide """
+        offset = self.position[i] - self.position[j]
+        length_squared = offset @ offset
+        if length_squared == 0:
+            return
+        dot = (self.velocity[i] - self.velocity[j]) @ offset
+        mass_i, mass_j = self.mass[i], self.mass[j]
+        self.velocity[i] = self.velocity[i] - ((1 + e) * mass_j / (mass_i + mass_j)) * dot / length_squared * offset
+        self.velocity[j] = self.velocity[j] + ((1 + e) * mass_i / (mass_i + mass_j)) * dot / length_squared * offset
+
+    def update(self, dt, decelerate, e):
+        """ Proceed the simulation by given delta time, returns the coins pocketed and the first collision
+        (pair of coins or None) of this update """
+        pocketed, first_collision = [], None
+        remaining = dt
+        for _ in range(MAX_EVENTS):
+            if not self.check_moving():
+                break
+            time, (kind, index, other) = self.next_event(decelerate)
+            if time > remaining:
+                self.advance(remaining, decelerate)
+                break
+            self.advance(time, decelerate)
+            remaining -= time
+            self.num_events += 1
+            if kind == 'stop':
+                self.velocity[index] = 0.0
+            elif kind == 'wall':
+                """ Place the coin exactly on the wall and reflect the velocity """
+                low, high = self.low[other] + self.radius[index], self.high[other] - self.radius[index]
+                self.position[index, other] = min(max(self.position[index, other], low), high)
+                self.velocity[index, other] = -self.velocity[index, other]
+            elif kind == 'pocket':
+                self.on_board[index] = False
+                pocketed.append(self.coins[index])
+            else:
+                if first_collision is None:
+                    """ Detect the first collision between coins """
+                    first_collision = [self.coins[index], self.coins[other]]
+                self.collide(index, other, e)
+        return pocketed, first_collision
+
+    def run(self, decelerate, e):
+        """ Proceed the simulation till all the coins stop moving """
+        return self.update(np.inf, decelerate, e)
+
+    def check_moving(self):
+        return bool((self.on_board[:, None] & (self.velocity != 0)).any())
+
+    def sync(self):
+        """ Write back the positions and velocities to the coin objects """
+        for coin, position, velocity in zip(self.coins, self.position.tolist(), self.velocity.tolist()):
+            coin.position.update(position)
+            coin.velocity.update(velocity)
+
+    def unload(self):
+        """ Shot is over, release the coins """
+        self.coins = None
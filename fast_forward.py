@@ -0,0 +1,162 @@
+from math import ceil, floor, sqrt
+from sys import maxsize
+from geometry import Vector2
+
+""" Closed form of the stepped motion of a coin which does not collide, as simulated by Coin.update. In every step
+the coin moves by velocity * dt and then its speed is reduced by deceleration * dt, till the speed is not more than
+deceleration * dt and the coin is set to rest. So the speed at step k is speed - k * deceleration * dt and the
+distance covered till the end of step k is a quadratic in k. Reflections with the walls mirror the coin, so the
+position after a step is the straight line (unfolded) position folded back into the container. """
+
+
+def last_step(speed, deceleration, dt):
+    """ Index of the step after which the coin comes to rest """
+    return max(0, ceil(speed / (deceleration * dt) - 1))
+
+
+def step_distance(step, speed, deceleration, dt):
+    """ Distance travelled by the coin till the end of the given step """
+    return dt * (step + 1) * (speed - deceleration * dt * step / 2)
+
+
+def stepped_travel(speed, deceleration, dt):
+    """ Total distance travelled by the coin till it comes to rest """
+    return step_distance(last_step(speed, deceleration, dt), speed, deceleration, dt)
+
+
+def fold(value, low, high):
+    """ Folds the unfolded coordinate back in to [low, high], returns it and whether it was reflected odd times """
+    width = high - low
+    tile = floor((value - low) / width)
+    offset = value - low - tile * width
+    if tile % 2:
+        return high - offset, True
+    return low + offset, False
+
+
+def images(low, high, offset, start, end):
+    """ Unfolded images (low + tile * width +/- offset) of the points at the given offset from the walls,
+    that lie within start and end """
+    width = high - low
+    values = []
+    for tile in range(floor((start - low) / width) - 1, floor((end - low) / width) + 2):
+        values += [low + tile * width - offset, low + tile * width + offset]
+    return [value for value in values if start <= value <= end]
+
+
+def can_reach_pocket(coin, board, dt, deceleration):
+    """ Whether the moving coin can get pocketed before it comes to rest, as by Board.pocketed. The distance of the
+    coin from its start is at most the distance it travels, since reflections never increase the distance """
+    reach = board.pocket_radius - coin.radius
+    travel = stepped_travel(coin.velocity.length(), deceleration, dt)
+    return any(coin.position.distance_to(pocket_center) - travel < reach for pocket_center in board.pocket_centers)
+
+
+class FastForward:
+    """ Advances a coin that can no longer collide to its resting point (or to the pocket), with the same positions
+    (up to rounding) as stepping Coin.update, pockets are checked at the position after every step as Board.pocketed """
+    def __init__(self, coin, board, dt, deceleration):
+        self.coin = coin
+        self.dt, self.deceleration = dt, deceleration
+        self.speed = coin.velocity.length()
+        self.direction = coin.velocity / self.speed
+        self.last_step = last_step(self.speed, deceleration, dt)
+        self.distance = step_distance(self.last_step, self.speed, deceleration, dt)
+        container, radius = coin.container, coin.radius
+        """ Limits of the center of the coin, it is reflected about these """
+        self.low = (container.left + radius, container.top + radius)
+        self.high = (container.right - radius, container.bottom - radius)
+        self.pocket_centers = board.pocket_centers
+        self.pocket_radius = board.pocket_radius
+
+    def get_position(self, step):
+        """ Position after the given step, and whether it was reflected odd times along x and y """
+        distance = step_distance(step, self.speed, self.deceleration, self.dt)
+        x, reflected_x = fold(self.coin.position.x + self.direction.x * distance, self.low[0], self.high[0])
+        y, reflected_y = fold(self.coin.position.y + self.direction.y * distance, self.low[1], self.high[1])
+        return Vector2(x, y), reflected_x, reflected_y
+
+    def pocketed(self, position):
+        """ Same as Board.pocketed """
+        return any(position.distance_to(pocket_center) < self.pocket_radius - self.coin.radius
+                   for pocket_center in self.pocket_centers)
+
+    def get_pocketed_step(self):
+        """ Returns the first step after which the coin lies in a pocket, or None """
+        reach = self.pocket_radius - self.coin.radius
+        if reach <= 0:
+            return None
+        """ Pockets touch the corners of the region of the center, so their images lie around the images of the
+        corners, only the steps that end within reach of an image along the unfolded path need to be checked """
+        start, end = self.coin.position, self.coin.position + self.direction * self.distance
+        x_images = images(self.low[0], self.high[0], reach, min(start.x, end.x) - reach, max(start.x, end.x) + reach)
+        y_images = images(self.low[1], self.high[1], reach, min(start.y, end.y) - reach, max(start.y, end.y) + reach)
+        pocketed_step = None
+        for x in x_images:
+            for y in y_images:
+                """ Interval of distance along the path within reach of the image """
+                along = (x - start.x) * self.direction.x + (y - start.y) * self.direction.y
+                across_squared = (x - start.x) ** 2 + (y - start.y) ** 2 - along * along
+                if across_squared >= reach * reach:
+                    continue
+                half_chord = sqrt(reach * reach - across_squared)
+                step = self.get_step(along - half_chord)
+                while step <= self.last_step and (pocketed_step is None or step < pocketed_step):
+                    if step_distance(step, self.speed, self.deceleration, self.dt) > along + half_chord + 1e-9:
+                        break
+                    if self.pocketed(self.get_position(step)[0]):
+                        pocketed_step = step
+                        break
+                    step += 1
+        return pocketed_step
+
+    def get_step(self, distance):
+        """ Returns a step, at or a little before the first step which ends at or beyond the given distance """
+        if distance <= 0:
+            return 0
+        """ Smaller root of the quadratic step_distance(step) = distance """
+        decrement = self.deceleration * self.dt
+        b = self.speed + decrement / 2
+        discriminant = b * b - 2 * decrement * distance / self.dt
+        if discriminant < 0:
+            return self.last_step
+        return max(0, int((b - sqrt(discriminant)) / decrement) - 2)
+
+    def advance(self):
+        """ Moves the coin to the resting point or to the position at which it was pocketed,
+        returns the step at which it got pocketed or None """
+        step = self.get_pocketed_step()
+        position, reflected_x, reflected_y = self.get_position(self.last_step if step is None else step)
+        self.coin.position = position
+        if step is None or step == self.last_step:
+            self.coin.velocity = Vector2()
+        else:
+            """ Velocity after the decelerating the pocketed coin """
+            speed = self.speed - self.deceleration * self.dt * (step + 1)
+            self.coin.velocity = Vector2(-self.direction.x if reflected_x else self.direction.x,
+                                         -self.direction.y if reflected_y else self.direction.y) * speed
+        return step
+
+
+def fast_forward_wait(awake_coins, coins, dt, deceleration):
+    """ Returns 0 if none of the moving coins can reach another coin till they come to rest, the distance of a coin
+    from its start is at most the distance it travels, since reflections never increase the distance. Otherwise
+    returns the number of steps for which this can't change, as long as no coins collide: with every step the
+    distance between two coins and the sum of their remaining travel reduce by at most the sum of their steps """
+    if deceleration * dt <= 0:
+        return maxsize
+    travel = {id(coin): stepped_travel(coin.velocity.length(), deceleration, dt) for coin in awake_coins}
+    slack = float('inf')
+    for coin in awake_coins:
+        x, y = coin.position.x, coin.position.y
+        for other in coins:
+            if other is coin or (id(other) in travel and id(other) < id(coin)):
+                """ Pairs of moving coins are checked once """
+                continue
+            dx, dy = other.position.x - x, other.position.y - y
+            slack = min(slack, sqrt(dx * dx + dy * dy) - travel[id(coin)] - travel.get(id(other), 0) - coin.radius
+                        - other.radius)
+    if slack > 0:
+        return 0
+    max_speed = max(coin.velocity.length() for coin in awake_coins)
+    return max(1, int(-slack / (4 * max_speed * dt)))
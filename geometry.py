@@ -0,0 +1,14 @@
+import os
+
+""" Vector2 and Rect used by the simulation. pygame's (C) versions are used when pygame is available, otherwise or if
+the environment variable PYCARROM_HEADLESS is set, the pure python versions from vector.py are used, so that the
+physics, the rules and the ai can run without pygame. Both give the same simulation results. """
+HEADLESS = bool(os.environ.get('PYCARROM_HEADLESS'))
+if not HEADLESS:
+    try:
+        from pygame.math import Vector2
+        from pygame.rect import Rect
+    except ImportError:
+        HEADLESS = True
+if HEADLESS:
+    from vector import Vector2, Rect
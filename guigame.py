@@ -1,12 +1,18 @@
 from carrom import Carrom
+from render import draw_carrom, show_notification, draw_striker_arrow_pointer
 from pygame import Rect
 import pygame
-from ai import ai
-from random_ai import ai as random_ai
+from anytime import play, heuristic_decisions, random_decisions, cross_entropy_decisions, mcts_decisions, \
+    lookahead_decisions
+from random_ai import set_choice
+from decision_cache import DecisionCache
+from opening_book import OpeningBook
+import random
+from random import Random
 import argparse
 from start_menu import start_window, create_button
 
-player_choices = ['ai', 'random', 'human']
+player_choices = ['ai', 'random', 'mcts', 'lookahead', 'human']
 parser = argparse.ArgumentParser(description="PyCarrom is a two player carrom game played between humans or ai")
 parser.add_argument('--player1', '-1', choices=player_choices, default='human', help="specify player type")
 parser.add_argument('--player2', '-2', choices=player_choices, default='human', help="specify player type")
@@ -17,9 +23,47 @@ parser.add_argument("--dt", type=float, default=0.1, help="simulation interval")
 parser.add_argument("--decelerate", type=float, default=0.3, help="deceleration due to friction")
 parser.add_argument("--e", type=float, default=0.9, help="co-efficient of restitution for collisions")
 parser.add_argument("--num_updates", type=int, default=10, help="number of updates before drawing to screen")
-parser.add_argument("--num_random_choices", type=int, default=40, help="number of search points for random ai")
+parser.add_argument("--num_random_choices", type=int, default=40,
+                    help="number of search points for random ai (and shots of lookahead ai)")
+parser.add_argument("--search_iterations", type=int, default=1,
+                    help="number of batches the search points of random ai are split into, refitting the sampling "
+                         "distribution to the best of each batch (cross entropy search, 1 draws all uniformly)")
+parser.add_argument("--variants", type=int, default=1,
+                    help="number of variants (the shot and perturbations of it) each choice of random ai is simulated "
+                         "as, to rank them by their expected score under execution noise (1 trusts the exact shot)")
+parser.add_argument("--risk", type=float, default=0.0,
+                    help="weight of the standard deviation of the scores of the variants, subtracted from their mean")
+parser.add_argument("--time_budget", type=float, default=2.0,
+                    help="thinking time (in seconds) of the ai players per turn, the best shot so far is played")
+parser.add_argument("--verify", type=int, default=0,
+                    help="number of candidate shots of the ai simulated to pick the best (0 plays its first shot)")
+parser.add_argument("--calibrate", action="store_true",
+                    help="ai shot speeds from tables simulated for dt, decelerate and e instead of formulas")
 parser.add_argument("--no_start_menu", action="store_true", help="disable start menu")
 parser.add_argument("--fps", type=int, default=60, help="frames per second")
+parser.add_argument("--batch", action="store_true",
+                    help="simulate the choices of random ai (and shots of lookahead ai) in a single batch")
+parser.add_argument("--fast_forward", action="store_true",
+                    help="advance coins straight to rest once they can't collide (object engine)")
+parser.add_argument("--tolerance", type=float, default=None,
+                    help="enable adaptive steps (of up to 4 dt), with the given collision tolerance (in pixels)")
+parser.add_argument("--workers", type=int, default=0,
+                    help="number of worker processes to simulate the choices of random ai in parallel")
+parser.add_argument("--listen", type=int, default=None,
+                    help="port to hand out the choices of random ai on to distributed.py workers instead of --workers")
+parser.add_argument("--host", default='127.0.0.1',
+                    help="address to listen on with --listen, 0.0.0.0 for workers on other nodes")
+parser.add_argument("--worker_timeout", type=float, default=60.0,
+                    help="seconds without any workers connected (with --listen) after which a decision fails")
+parser.add_argument("--local_workers", type=int, default=0,
+                    help="number of distributed.py workers to start on this node (with --listen)")
+parser.add_argument("--seed", type=int, default=None, help="seed for the choices of random ai, for reproducible games")
+parser.add_argument("--cache_size", type=int, default=0,
+                    help="number of ai decisions cached by board state and reused (0 disables the cache)")
+parser.add_argument("--cache_file", default=None, help="file to load the decision cache from and save it to")
+parser.add_argument("--opening_book", default=None,
+                    help="opening book (built by opening_book.py) the ai players take the first strike from")
+parser.add_argument("--engine", choices=Carrom.ENGINES, default='object', help="physics engine used for simulation")
 args = parser.parse_args()
 
 """ Update the internal variables from the parser """
@@ -38,6 +82,41 @@ max_speed = float(args.max_speed)
 
 fps = int(args.fps)
 
+""" Seeds of the random ai turns are drawn from this, if a seed is given """
+seeds = Random(args.seed) if args.seed is not None else None
+
+""" Decisions of the ai players, reused when a board repeats (within and across games, and runs with cache_file) """
+cache = DecisionCache(args.cache_size, path=args.cache_file) if args.cache_size > 0 else None
+""" Best first strikes, used by the ai players if it was built for the same board and parameters """
+book = OpeningBook.load(args.opening_book) if args.opening_book is not None else None
+""" Distributed workers the choices of the random ai are simulated on, if listening for them """
+coordinator = None
+if args.listen is not None:
+    from distributed import Coordinator, start_workers
+    coordinator = Coordinator(args.host, args.listen, worker_timeout=args.worker_timeout)
+    print("Waiting for workers on port", coordinator.address[1])
+    start_workers('127.0.0.1' if args.host in ('', '0.0.0.0') else args.host, coordinator.address[1],
+                  args.local_workers)
+
+
+def decide(name, params, decisions):
+    """ Plays the break of the opening book, the decisions within the time budget, or the cached decision of the
+    ai (name) for this board """
+    if book is not None and permit_orientation:
+        choice = book.lookup(carrom, max_angle, max_speed, dt, decelerate, e)
+        if choice is not None:
+            set_choice(carrom, choice, True)
+            decisions.close()
+            return
+    if cache is None:
+        play(carrom, decisions, args.time_budget, poll=handle_events)
+        return
+    cache.decide(carrom, name, params, lambda: play(carrom, decisions, args.time_budget, poll=handle_events)[0])
+    decisions.close()
+    if args.cache_file is not None:
+        cache.save()
+
+
 while True:
     if args.no_start_menu:
         player1, player2 = args.player1, args.player2
@@ -54,7 +133,8 @@ while True:
     win = pygame.display.set_mode((width, width))
     pygame.display.set_caption("PyCarrom: WHITE(%s) vs BLACK(%s)" % (player1, player2))
 
-    carrom = Carrom(Rect(0, 0, width, width))
+    carrom = Carrom(Rect(0, 0, width, width), engine=args.engine, fast_forward=args.fast_forward,
+                    tolerance=args.tolerance)
     """ Orientation changes are only allowed for the first turn"""
     permit_orientation = True
     players = [player1, player2]
@@ -137,9 +217,10 @@ while True:
                 get_user_input = False
 
             """ Update the striker position on the board """
-            carrom_.draw(win_)
-            carrom_.board.show_notification(win_, "WHITE'S TURN" if carrom.player_turn == 0 else "BLACK'S TURN")
-            carrom_.board.draw_striker_arrow_pointer(win_, carrom_.striker, max_speed)
+            draw_carrom(win_, carrom_)
+            show_notification(win_, carrom_.board,
+                              "WHITE'S TURN" if carrom.player_turn == 0 else "BLACK'S TURN")
+            draw_striker_arrow_pointer(win_, carrom_.board, carrom_.striker, max_speed)
             pygame.display.update()
 
 
@@ -148,32 +229,86 @@ while True:
         carrom.striker.position = carrom.board.get_striker_position(carrom.player_turn)
         if players[carrom.player_turn] == "ai":
             """ Just refresh the board """
-            carrom.draw(win)
-            carrom.board.show_notification(win, "AI thinking")
+            draw_carrom(win, carrom)
+            show_notification(win, carrom.board, "AI thinking")
             pygame.display.flip()
             handle_events()
-            """ let the ai make the decision for the striker """
-            ai(carrom, max_angle, max_speed, decelerate, e, dt)
+            """ let the ai make the decision for the striker, within the time budget """
+            decide('ai', (max_angle, max_speed, decelerate, e, dt, args.verify, args.calibrate),
+                   heuristic_decisions(carrom, max_angle, max_speed, decelerate, e, dt, args.verify,
+                                       args.calibrate, Random(seeds.getrandbits(32)) if seeds is not None else random))
             """ just indicate to the user, the ai's decision """
-            carrom.draw(win)
-            carrom.board.draw_striker_arrow_pointer(win, carrom.striker, max_speed)
-            carrom.board.show_notification(win, "AI decided")
+            draw_carrom(win, carrom)
+            draw_striker_arrow_pointer(win, carrom.board, carrom.striker, max_speed)
+            show_notification(win, carrom.board, "AI decided")
             pygame.display.flip()
             handle_events()
             """wait for some time """
             pygame.time.delay(100)
         elif players[carrom.player_turn] == "random":
             """ Just refresh the board """
-            carrom.draw(win)
-            carrom.board.show_notification(win, "Random AI thinking")
+            draw_carrom(win, carrom)
+            show_notification(win, carrom.board, "Random AI thinking")
             pygame.display.flip()
             handle_events()
-            """ let the random ai make the decision for the striker """
-            random_ai(carrom, max_angle, max_speed, decelerate, e, dt, permit_orientation, num_random_choices)
+            """ let the random ai make the decision for the striker within the time budget, choices simulated in a
+            batch or by the (local or distributed) workers are simulated a chunk at a time """
+            rng = Random(seeds.getrandbits(32)) if seeds is not None else random
+            params = (max_angle, max_speed, decelerate, e, dt, permit_orientation, num_random_choices,
+                      args.search_iterations) + ((args.variants, args.risk, None) if args.variants > 1 else ())
+            if args.search_iterations > 1:
+                decide('random', params,
+                       cross_entropy_decisions(carrom, max_angle, max_speed, decelerate, e, dt, permit_orientation,
+                                               num_random_choices, args.search_iterations, rng, args.batch,
+                                               args.workers, args.variants, args.risk,
+                                               coordinator=coordinator))
+            else:
+                decide('random', params,
+                       random_decisions(carrom, max_angle, max_speed, decelerate, e, dt, permit_orientation,
+                                        num_random_choices, rng, args.batch, args.workers, args.variants, args.risk,
+                                        coordinator=coordinator))
             """ just indicate to the user, the random ai's decision """
-            carrom.draw(win)
-            carrom.board.draw_striker_arrow_pointer(win, carrom.striker, max_speed)
-            carrom.board.show_notification(win, "Random AI decided")
+            draw_carrom(win, carrom)
+            draw_striker_arrow_pointer(win, carrom.board, carrom.striker, max_speed)
+            show_notification(win, carrom.board, "Random AI decided")
+            pygame.display.flip()
+            handle_events()
+            """wait for some time """
+            pygame.time.delay(100)
+        elif players[carrom.player_turn] == "mcts":
+            """ Just refresh the board """
+            draw_carrom(win, carrom)
+            show_notification(win, carrom.board, "MCTS AI thinking")
+            pygame.display.flip()
+            handle_events()
+            """ let the mcts ai search for the striker within the time budget """
+            decide('mcts', (max_angle, max_speed, decelerate, e, dt, permit_orientation),
+                   mcts_decisions(carrom, max_angle, max_speed, decelerate, e, dt, permit_orientation,
+                                  Random(seeds.getrandbits(32)) if seeds is not None else random))
+            """ just indicate to the user, the mcts ai's decision """
+            draw_carrom(win, carrom)
+            draw_striker_arrow_pointer(win, carrom.board, carrom.striker, max_speed)
+            show_notification(win, carrom.board, "MCTS AI decided")
+            pygame.display.flip()
+            handle_events()
+            """wait for some time """
+            pygame.time.delay(100)
+        elif players[carrom.player_turn] == "lookahead":
+            """ Just refresh the board """
+            draw_carrom(win, carrom)
+            show_notification(win, carrom.board, "Lookahead AI thinking")
+            pygame.display.flip()
+            handle_events()
+            """ let the lookahead ai weigh its shots against the replies within the time budget """
+            decide('lookahead', (max_angle, max_speed, decelerate, e, dt, permit_orientation, num_random_choices,
+                                 args.batch),
+                   lookahead_decisions(carrom, max_angle, max_speed, decelerate, e, dt, permit_orientation,
+                                       Random(seeds.getrandbits(32)) if seeds is not None else random,
+                                       num_choices=num_random_choices, batch=args.batch))
+            """ just indicate to the user, the lookahead ai's decision """
+            draw_carrom(win, carrom)
+            draw_striker_arrow_pointer(win, carrom.board, carrom.striker, max_speed)
+            show_notification(win, carrom.board, "Lookahead AI decided")
             pygame.display.flip()
             handle_events()
             """wait for some time """
@@ -195,8 +330,8 @@ while True:
                 i += 1
                 if i % num_updates == 0:
                     clock.tick(60)
-                    carrom.draw(win)
-                    carrom.board.show_notification(win, "SIMULATING..")
+                    draw_carrom(win, carrom)
+                    show_notification(win, carrom.board, "SIMULATING..")
                     pygame.display.flip()
                     """ Handle the events, else screen is not updated """
                     for event in pygame.event.get():
@@ -209,11 +344,13 @@ while True:
         carrom.apply_rules()
 
     """ Game Over draw the carrom for the final time """
-    carrom.draw(win)
-    carrom.board.show_notification(win, "GAME OVER..")
+    draw_carrom(win, carrom)
+    show_notification(win, carrom.board, "GAME OVER..")
     font = pygame.font.Font('freesansbold.ttf', carrom.board.frame_width)
     winner = carrom.get_player(carrom.winner)
     print("Game Over, won by", winner, players[carrom.winner])
+    if cache is not None:
+        print("Decision cache:", cache.get_stats())
     """ Indicate the winner """
     text = font.render("WINNER " + winner, True, (0, 0, 255))
     text_rect = text.get_rect()
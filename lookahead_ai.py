@@ -0,0 +1,141 @@
+from carrom import Carrom
+from random_ai import carrom_score, get_choices, set_choice, simulate_choices
+from itertools import islice
+from time import perf_counter
+import logging
+import random
+from random import Random
+
+""" Two ply lookahead, the score right after a shot ignores what the next player can do from the position it leaves
+(an easy pocket for the opponent, or a follow up shot for the player). The ai simulates num_choices random shots,
+and for the width most promising of them (by their score) simulates the replies of the player to move next, the
+opponent, or the player itself after pocketing. The replies are cheap to generate: the first num_replies shots of
+the heuristic ai (ai.get_shots) for the next player. The value of a shot is the score of the searching player after
+the best reply, the opponent minimizing it and the player maximizing it (as in mcts_ai). The shots are evaluated in
+the order of their scores, and the value of the best reply so far bounds the value of a shot from above when the
+opponent replies, so the rest of its replies are pruned once that bound cannot beat the best value found. Every
+simulated shot and reply is a node, the search counts them to report its nodes per second. """
+
+
+class Lookahead:
+    """ Searches the shot for the current player of the carrom, the carrom is used to simulate the shots and is
+    restored to its original state after the search. If batch is set, the shots are simulated together with
+    random_ai.simulate_choices, the replies are always simulated one by one so that they can be pruned (unless
+    prune is unset, the search then finds the same shot with more nodes) """
+    def __init__(self, carrom: Carrom, max_angle, max_speed, decelerate, e, dt, permit_orientation=False,
+                 rng=random, num_choices=20, width=4, num_replies=4, batch=False, prune=True):
+        self.carrom = carrom
+        self.max_angle, self.max_speed = max_angle, max_speed
+        self.decelerate, self.e, self.dt = decelerate, e, dt
+        self.permit_orientation = permit_orientation
+        self.rng = rng
+        self.num_choices, self.width, self.num_replies = num_choices, width, num_replies
+        self.batch = batch
+        self.prune = prune
+        self.player = carrom.player_turn
+        self.state = carrom.snapshot()
+        self.num_nodes = 0
+        self.num_pruned = 0
+        self.elapsed = 0.0
+
+    def simulate(self, state, choices, permit_orientation, settle=False):
+        """ Simulates each of the choices from the state, returns the score of the searching player and the snapshot
+        of the carrom after each of them, the shots are settled (Carrom.simulate) if only the scores are needed """
+        carrom = self.carrom
+        carrom.restore(state)
+        self.num_nodes += len(choices)
+        if self.batch and len(choices) > 1:
+            return [(carrom_score(self.player, carrom), carrom.snapshot())
+                    for _ in simulate_choices(carrom, choices, permit_orientation, self.dt, self.decelerate, self.e)]
+        results = []
+        for choice in choices:
+            carrom.restore(state)
+            set_choice(carrom, choice, permit_orientation)
+            carrom.simulate(self.dt, self.decelerate, self.e, settle)
+            carrom.apply_rules()
+            results.append((carrom_score(self.player, carrom), carrom.snapshot()))
+        carrom.restore(state)
+        return results
+
+    def get_replies(self, state):
+        """ Shots of the heuristic ai for the next player (a random shot if it has none), as choices """
+        from ai import get_shots
+        carrom = self.carrom
+        carrom.restore(state)
+        shots = get_shots(carrom, self.max_angle, self.max_speed, self.decelerate, self.e, self.dt)
+        replies = [(shot[1].x, shot[3], shot[2], None) for shot in islice(shots, self.num_replies)]
+        if not replies:
+            replies = [choice[:3] + (None,) for choice in get_choices(carrom, self.max_angle, self.max_speed, 1,
+                                                                      self.rng)]
+        return replies
+
+    def evaluate(self, score, state, best_value=None):
+        """ Value of the state after a shot with the score, the score after the best reply of the next player. The
+        replies of the opponent are pruned (if prune is set) once the value cannot exceed best_value """
+        if state.game_over:
+            return score
+        replies = self.get_replies(state)
+        minimize = state.player_turn != self.player
+        value = None
+        for count, reply in enumerate(replies, 1):
+            (reply_score, _), = self.simulate(state, [reply], False, settle=True)
+            if value is None or (reply_score < value if minimize else reply_score > value):
+                value = reply_score
+            if self.prune and minimize and best_value is not None and value <= best_value:
+                self.num_pruned += len(replies) - count
+                break
+        return value
+
+    def decisions(self):
+        """ Yields the best choice and its value after the evaluation of each of the most promising shots. While the
+        shots are simulated (one by one, or all together if batch is set), the best of them so far is yielded with
+        its score. A random shot is yielded (with the value None) if there are no shots to search """
+        start = perf_counter()
+        carrom = self.carrom
+        try:
+            choices = get_choices(carrom, self.max_angle, self.max_speed, self.num_choices, self.rng)
+            if not self.permit_orientation:
+                choices = [choice[:3] + (None,) for choice in choices]
+            if not choices:
+                choice = get_choices(carrom, self.max_angle, self.max_speed, 1, self.rng)[0]
+                yield (choice if self.permit_orientation else choice[:3] + (None,)), None
+                return
+            results = []
+            best_score, best_choice = None, None
+            chunk_size = max(1, len(choices)) if self.batch else 1
+            for chunk_start in range(0, len(choices), chunk_size):
+                chunk = choices[chunk_start:chunk_start + chunk_size]
+                results += self.simulate(self.state, chunk, self.permit_orientation)
+                for choice, (score, _) in zip(chunk, results[chunk_start:]):
+                    if best_score is None or score > best_score:
+                        best_score, best_choice = score, choice
+                yield best_choice, best_score
+            """ Most promising first, the first ones in case of ties """
+            ranked = sorted(range(len(choices)), key=lambda index: results[index][0], reverse=True)
+            best_value, best_choice = None, None
+            for index in ranked[:self.width]:
+                value = self.evaluate(*results[index], best_value)
+                if best_value is None or value > best_value:
+                    best_value, best_choice = value, choices[index]
+                yield best_choice, best_value
+        finally:
+            carrom.restore(self.state)
+            self.elapsed += perf_counter() - start
+            logging.info("Lookahead searched %d nodes (%d replies pruned) in %.2fs, %.1f nodes/s" % (
+                self.num_nodes, self.num_pruned, self.elapsed, self.get_nodes_per_second()))
+
+    def get_nodes_per_second(self):
+        return self.num_nodes / self.elapsed if self.elapsed else 0.0
+
+
+def ai(carrom: Carrom, max_angle, max_speed, decelerate, e, dt, permit_orientation=False, seed=None, **kwargs):
+    """ Searches for a shot with the two ply lookahead and sets up the striker (and the carrom men orientation, if
+    permitted) for it, other keyword arguments are passed to Lookahead. Returns the choice and its value """
+    search = Lookahead(carrom, max_angle, max_speed, decelerate, e, dt, permit_orientation,
+                       random if seed is None else Random(seed), **kwargs)
+    best = None
+    for best in search.decisions():
+        pass
+    choice, value = best
+    set_choice(carrom, choice, permit_orientation)
+    return choice, value
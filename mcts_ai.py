@@ -0,0 +1,162 @@
+from carrom import Carrom
+from random_ai import carrom_score, set_choice
+from math import ceil, log, sqrt
+from time import perf_counter
+import logging
+import random
+from random import Random
+
+""" Monte Carlo tree search over the continuous shot parameters (striker x position, angle of attack, speed and the
+orientation of the carrom men if permitted). Each node holds the snapshot of the carrom after the shot leading to
+it, and the turn transitions are made by Carrom.apply_rules, so the search plans follow up shots (after pocketing,
+or to cover the queen) and the replies of the opponent. Since the simulation is deterministic, a shot is simulated
+once, when its node is created, and the node is evaluated with the score of its state. Progressive widening limits
+the number of children of a node to about widening * visits ** alpha, new children are either random shots or
+perturbations of the best shot so far. """
+
+""" Slowest shot sampled, as a fraction of the maximum speed """
+MIN_SPEED_FRACTION = 0.25
+""" Probability of sampling a perturbation of the best child instead of a random shot, and the scale of the
+perturbation as a fraction of the range of each parameter """
+REFINE_PROBABILITY = 0.5
+REFINE_SCALE = 0.05
+
+
+class Node:
+    """ Node of the search tree, state is the snapshot of the carrom after the shot leading to the node,
+    value is the sum of the values of the visits, from the point of view of the searching player """
+    def __init__(self, state, shot=None):
+        self.state = state
+        self.shot = shot
+        self.children = []
+        self.visits = 0
+        self.value = 0.0
+
+    def get_mean(self):
+        return self.value / self.visits if self.visits else 0.0
+
+
+class MCTS:
+    """ Searches the shot for the current player of the carrom, the carrom is used to simulate the shots and is
+    restored to its original state after the search """
+    def __init__(self, carrom: Carrom, max_angle, max_speed, decelerate, e, dt, permit_orientation=False, rng=random,
+                 exploration=2.0, widening=2.0, alpha=0.5, max_depth=2):
+        self.carrom = carrom
+        self.max_angle, self.max_speed = max_angle, max_speed
+        self.decelerate, self.e, self.dt = decelerate, e, dt
+        self.permit_orientation = permit_orientation
+        self.rng = rng
+        self.exploration, self.widening, self.alpha = exploration, widening, alpha
+        self.max_depth = max_depth
+        self.x_limits = carrom.board.get_striker_x_limits()
+        self.player = carrom.player_turn
+        self.root = Node(carrom.snapshot())
+        """ Values are relative to the score before the shot """
+        self.base_score = carrom_score(self.player, carrom)
+        self.num_iterations = 0
+
+    def search(self, time_budget=None, max_iterations=None):
+        """ Runs iterations till the time budget (in seconds) is used up or max_iterations are done (at least one),
+        returns the best shot found so far """
+        assert time_budget is not None or max_iterations is not None
+        deadline = None if time_budget is None else perf_counter() + time_budget
+        try:
+            while True:
+                self.iterate()
+                if max_iterations is not None and self.num_iterations >= max_iterations:
+                    break
+                if deadline is not None and perf_counter() >= deadline:
+                    break
+        finally:
+            self.carrom.restore(self.root.state)
+        return self.get_best_shot()
+
+    def get_best_child(self):
+        """ Most visited child of the root, ties are broken by the mean value, None if the root is not expanded yet """
+        if not self.root.children:
+            return None
+        return max(self.root.children, key=lambda child: (child.visits, child.get_mean()))
+
+    def get_best_shot(self):
+        """ Shot of the best child of the root, a random shot if there is none (no iterations were run, or the game is
+        over and nothing is expanded) """
+        best = self.get_best_child()
+        if best is None:
+            return self.sample_shot(self.root, self.permit_orientation)
+        return best.shot
+
+    def iterate(self):
+        """ Selects a path down the tree, expands a new child where widening permits, and backs up its value """
+        node, path, depth = self.root, [self.root], 0
+        while not node.state.game_over and depth < self.max_depth:
+            if len(node.children) < ceil(self.widening * (node.visits + 1) ** self.alpha):
+                node = self.expand(node, depth)
+                path.append(node)
+                break
+            node = self.select(node)
+            path.append(node)
+            depth += 1
+        value = self.evaluate(node)
+        for visited in path:
+            visited.visits += 1
+            visited.value += value
+        self.num_iterations += 1
+
+    def select(self, node):
+        """ Upper confidence bound, the opponent picks the shots that are worst for the searching player """
+        sign = 1 if node.state.player_turn == self.player else -1
+        log_visits = log(node.visits)
+        return max(node.children, key=lambda child: sign * child.get_mean() +
+                   self.exploration * sqrt(log_visits / child.visits))
+
+    def expand(self, node, depth):
+        """ Simulates a new shot from the state of the node, and adds the resulting node as its child """
+        shot = self.sample_shot(node, depth == 0 and self.permit_orientation)
+        carrom = self.carrom
+        carrom.restore(node.state)
+        set_choice(carrom, self.get_choice(shot, carrom.player_turn), shot[3] is not None)
+        carrom.simulate(self.dt, self.decelerate, self.e)
+        carrom.apply_rules()
+        child = Node(carrom.snapshot(), shot)
+        node.children.append(child)
+        return child
+
+    def sample_shot(self, node, orientation):
+        """ Returns a shot (x position, angle of attack, speed, orientation or None) """
+        rng = self.rng
+        limits = [self.x_limits, (-self.max_angle, self.max_angle), (self.max_speed * MIN_SPEED_FRACTION,
+                                                                       self.max_speed), (0, 120)]
+        if not orientation:
+            limits.pop()
+        if node.children and rng.random() < REFINE_PROBABILITY:
+            sign = 1 if node.state.player_turn == self.player else -1
+            best = max(node.children, key=lambda child: sign * child.get_mean())
+            shot = [min(high, max(low, value + rng.gauss(0, REFINE_SCALE * (high - low))))
+                    for value, (low, high) in zip(best.shot, limits)]
+        else:
+            shot = [rng.uniform(low, high) for low, high in limits]
+        return tuple(shot) if orientation else tuple(shot) + (None,)
+
+    @staticmethod
+    def get_choice(shot, player):
+        """ Shot as a choice of random_ai (x position, striker angle, speed, orientation) """
+        x_position, angle_of_attack, speed, orientation = shot
+        striker_angle = -90 - angle_of_attack if player == 0 else 90 - angle_of_attack
+        return x_position, striker_angle, speed, orientation
+
+    def evaluate(self, node):
+        """ Score of the state of the node for the searching player, relative to the score before the search """
+        self.carrom.restore(node.state)
+        return carrom_score(self.player, self.carrom) - self.base_score
+
+
+def ai(carrom: Carrom, max_angle, max_speed, decelerate, e, dt, permit_orientation=False, time_budget=1.0,
+       max_iterations=None, seed=None, **kwargs):
+    """ Searches for a shot with MCTS within the time budget (seconds) or max_iterations, and sets up the striker
+    (and the carrom men orientation, if permitted) for it. Other keyword arguments are passed to MCTS """
+    search = MCTS(carrom, max_angle, max_speed, decelerate, e, dt, permit_orientation,
+                  random if seed is None else Random(seed), **kwargs)
+    shot = search.search(time_budget, max_iterations)
+    logging.info("MCTS searched %d iterations, %d shots at the root" % (search.num_iterations,
+                                                                         len(search.root.children)))
+    set_choice(carrom, search.get_choice(shot, carrom.player_turn), shot[3] is not None)
@@ -0,0 +1,137 @@
+from carrom import Carrom
+from geometry import Rect
+from random_ai import evaluate_choice
+from rollout_pool import RolloutPool, get_config
+from array import array
+from itertools import islice, product
+import argparse
+import logging
+import pickle
+
+""" Opening book, the first strike (the break) is the only one where the carrom men can be oriented, and the most
+expensive one to simulate since all the coins move. The book is built offline by simulating a grid of orientations,
+striker x positions, angles of attack and speeds from the starting position (in parallel with a rollout pool), and
+keeps the score of each of them as a compact table. The ais look up the best break in it instead of searching. A
+book only applies to a carrom with the same board, engine and simulation parameters as the one it was built with. """
+
+
+def is_opening(carrom: Carrom):
+    """ Whether the carrom is at the start of the game, all the coins on the board and no fouls """
+    return carrom.player_turn == 0 and not carrom.pocketed_queen and not any(carrom.pocketed_coins) and \
+        not any(carrom.foul_count)
+
+
+def linspace(low, high, num):
+    """ num evenly spaced values from low to high (both included) """
+    return tuple(low + (high - low) * i / (num - 1) for i in range(num)) if num > 1 else ((low + high) / 2,)
+
+
+class OpeningBook:
+    """ Scores of the grid of breaks, in the order of product(orientations, positions, angles, speeds) """
+    def __init__(self, key, axes, scores):
+        self.key = key
+        self.axes = axes
+        self.scores = scores
+
+    @staticmethod
+    def get_key(carrom: Carrom, max_angle, max_speed, dt, decelerate, e):
+        """ Parameters which must match for the book to apply to the carrom """
+        return get_config(carrom), max_angle, max_speed, dt, decelerate, e
+
+    @staticmethod
+    def get_choice(shot):
+        """ Break (orientation, x position, angle of attack, speed) as a choice of random_ai for the first player """
+        orientation, x_position, angle_of_attack, speed = shot
+        return x_position, -90 - angle_of_attack, speed, orientation
+
+    def get_shots(self):
+        return product(*self.axes)
+
+    def get_best_choice(self):
+        """ Choice of the break with the highest score, the first one in case of ties """
+        best = max(range(len(self.scores)), key=self.scores.__getitem__)
+        return self.get_choice(next(islice(self.get_shots(), best, None)))
+
+    def lookup(self, carrom: Carrom, max_angle, max_speed, dt, decelerate, e):
+        """ Best choice for the break of the carrom, or None if the carrom is not at the opening or the book was
+        built for other parameters """
+        if not is_opening(carrom) or self.key != self.get_key(carrom, max_angle, max_speed, dt, decelerate, e):
+            return None
+        return self.get_best_choice()
+
+    def save(self, path):
+        with open(path, 'wb') as file:
+            pickle.dump({'key': self.key, 'axes': self.axes, 'scores': self.scores}, file)
+
+    @staticmethod
+    def load(path):
+        with open(path, 'rb') as file:
+            data = pickle.load(file)
+        return OpeningBook(data['key'], data['axes'], data['scores'])
+
+
+def build(carrom: Carrom, max_angle, max_speed, dt, decelerate, e, num_orientations=6, num_positions=9,
+          num_angles=9, num_speeds=2, min_speed_fraction=0.5, workers=0, chunk_size=64, progress=None):
+    """ Simulates the grid of breaks from the opening of the carrom, with a pool of workers if given, progress (if
+    given) is called with the number of simulated breaks after every chunk. Returns the book """
+    assert is_opening(carrom)
+    x_limits = carrom.board.get_striker_x_limits()
+    """ Orientations repeat every 120 degrees """
+    axes = (tuple(120 * i / num_orientations for i in range(num_orientations)), linspace(*x_limits, num_positions),
+            linspace(-max_angle, max_angle, num_angles),
+            linspace(max_speed * min_speed_fraction, max_speed, num_speeds))
+    state = carrom.snapshot()
+    choices = [OpeningBook.get_choice(shot) for shot in product(*axes)]
+    pool = RolloutPool(get_config(carrom), workers) if workers else None
+    scores = array('h')
+    try:
+        for start in range(0, len(choices), chunk_size):
+            chunk = choices[start:start + chunk_size]
+            if pool is not None:
+                scores.extend(pool.evaluate(state, chunk, True, dt, decelerate, e))
+            else:
+                scores.extend(evaluate_choice(carrom, state, choice, True, dt, decelerate, e) for choice in chunk)
+            if progress is not None:
+                progress(len(scores))
+    finally:
+        carrom.restore(state)
+        if pool is not None:
+            pool.close()
+    return OpeningBook(OpeningBook.get_key(carrom, max_angle, max_speed, dt, decelerate, e), axes, scores)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Builds the opening book of the first strike for the ais")
+    parser.add_argument('--output', '-o', default='opening_book.pkl', help="file to write the book to")
+    parser.add_argument('--width', '-w', type=int, default=700, help="carrom board width")
+    parser.add_argument("--max_angle", type=float, default=80, help="maximum striker angle")
+    parser.add_argument("--max_speed", type=float, default=40, help="maximum striker speed")
+    parser.add_argument("--dt", type=float, default=0.1, help="simulation interval")
+    parser.add_argument("--decelerate", type=float, default=0.3, help="deceleration due to friction")
+    parser.add_argument("--e", type=float, default=0.9, help="co-efficient of restitution for collisions")
+    parser.add_argument("--engine", choices=Carrom.ENGINES, default='object', help="physics engine used for simulation")
+    parser.add_argument("--fast_forward", action="store_true",
+                        help="advance coins straight to rest once they can't collide (object engine)")
+    parser.add_argument("--tolerance", type=float, default=None,
+                        help="enable adaptive steps of at most dt, with the given collision tolerance (in pixels)")
+    parser.add_argument("--orientations", type=int, default=6, help="number of carrom men orientations")
+    parser.add_argument("--positions", type=int, default=9, help="number of striker x positions")
+    parser.add_argument("--angles", type=int, default=9, help="number of angles of attack")
+    parser.add_argument("--speeds", type=int, default=2, help="number of striker speeds")
+    parser.add_argument("--workers", type=int, default=0, help="number of worker processes to simulate in parallel")
+    args = parser.parse_args()
+    """ The fouls of the simulated breaks are not of interest """
+    logging.disable(logging.WARNING)
+
+    carrom = Carrom(Rect(0, 0, args.width, args.width), engine=args.engine, fast_forward=args.fast_forward,
+                    tolerance=args.tolerance)
+    total = args.orientations * args.positions * args.angles * args.speeds
+    book = build(carrom, args.max_angle, args.max_speed, args.dt, args.decelerate, args.e, args.orientations,
+                 args.positions, args.angles, args.speeds, workers=args.workers,
+                 progress=lambda done: print("Simulated %d of %d breaks" % (done, total), end='\r', flush=True))
+    book.save(args.output)
+    print("\nBest break", book.get_best_choice(), "with score", max(book.scores), "written to", args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+from math import sqrt
+import numpy as np
+
+""" Clearance of straight paths, the positions of the coins on the board are indexed once per turn, and any number of
+segments are checked against all of them in a single call. Each check is the same as ai.check_along_path: a coin
+blocks the segment if its projection on the segment (clamped to the ends if rounded) lies within the given
+distance of it. """
+
+
+class PathIndex:
+    """ Positions of the given coins, to check whether paths between points are clear of them """
+    def __init__(self, coins):
+        self.coins = list(coins)
+        self.index = {id(coin): index for index, coin in enumerate(self.coins)}
+        self.positions = [(coin.position.x, coin.position.y) for coin in self.coins]
+        self.x, self.y = np.array([x for x, _ in self.positions]), np.array([y for _, y in self.positions])
+
+    @staticmethod
+    def get_points(points):
+        """ Array of shape (N, 2) of the given points """
+        if isinstance(points, np.ndarray):
+            return points.reshape(-1, 2)
+        return np.array([(point[0], point[1]) for point in points], dtype=float).reshape(-1, 2)
+
+    def blocked(self, starts, ends, distance, exclude=None, round_start=False, round_end=False):
+        """ Returns for each of the segments (start and end points, as vectors or tuples, or arrays of shape (N, 2))
+        whether any of the coins, other than the exclude coin, lies within the distance of it, as a boolean array """
+        skip = None if exclude is None else self.index.get(id(exclude))
+        starts, ends = self.get_points(starts), self.get_points(ends)
+        x, y = self.x, self.y
+        if skip is not None:
+            x, y = np.delete(x, skip), np.delete(y, skip)
+        start_x, start_y = starts[:, 0:1], starts[:, 1:2]
+        end_x, end_y = ends[:, 0:1], ends[:, 1:2]
+        dx, dy = end_x - start_x, end_y - start_y
+        """ Rows are the segments and columns are the coins """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            section = ((x - start_x) * dx + (y - start_y) * dy) / (dx * dx + dy * dy)
+        if round_start:
+            section = np.maximum(section, 0)
+        if round_end:
+            section = np.minimum(section, 1)
+        projection_x = start_x * (1 - section) + end_x * section
+        projection_y = start_y * (1 - section) + end_y * section
+        projection_x, projection_y = projection_x - x, projection_y - y
+        near = np.sqrt(projection_x * projection_x + projection_y * projection_y) <= distance
+        return ((section >= 0) & (section <= 1) & near).any(axis=1)
+
+    def is_blocked(self, start, end, distance, exclude=None, round_start=False, round_end=False):
+        """ Same as blocked, for a single segment """
+        skip = None if exclude is None else self.index.get(id(exclude))
+        return self.check(start[0], start[1], end[0], end[1], distance, skip, round_start, round_end)
+
+    def check(self, start_x, start_y, end_x, end_y, distance, skip, round_start, round_end):
+        """ Checks a single segment against the coins, except the one at index skip """
+        dx, dy = end_x - start_x, end_y - start_y
+        length_squared = dx * dx + dy * dy
+        if length_squared == 0:
+            """ Same as blocked, where the sections of a point are nan """
+            return False
+        for index, (x, y) in enumerate(self.positions):
+            if index == skip:
+                continue
+            section = ((x - start_x) * dx + (y - start_y) * dy) / length_squared
+            section = section if not round_start else max(0, section)
+            section = section if not round_end else min(1, section)
+            if 0 <= section <= 1:
+                offset_x = start_x * (1 - section) + end_x * section - x
+                offset_y = start_y * (1 - section) + end_y * section - y
+                if sqrt(offset_x * offset_x + offset_y * offset_y) <= distance:
+                    return True
+        return False
@@ -0,0 +1,160 @@
+import numpy as np
+
+
+""" Array based simulation kernels, these model the same physics as the Coin class, but store the positions,
+velocities, radii and masses of all the coins in contiguous arrays. Arrays have a board axis, so that the same
+kernels can simulate a stack of boards, positions and velocities are stored as structure of arrays of shape
+(2, boards, coins), that is x and y components are separate arrays.
+Coins that were pocketed are moved to NaN positions with zero velocity, so that they never collide, reflect or
+get pocketed again.
+The cost of a step is mostly the overhead of the numpy calls, so a single board is simulated no faster than by the
+object engine (which skips the coins at rest), the gain comes from stacking boards, as batch.py does. """
+
+
+def resolve_collisions(position, velocity, radius, mass, pairs, e, first_collision):
+    """ Handles collisions between the coins of each board, the same way as Coin.check_collision and Coin.collide.
+    Pairs are processed in the given order (order of combinations), which is required as a coin may collide with
+    multiple coins in the same step. first_collision (boards, 2) is updated with the first collision of the board """
+    first, second = pairs
+    """ Positions do not change while handling collisions, so the overlapping pairs are known in advance """
+    difference = position[:, :, first] - position[:, :, second]
+    dx, dy = difference
+    overlap = np.sqrt(dx * dx + dy * dy) <= radius[first] + radius[second]
+    if not np.count_nonzero(overlap):
+        return
+    candidates = np.flatnonzero(overlap.any(axis=0))
+    """ Coins moving on any of the boards, pairs where both the coins are at rest on all boards are skipped """
+    awake = (velocity != 0).any(axis=(0, 1)).tolist()
+    for pair, i, j in zip(candidates.tolist(), first[candidates].tolist(), second[candidates].tolist()):
+        if not (awake[i] or awake[j]):
+            continue
+        boards = np.flatnonzero(overlap[:, pair])
+        """ Velocities are re-read for every pair, since earlier collisions might have changed them """
+        velocity_i, velocity_j = velocity[:, boards, i], velocity[:, boards, j]
+        (vx, vy), (dx, dy) = velocity_i - velocity_j, difference[:, boards, pair]
+        dot = vx * dx + vy * dy
+        """ Collisions can only happen if they are moving towards each other, and one of them is moving """
+        colliding = (dot <= 0) & ((velocity_i != 0) | (velocity_j != 0)).any(axis=0)
+        if not np.count_nonzero(colliding):
+            continue
+        """ Detect the first collision between coins """
+        new_first = colliding & (first_collision[boards, 0] < 0)
+        first_collision[boards[new_first]] = (i, j)
+        """ If they overlap fully then no collision """
+        length_squared = dx * dx + dy * dy
+        colliding &= length_squared != 0
+        boards, dot, length_squared = boards[colliding], dot[colliding], length_squared[colliding]
+        relative_position = difference[:, boards, pair]
+        scale_i = ((1 + e) * mass[j] / (mass[i] + mass[j])) * dot / length_squared
+        scale_j = ((1 + e) * mass[i] / (mass[i] + mass[j])) * dot / length_squared
+        velocity[:, boards, i] = velocity_i[:, colliding] - scale_i * relative_position
+        velocity[:, boards, j] = velocity_j[:, colliding] + scale_j * relative_position
+        awake[i] = awake[j] = True
+
+
+def integrate(position, velocity, radius, low, high, dt, deceleration):
+    """ Updates the positions of the coins on the board, and also handles reflection and deceleration of the coins,
+    the same way as Coin.update. low and high are the (left, top) and (right, bottom) of the container,
+    of shape (2, 1, 1) """
+    position += velocity * dt
+
+    """ If over board, then it must be reflected to inside the board, and direction of velocity changed """
+    outer = position + radius
+    over = outer > high
+    under = (position - radius < low) & ~over
+    if np.count_nonzero(over):
+        position -= np.where(over, 2 * (outer - high), 0.0)
+        np.negative(velocity, out=velocity, where=over)
+    if np.count_nonzero(under):
+        position += np.where(under, 2 * (low - position + radius), 0.0)
+        np.negative(velocity, out=velocity, where=under)
+
+    """ Now decelerate the coins, which is used to model sliding friction """
+    vx, vy = velocity
+    speed = np.sqrt(vx * vx + vy * vy)
+    sliding = speed > deceleration * dt
+    np.subtract(velocity, velocity / np.where(sliding, speed, 1.0) * deceleration * dt, out=velocity, where=sliding)
+    np.copyto(velocity, 0.0, where=~sliding)
+
+
+def check_pocketed(position, radius, pocket_centers, pocket_radius):
+    """ Returns a mask (boards, coins) of the coins that completely lie within one of the pockets,
+    pocket_centers are of shape (2, pockets, 1, 1) """
+    dx, dy = position[:, None] - pocket_centers
+    return (np.sqrt(dx * dx + dy * dy) < pocket_radius - radius).any(axis=0)
+
+
+def check_moving(velocity):
+    """ Returns a mask of the boards, on which some coin is moving """
+    return (velocity != 0).any(axis=(0, 2))
+
+
+def board_arrays(board):
+    """ Returns the container limits low (left, top) and high (right, bottom) of shape (2, 1, 1), and the pocket
+    centers of shape (2, pockets, 1, 1) of the given board, as used by the kernels """
+    container = board.container
+    low = np.array([container.left, container.top], dtype=float).reshape(2, 1, 1)
+    high = np.array([container.right, container.bottom], dtype=float).reshape(2, 1, 1)
+    pocket_centers = np.array([[center.x for center in board.pocket_centers],
+                               [center.y for center in board.pocket_centers]]).reshape(2, -1, 1, 1)
+    return low, high, pocket_centers
+
+
+class ArrayPhysics:
+    """ Simulates the coins of a board with the array kernels. Coins are loaded at the start of a shot, the state is
+    kept in arrays till all the coins stop moving and only then written back to the coin objects """
+    def __init__(self, board):
+        self.low, self.high, self.pocket_centers = board_arrays(board)
+        self.pocket_radius = board.pocket_radius
+        """ Coins of the current shot, None if no shot is being simulated """
+        self.coins = None
+
+    @property
+    def active(self):
+        return self.coins is not None
+
+    def load(self, coins):
+        """ Copy the state of the given coins (coins on the board, in the simulation order) to the arrays """
+        self.coins = coins
+        self.position = np.array([[[coin.position.x for coin in coins]], [[coin.position.y for coin in coins]]])
+        self.velocity = np.array([[[coin.velocity.x for coin in coins]], [[coin.velocity.y for coin in coins]]])
+        self.radius = np.array([coin.radius for coin in coins], dtype=float)
+        self.mass = np.array([coin.mass for coin in coins], dtype=float)
+        self.pairs = np.triu_indices(len(coins), 1)
+        self.first_collision = np.full((1, 2), -1)
+        """ Positions and velocities of the pocketed coins, at the time they were pocketed """
+        self.pocketed = {}
+
+    def update(self, dt, decelerate, e):
+        """ Proceed the simulation by given delta time, returns the coins pocketed and the first collision
+        (pair of coins or None) of this update """
+        first_collision = self.first_collision
+        first_collision[:] = -1
+        resolve_collisions(self.position, self.velocity, self.radius, self.mass, self.pairs, e, first_collision)
+        integrate(self.position, self.velocity, self.radius, self.low, self.high, dt, decelerate)
+        pocketed = check_pocketed(self.position, self.radius, self.pocket_centers, self.pocket_radius)[0]
+        pocketed_coins = []
+        if np.count_nonzero(pocketed):
+            for index in np.flatnonzero(pocketed).tolist():
+                self.pocketed[index] = (self.position[:, 0, index].tolist(), self.velocity[:, 0, index].tolist())
+                pocketed_coins.append(self.coins[index])
+            self.position[:, 0, pocketed] = np.nan
+            self.velocity[:, 0, pocketed] = 0.0
+        if first_collision[0, 0] < 0:
+            return pocketed_coins, None
+        return pocketed_coins, [self.coins[index] for index in first_collision[0].tolist()]
+
+    def check_moving(self):
+        return np.count_nonzero(self.velocity) > 0
+
+    def sync(self):
+        """ Write back the positions and velocities to the coin objects """
+        for index, (coin, x, y, vx, vy) in enumerate(zip(self.coins, *self.position[:, 0].tolist(),
+                                                         *self.velocity[:, 0].tolist())):
+            position, velocity = self.pocketed.get(index, ((x, y), (vx, vy)))
+            coin.position.update(position)
+            coin.velocity.update(velocity)
+
+    def unload(self):
+        """ Shot is over, release the coins """
+        self.coins = None
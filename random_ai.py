@@ -1,7 +1,8 @@
 from carrom import Carrom
-from random import uniform
-from copy import deepcopy
-from pygame import Vector2
+import random
+from random import Random
+from geometry import Vector2
+from math import ceil, sqrt, log, atan2, cos, sin, radians, degrees
 
 
 def carrom_score(player, carrom: Carrom):
@@ -14,44 +15,293 @@ def carrom_score(player, carrom: Carrom):
     return score
 
 
-def ai(carrom: Carrom, max_angle, max_speed, decelerate, e, dt, permit_orientation=False, num_choices=10):
-    """ Performs a random search """
-    player, opponent = carrom.player_turn, (carrom.player_turn + 1) % 2
-    y_position = carrom.board.get_striker_y_position(player)
+def get_choices(carrom: Carrom, max_angle, max_speed, num_choices, rng=random):
+    """ Returns random choices of striker x position, striker angle, striker speed and carrom orientation """
+    player = carrom.player_turn
     x_limits = carrom.board.get_striker_x_limits()
-    max_score, striker_params = None, None
-    # speed = max_speed
+    choices = []
     for i in range(num_choices):
-        angle_of_attack = uniform(- max_angle, max_angle)
-        x_position = uniform(x_limits[0], x_limits[1])
-        striker_position = Vector2(x_position, y_position)
+        angle_of_attack = rng.uniform(- max_angle, max_angle)
+        x_position = rng.uniform(x_limits[0], x_limits[1])
         striker_angle = -90 - angle_of_attack if player == 0 else 90 - angle_of_attack
         striker_speed = max_speed
         """ Also if carrom orientation can be changed """
-        carrom_orientation = uniform(0, 120)
-        copied_carrom = deepcopy(carrom)
-        copied_carrom.striker.position = striker_position
-        copied_carrom.striker.velocity.from_polar((striker_speed, striker_angle))
-        if permit_orientation:
-            """ If orientation can be set """
-            copied_carrom.rotate_carrom_men(carrom_orientation)
-        score = simulate_carrom(copied_carrom, dt, decelerate, e)
-        if not max_score or score > max_score:
-            max_score = score
-            striker_params = (x_position, striker_angle, striker_speed, carrom_orientation)
-    """ Local best has been computed.. Now run it with that """
-    x_position, striker_angle, striker_speed, carrom_orientation = striker_params
+        carrom_orientation = rng.uniform(0, 120)
+        choices.append((x_position, striker_angle, striker_speed, carrom_orientation))
+    return choices
+
+
+""" Lowest striker speed of the cross entropy search, as a fraction of max_speed """
+MIN_SPEED_FRACTION = 0.25
+
+""" Lowest standard deviation of the sampling distribution, as a fraction of the range of each parameter, so that
+the search does not collapse on a shot before its neighbourhood is explored """
+MIN_STD_FRACTION = 0.02
+
+
+class CrossEntropy:
+    """ Sampling distribution of the cross entropy search over the striker x position, angle of attack, speed and
+    carrom orientation. The first choices are those of the random search (get_choices, at the maximum speed, which
+    pockets far more than uniform speeds), and after each batch of scored choices the distribution is refit to the
+    best (elite) of them, as independent normal distributions clipped to the limits (wrapped around for the
+    orientation, which repeats every 120 degrees). The refit mean and deviation are smoothed with the previous ones,
+    so that a single lucky batch does not narrow the search too quickly """
+    def __init__(self, carrom: Carrom, max_angle, max_speed, elite_fraction=0.2, smoothing=0.7, rng=random):
+        self.carrom = carrom
+        self.max_angle, self.max_speed = max_angle, max_speed
+        self.player = carrom.player_turn
+        self.limits = (carrom.board.get_striker_x_limits(), (-max_angle, max_angle),
+                       (max_speed * MIN_SPEED_FRACTION, max_speed), (0, 120))
+        self.elite_fraction = elite_fraction
+        self.smoothing = smoothing
+        self.rng = rng
+        """ None till the first refit, then the mean and standard deviation of each parameter """
+        self.means, self.stds = None, None
+
+    def get_choice(self, x_position, angle_of_attack, striker_speed, carrom_orientation):
+        striker_angle = -90 - angle_of_attack if self.player == 0 else 90 - angle_of_attack
+        return x_position, striker_angle, striker_speed, carrom_orientation
+
+    def get_parameters(self, choice):
+        x_position, striker_angle, striker_speed, carrom_orientation = choice
+        angle_of_attack = -90 - striker_angle if self.player == 0 else 90 - striker_angle
+        return x_position, angle_of_attack, striker_speed, carrom_orientation
+
+    def sample(self, num_choices):
+        """ Returns num_choices choices drawn from the distribution """
+        if self.means is None:
+            return get_choices(self.carrom, self.max_angle, self.max_speed, num_choices, self.rng)
+        choices = []
+        for _ in range(num_choices):
+            parameters = [min(max(self.rng.gauss(mean, std), low), high)
+                          for mean, std, (low, high) in zip(self.means[:3], self.stds[:3], self.limits[:3])]
+            parameters.append(self.rng.gauss(self.means[3], self.stds[3]) % 120)
+            choices.append(self.get_choice(*parameters))
+        return choices
+
+    def update(self, choices, scores):
+        """ Refits the distribution to the elite of the scored choices (the first ones in case of ties) """
+        num_elite = max(1, ceil(len(choices) * self.elite_fraction))
+        ranked = sorted(range(len(choices)), key=lambda index: scores[index], reverse=True)
+        elite = [self.get_parameters(choices[index]) for index in ranked[:num_elite]]
+        means, stds = [], []
+        for values in list(zip(*elite))[:3]:
+            mean = sum(values) / len(values)
+            means.append(mean)
+            stds.append(sqrt(sum((value - mean) ** 2 for value in values) / len(values)))
+        """ Circular mean and deviation of the orientations, on the circle of one period (120 degrees), at most the
+        deviation of uniform orientations """
+        sin_mean = sum(sin(radians(3 * value[3])) for value in elite) / len(elite)
+        cos_mean = sum(cos(radians(3 * value[3])) for value in elite) / len(elite)
+        resultant = max(sqrt(sin_mean ** 2 + cos_mean ** 2), 1e-9)
+        means.append(degrees(atan2(sin_mean, cos_mean)) / 3 % 120)
+        stds.append(min(degrees(sqrt(-2 * log(min(resultant, 1.0)))) / 3, 120 / sqrt(12)))
+        if self.means is not None:
+            """ The orientation is smoothed along the shorter way around """
+            means[3] = self.means[3] + ((means[3] - self.means[3] + 60) % 120 - 60)
+            means = [self.smoothing * new + (1 - self.smoothing) * old for new, old in zip(means, self.means)]
+            stds = [self.smoothing * new + (1 - self.smoothing) * old for new, old in zip(stds, self.stds)]
+            means[3] %= 120
+        else:
+            """ Uniformly drawn parameters have the deviation range / sqrt(12), the speed is explored from there too """
+            stds = [self.smoothing * std + (1 - self.smoothing) * (high - low) / sqrt(12)
+                    for std, (low, high) in zip(stds, self.limits)]
+        self.means = means
+        self.stds = [max(std, MIN_STD_FRACTION * (high - low)) for std, (low, high) in zip(stds, self.limits)]
+
+
+def get_noise(max_angle, max_speed):
+    """ Standard deviations of the execution noise of a shot, of the striker x position (pixels), angle (degrees)
+    and speed: a fine step of the controls of carrom_client.handle_user_input """
+    return 0.5, 0.005 * max_angle, 0.005 * max_speed
+
+
+def get_variants(carrom: Carrom, choice, num_variants, noise, rng=random):
+    """ Returns the choice and num_variants - 1 perturbations of it, with normal noise of the standard deviations
+    (x position, striker angle, speed), the x position is kept within the limits of the striker """
+    x_limits = carrom.board.get_striker_x_limits()
+    x_position, striker_angle, striker_speed, carrom_orientation = choice
+    variants = [choice]
+    for _ in range(num_variants - 1):
+        variants.append((min(max(x_position + rng.gauss(0, noise[0]), x_limits[0]), x_limits[1]),
+                         striker_angle + rng.gauss(0, noise[1]), max(0.0, striker_speed + rng.gauss(0, noise[2])),
+                         carrom_orientation))
+    return variants
+
+
+def set_choice(carrom: Carrom, choice, permit_orientation):
+    """ Places the striker (and orients the carrom men if permitted) as per the choice """
+    x_position, striker_angle, striker_speed, carrom_orientation = choice
     if permit_orientation:
         carrom.rotate_carrom_men(carrom_orientation)
-    carrom.striker.position = Vector2(x_position, y_position)
+    carrom.striker.position = Vector2(x_position, carrom.board.get_striker_y_position(carrom.player_turn))
     carrom.striker.velocity.from_polar((striker_speed, striker_angle))
 
 
+def evaluate_choice(carrom: Carrom, state, choice, permit_orientation, dt, decelerate, e):
+    """ Restores the carrom to the state, and returns the score of simulating the choice """
+    carrom.restore(state)
+    set_choice(carrom, choice, permit_orientation)
+    return simulate_carrom(carrom, dt, decelerate, e)
+
+
+def score_choices(carrom: Carrom, state, choices, permit_orientation, dt, decelerate, e, batch=False, workers=0,
+                  poll=None, coordinator=None):
+    """ Scores of the choices simulated from the state, together with score_batch if batch is set, on the workers
+    of the coordinator (distributed.Coordinator) if given, by the rollout pool if workers is set (poll is called
+    while waiting for either), or else one by one on the carrom, which is restored """
+    if batch:
+        scores = score_batch(carrom, choices, permit_orientation, dt, decelerate, e)
+    elif coordinator is not None:
+        from distributed import RemoteRolloutPool
+        from rollout_pool import get_config
+        scores = RemoteRolloutPool(coordinator, get_config(carrom)).evaluate(state, choices, permit_orientation, dt,
+                                                                             decelerate, e, poll)
+    elif workers:
+        from rollout_pool import get_pool
+        scores = get_pool(carrom, workers).evaluate(state, choices, permit_orientation, dt, decelerate, e, poll)
+    else:
+        scores = [evaluate_choice(carrom, state, choice, permit_orientation, dt, decelerate, e) for choice in choices]
+    carrom.restore(state)
+    return scores
+
+
+def robust_scores(carrom: Carrom, state, choices, permit_orientation, dt, decelerate, e, num_variants, noise,
+                  risk=0.0, rng=random, batch=False, workers=0, poll=None, coordinator=None):
+    """ Scores of the choices under execution noise (as get_noise), every choice is simulated as num_variants
+    variants, all of them in a single call of score_choices, and is scored by the mean of the scores of its
+    variants (the expected score) less risk times their standard deviation, a risk above 0 prefers consistent
+    shots over ones with a higher expected score """
+    variants = [variant for choice in choices for variant in get_variants(carrom, choice, num_variants, noise, rng)]
+    scores = score_choices(carrom, state, variants, permit_orientation, dt, decelerate, e, batch, workers, poll,
+                           coordinator)
+    robust = []
+    for start in range(0, len(scores), num_variants):
+        samples = scores[start:start + num_variants]
+        mean = sum(samples) / num_variants
+        robust.append(mean - risk * sqrt(sum((sample - mean) ** 2 for sample in samples) / num_variants))
+    return robust
+
+
+def get_best_choice(choices, scores):
+    """ Returns the choice with the highest score, the first one in case of ties """
+    max_score, best_choice = None, None
+    for choice, score in zip(choices, scores):
+        if max_score is None or score > max_score:
+            max_score = score
+            best_choice = choice
+    return best_choice
+
+
+def ai(carrom: Carrom, max_angle, max_speed, decelerate, e, dt, permit_orientation=False, num_choices=10, batch=False,
+       workers=0, seed=None, poll=None, cache=None, book=None, iterations=1, variants=1, risk=0.0, noise=None,
+       coordinator=None):
+    """ Performs a random search, if batch is set, all the choices are simulated together with simulate_batch,
+    if workers is set, the choices are simulated in parallel by a pool of that many processes, or on the workers
+    of a distributed.Coordinator if given (poll is called while waiting for them). If seed is given the choices
+    are drawn from a generator with that seed, and the decision does not depend on the number of workers. If a
+    decision_cache.DecisionCache is given, the choice is looked up in it first and cached after the search. If an
+    opening_book.OpeningBook is given, the first strike is taken from it. If iterations is more than 1, the
+    num_choices simulations are split into that many batches of a cross entropy search instead. If variants is more
+    than 1, the choices are ranked by robust_scores, under the execution noise (get_noise if not given) and with the
+    risk. Returns the choice (orientation is None if not permitted) """
+    if book is not None and permit_orientation:
+        choice = book.lookup(carrom, max_angle, max_speed, dt, decelerate, e)
+        if choice is not None:
+            set_choice(carrom, choice, True)
+            return choice
+    if cache is not None:
+        """ Robust decisions are kept apart from the exact ones """
+        params = (max_angle, max_speed, decelerate, e, dt, permit_orientation, num_choices, iterations)
+        return cache.decide(carrom, 'random', params + ((variants, risk, noise) if variants > 1 else ()),
+                            lambda: ai(carrom, max_angle, max_speed, decelerate, e, dt, permit_orientation,
+                                       num_choices, batch, workers, seed, poll, iterations=iterations,
+                                       variants=variants, risk=risk, noise=noise, coordinator=coordinator))
+    rng = random if seed is None else Random(seed)
+    if variants > 1 and noise is None:
+        noise = get_noise(max_angle, max_speed)
+    if iterations > 1:
+        return cross_entropy_ai(carrom, max_angle, max_speed, decelerate, e, dt, permit_orientation, num_choices,
+                                iterations, batch, workers, rng, poll, variants, risk, noise, coordinator)
+    choices = get_choices(carrom, max_angle, max_speed, num_choices, rng)
+    """ Choices are simulated on the carrom itself, which is restored to this state after each of them """
+    state = carrom.snapshot()
+    if variants > 1:
+        scores = robust_scores(carrom, state, choices, permit_orientation, dt, decelerate, e, variants, noise, risk,
+                               rng, batch, workers, poll, coordinator)
+    else:
+        scores = score_choices(carrom, state, choices, permit_orientation, dt, decelerate, e, batch, workers, poll,
+                               coordinator)
+    """ Local best has been computed.. Now run it with that """
+    best_choice = get_best_choice(choices, scores)
+    set_choice(carrom, best_choice, permit_orientation)
+    return best_choice if permit_orientation else best_choice[:3] + (None,)
+
+
+def cross_entropy_ai(carrom: Carrom, max_angle, max_speed, decelerate, e, dt, permit_orientation=False,
+                     num_choices=40, iterations=4, batch=False, workers=0, rng=random, poll=None, variants=1, risk=0.0,
+                     noise=None, coordinator=None):
+    """ Performs a cross entropy search, the num_choices simulations are split into iterations batches, each drawn
+    from the distribution refit to the best choices of the previous one. The batches are simulated together or
+    in parallel, and scored under execution noise if variants is more than 1, as by ai. Returns the best choice """
+    search = CrossEntropy(carrom, max_angle, max_speed, rng=rng)
+    batch_size = ceil(num_choices / iterations)
+    state = carrom.snapshot()
+    max_score, best_choice = None, None
+    for start in range(0, num_choices, batch_size):
+        choices = search.sample(min(batch_size, num_choices - start))
+        if variants > 1:
+            scores = robust_scores(carrom, state, choices, permit_orientation, dt, decelerate, e, variants,
+                                   noise or get_noise(max_angle, max_speed), risk, rng, batch, workers, poll,
+                                   coordinator)
+        else:
+            scores = score_choices(carrom, state, choices, permit_orientation, dt, decelerate, e, batch, workers,
+                                   poll, coordinator)
+        search.update(choices, scores)
+        best = max(range(len(choices)), key=scores.__getitem__)
+        if max_score is None or scores[best] > max_score:
+            max_score, best_choice = scores[best], choices[best]
+    set_choice(carrom, best_choice, permit_orientation)
+    return best_choice if permit_orientation else best_choice[:3] + (None,)
+
+
+def score_batch(carrom: Carrom, choices, permit_orientation, dt, decelerate, e):
+    """ Simulates all the choices in lockstep, and the final state of each board is then applied to the carrom to
+    score it, the carrom is restored after each of them. Returns the scores """
+    player = carrom.player_turn
+    return [carrom_score(player, carrom) for _ in simulate_choices(carrom, choices, permit_orientation, dt,
+                                                                   decelerate, e)]
+
+
+def simulate_choices(carrom: Carrom, choices, permit_orientation, dt, decelerate, e):
+    """ Simulates all the choices in lockstep with simulate_batch, and yields the carrom in the final state of each
+    board in turn (with the rules applied), the carrom is restored to its state before each board and when done """
+    from batch import simulate_batch
+    y_position = carrom.board.get_striker_y_position(carrom.player_turn)
+    shots = []
+    for x_position, striker_angle, striker_speed, carrom_orientation in choices:
+        striker_velocity = Vector2()
+        striker_velocity.from_polar((striker_speed, striker_angle))
+        shots.append(((x_position, y_position), striker_velocity, carrom_orientation if permit_orientation else None))
+    result = simulate_batch(carrom, shots, dt, decelerate, e)
+    state = carrom.snapshot()
+    try:
+        for index, choice in enumerate(choices):
+            carrom.restore(state)
+            if permit_orientation:
+                carrom.rotate_carrom_men(choice[3])
+            result.apply(carrom, index)
+            carrom.apply_rules()
+            yield carrom
+    finally:
+        carrom.restore(state)
+
+
 def simulate_carrom(carrom_: Carrom, dt, decelerate, e):
-    """ Simulate the carrom and return the performance score """
+    """ Simulate the carrom and return the performance score, the shot is settled as soon as its outcome is decided
+    (the final positions of the coins are not needed to score it) """
     player = carrom_.player_turn
-    while carrom_.check_moving():
-        carrom_.update(dt, decelerate, e)
+    carrom_.simulate(dt, decelerate, e, settle=True)
     carrom_.apply_rules()
     return carrom_score(player, carrom_)
 
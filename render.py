@@ -0,0 +1,111 @@
+import pygame
+from math import radians
+from board import Board
+
+""" Rendering of the carrom with pygame, kept apart from the simulation so that coin.py, board.py and carrom.py
+can be used without pygame """
+
+
+def draw_coin(win, coin):
+    """ Draws the coin (carrom men, queen or striker) at its position """
+    pygame.draw.circle(win, coin.color, (int(coin.position.x), int(coin.position.y)), int(coin.radius))
+
+
+def draw_board(win, board: Board):
+    """ This function is called to draw the carrom board and its components on the given window"""
+    """ Draw the board and the frame """
+    pygame.draw.rect(win, (100, 0, 0), tuple(board.board))
+    pygame.draw.rect(win, (128, 100, 100), tuple(board.container))
+    """ Draw the pockets """
+    for pocket_center in board.pocket_centers:
+        pygame.draw.circle(win, (128, 128, 128), (int(pocket_center.x), int(pocket_center.y)),
+                           int(board.pocket_radius))
+    """ Draw the base lines """
+    for index, base_line in enumerate(board.base_lines):
+        pygame.draw.line(win, (100, 50, 50), base_line[0], base_line[1], 3 if index % 2 == 0 else 1)
+    """ Draw the base circles """
+
+    for base_circle_center in board.base_circle_centers:
+        pygame.draw.circle(win, (100, 50, 50), base_circle_center, int(board.base_radius), 1)
+        pygame.draw.circle(win, (100, 50, 50), base_circle_center, int(board.base_inner_radius))
+    """ Draw the center circles """
+
+    pygame.draw.circle(win, (100, 50, 50), board.container.center, int(board.center_outer_radius), 2)
+    pygame.draw.circle(win, (100, 50, 50), board.container.center, int(board.center_inner_radius))
+    """ Draw the arrow lines """
+    for arrow_line in board.arrow_lines:
+        pygame.draw.line(win, (100, 50, 50), arrow_line[0], arrow_line[1])
+
+    """ Draw the arrow arcs """
+    for arrow_arc in board.arrow_arcs:
+        arrow_box = pygame.Rect(tuple(arrow_arc[0]))
+        arrow_box.normalize()
+        pygame.draw.arc(win, (100, 50, 50), arrow_box, arrow_arc[1], arrow_arc[2], 2)
+
+
+def draw_captured_coins(win, board: Board, player, captured_coins):
+    """ This function draws the captured coins of the player on the frame """
+    for index, coin in enumerate(captured_coins):
+        x_offset = int(board.m * (Board.FRAME_LENGTH + index * Board.COIN_RADIUS * 3))
+        y_offset = int(board.board.bottom - 2 * board.coin_radius) if player == 0 else \
+            int(board.board.top + 2 * board.coin_radius)
+        pygame.draw.circle(win, coin.color, (x_offset, y_offset), int(board.coin_radius))
+
+
+def show_notification(win, board: Board, message: str):
+    """ Function to display notification, draws at the bottom end"""
+    font_size = board.frame_width // 3
+    font = pygame.font.Font('freesansbold.ttf', font_size)
+    text = font.render(message, True, (0, 0, 0))
+    text_rect = text.get_rect()
+    text_rect.center = (board.board.right - board.frame_width - text_rect.width,
+                        board.board.bottom - board.frame_width // 2)
+    win.blit(text, text_rect)
+
+
+def draw_striker_arrow_pointer(win, board: Board, striker, max_speed, draw_arrow=True):
+    """ Function to draw the speed and angle indication of the striker """
+    striker_center = striker.position
+    if not draw_arrow:
+        """ Draw a simple line, from striker along orientation of velocity """
+        arrow_position = striker_center + striker.velocity * board.container.width / (3 * max_speed)
+        pygame.draw.line(win, (0, 0, 0), (int(striker_center.x), int(striker_center.y)),
+                         (int(arrow_position.x), int(arrow_position.y)))
+    else:
+        """ Draw a arrow """
+        velocity_indicator = striker.velocity * board.container.width / (3 * max_speed)
+        v_length = velocity_indicator.length()
+        """ Added a length greater than 1 to prevent draw arc from throwing an exception """
+        if v_length > 3:
+            arrow_box = pygame.Rect(int(striker_center.x - v_length), int(striker_center.y - v_length),
+                                    int(2 * v_length), int(2 * v_length))
+            pygame.draw.arc(win, (255, 100, 0), arrow_box,
+                            radians(velocity_indicator.angle_to((1, 0)) - 30),
+                            radians(velocity_indicator.angle_to((1, 0)) + 30), 1)
+            position_1 = striker_center + velocity_indicator * 1.1
+            position_2 = striker_center + velocity_indicator * 0.2
+            pygame.draw.line(win, (255, 100, 0), (int(position_1.x), int(position_1.y)),
+                             (int(position_2.x), int(position_2.y)))
+
+
+def draw_carrom(win, carrom):
+    """ Draws all board with all the coins on the board and those that were captured """
+    carrom.sync()
+    draw_board(win, carrom.board)
+    """ Draw the coins (including striker and queen) on the board """
+    coins = carrom.player_coins[0] + carrom.player_coins[1]
+    if not carrom.pocketed_striker:
+        coins.append(carrom.striker)
+    if not carrom.pocketed_queen:
+        coins.append(carrom.queen)
+    for coin in coins:
+        draw_coin(win, coin)
+    """ Draw the captured coins """
+    captured_coins_0 = carrom.pocketed_coins[0].copy()
+    if carrom.has_queen[0]:
+        captured_coins_0.append(carrom.queen)
+    captured_coins_1 = carrom.pocketed_coins[1].copy()
+    if carrom.has_queen[1]:
+        captured_coins_1.append(carrom.queen)
+    draw_captured_coins(win, carrom.board, 0, captured_coins_0)
+    draw_captured_coins(win, carrom.board, 1, captured_coins_1)
@@ -0,0 +1,75 @@
+import multiprocessing
+from geometry import Rect
+
+""" Parallel rollouts, candidate shots are simulated by a persistent pool of worker processes. Each worker builds its
+own carrom once, for every turn only the snapshot of the carrom (a few tuples of numbers) is sent, once with each
+chunk of candidates, and the scores come back in the order of the candidates. The candidates are drawn by the caller,
+so the decision is the same for any number of workers. """
+
+""" Carrom of the worker process, created by the pool initializer, the state of each turn is restored on it """
+worker_carrom = None
+
+
+def init_worker(config):
+    """ Creates the carrom of the worker with the same board and engine as the carrom of the game """
+    global worker_carrom
+    from carrom import Carrom
+    board_rect, engine, fast_forward, tolerance, quantize_bits = config
+    worker_carrom = Carrom(Rect(board_rect), engine=engine, fast_forward=fast_forward, tolerance=tolerance,
+                           quantize_bits=quantize_bits)
+
+
+def evaluate_chunk(state, choices, permit_orientation, dt, decelerate, e):
+    """ Returns the scores of the choices, simulated from the given state on the carrom of the worker """
+    from random_ai import evaluate_choice
+    return [evaluate_choice(worker_carrom, state, choice, permit_orientation, dt, decelerate, e) for choice in choices]
+
+
+def get_config(carrom):
+    """ Parameters needed to create an equivalent carrom in the workers """
+    tolerance = carrom.stepper.tolerance if carrom.stepper is not None else None
+    return tuple(carrom.board.board), carrom.engine, carrom.fast_forward, tolerance, carrom.quantize_bits
+
+
+class RolloutPool:
+    """ Pool of worker processes, each holding a carrom with the given config """
+    def __init__(self, config, workers):
+        self.config = config
+        self.workers = workers
+        """ Fork (where available) so that the workers don't import the main script, which may not be guarded """
+        start_method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else None
+        self.pool = multiprocessing.get_context(start_method).Pool(workers, init_worker, (config,))
+
+    def evaluate(self, state, choices, permit_orientation, dt, decelerate, e, poll=None):
+        """ Returns the scores of the choices simulated from the state, the choices are split into one contiguous
+        chunk per worker, poll (if given) is called periodically while waiting """
+        size = max(1, -(-len(choices) // self.workers))
+        results = [self.pool.apply_async(evaluate_chunk, (state, choices[start:start + size], permit_orientation,
+                                                          dt, decelerate, e))
+                   for start in range(0, len(choices), size)]
+        scores = []
+        for result in results:
+            while poll is not None and not result.ready():
+                poll()
+                result.wait(0.02)
+            scores += result.get()
+        return scores
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+
+
+""" Pool shared by the turns of a game, recreated if the carrom config or the number of workers changes """
+pool = None
+
+
+def get_pool(carrom, workers):
+    """ Returns the persistent pool for the carrom with the given number of workers """
+    global pool
+    config = get_config(carrom)
+    if pool is None or pool.config != config or pool.workers != workers:
+        if pool is not None:
+            pool.close()
+        pool = RolloutPool(config, workers)
+    return pool
@@ -1,5 +1,6 @@
 import pygame
 from board import Board
+from render import draw_board
 from pygame import Rect
 
 
@@ -42,6 +43,8 @@ def start_window(width, fps=60):
         ai_button_1_rect =  Rect(width * 2 // 10, width * 5 // 10, width * 2 // 10, width // 10)
         random_button_1 = create_button(width // 5, width // 10, "Random", chosen[0] == "random")
         random_button_1_rect = Rect(width * 2 // 10, width * 6 // 10, width * 2 // 10, width // 10)
+        mcts_button_1 = create_button(width // 5, width // 10, "MCTS", chosen[0] == "mcts")
+        mcts_button_1_rect = Rect(width * 2 // 10, width * 7 // 10, width * 2 // 10, width // 10)
 
         human_button_2 = create_button(width // 5, width // 10, "Human", chosen[1] == "human")
         human_button_2_rect = Rect(width * 6 // 10, width * 4 // 10, width * 2 // 10, width // 10)
@@ -49,17 +52,21 @@ def start_window(width, fps=60):
         ai_button_2_rect = Rect(width * 6 // 10, width * 5 // 10, width * 2 // 10, width // 10)
         random_button_2 = create_button(width // 5, width // 10, "Random", chosen[1] == "random")
         random_button_2_rect =  Rect(width * 6 // 10, width * 6 // 10, width * 2 // 10, width // 10)
+        mcts_button_2 = create_button(width // 5, width // 10, "MCTS", chosen[1] == "mcts")
+        mcts_button_2_rect = Rect(width * 6 // 10, width * 7 // 10, width * 2 // 10, width // 10)
 
         play_button = create_button(width * 4 // 10, width // 10, "Play")
-        play_button_rect = Rect(width * 3 // 10, width * 8 // 10, width * 4 // 10, width // 10)
+        play_button_rect = Rect(width * 3 // 10, width * 17 // 20, width * 4 // 10, width // 10)
 
-        board.draw(win)
+        draw_board(win, board)
         win.blit(human_button_1, human_button_1_rect)
         win.blit(ai_button_1, ai_button_1_rect)
         win.blit(random_button_1, random_button_1_rect)
+        win.blit(mcts_button_1, mcts_button_1_rect)
         win.blit(human_button_2, human_button_2_rect)
         win.blit(ai_button_2, ai_button_2_rect)
         win.blit(random_button_2, random_button_2_rect)
+        win.blit(mcts_button_2, mcts_button_2_rect)
         win.blit(play_button, play_button_rect)
         draw_text(win, "V/S", width//20, (width//2, width*11//20), (255, 255, 0))
         draw_text(win, "PyCarrom", width//10, (width//2, width*2//10))
@@ -80,6 +87,8 @@ def start_window(width, fps=60):
                     chosen[0] = "ai"
                 elif random_button_1_rect.collidepoint(*mouse_pos):
                     chosen[0] = "random"
+                elif mcts_button_1_rect.collidepoint(*mouse_pos):
+                    chosen[0] = "mcts"
 
                 if human_button_2_rect.collidepoint(*mouse_pos):
                     chosen[1] = "human"
@@ -87,6 +96,8 @@ def start_window(width, fps=60):
                     chosen[1] = "ai"
                 elif random_button_2_rect.collidepoint(*mouse_pos):
                     chosen[1] = "random"
+                elif mcts_button_2_rect.collidepoint(*mouse_pos):
+                    chosen[1] = "mcts"
 
                 if play_button_rect.collidepoint(*mouse_pos):
                     run = False
@@ -0,0 +1,95 @@
+from math import sqrt
+from broadphase import SpatialHash
+
+""" Smallest step, as a fraction of the duration of an update, so that coins resting in contact can't stall the
+simulation """
+MIN_STEP_FRACTION = 1 / 64
+""" Longest step, as a multiple of the duration of an update, taken when everything is far apart """
+MAX_STEP_GROWTH = 4
+
+
+class AdaptiveStepper:
+    """ Proceeds the simulation of the carrom with steps of varying length. A step is shortened so that no two coins
+    approaching each other, and no coin approaching a pocket, move closer by more than their gap plus the tolerance,
+    so collisions are detected with an overlap of at most about tolerance, and coins don't step over a pocket.
+    When everything is far apart, steps grow up to MAX_STEP_GROWTH times the duration of an update, but no further
+    than the first contact of a coin with a wall, so that a coin can't rebound into another unchecked. Within a
+    single update walls don't need shorter steps, since the reflection with the walls is exact for any step """
+    def __init__(self, carrom, tolerance):
+        assert tolerance > 0
+        self.carrom = carrom
+        self.tolerance = tolerance
+        """ Number of steps taken so far """
+        self.num_steps = 0
+        """ Time by which the simulation is ahead of the updates, after a step longer than the update """
+        self.ahead = 0.0
+
+    def get_wall_time(self, moving):
+        """ Time till the first of the moving coins touches a wall, at their current velocities """
+        container = self.carrom.board.container
+        wall_time = float('inf')
+        for coin in moving:
+            x, y, vx, vy, radius = coin.position.x, coin.position.y, coin.velocity.x, coin.velocity.y, coin.radius
+            if vx:
+                wall_time = min(wall_time, ((container.right - radius - x) if vx > 0 else
+                                            (container.left + radius - x)) / vx)
+            if vy:
+                wall_time = min(wall_time, ((container.bottom - radius - y) if vy > 0 else
+                                            (container.top + radius - y)) / vy)
+        return wall_time
+
+    def get_dt(self, base_dt):
+        """ Returns the length of the next step, at most MAX_STEP_GROWTH times base_dt """
+        carrom, tolerance = self.carrom, self.tolerance
+        coins = carrom.get_simulation_coins()
+        moving = [coin for coin in (coins if carrom.awake_coins is None else carrom.awake_coins) if coin.check_moving()]
+        if not moving:
+            return base_dt
+        speeds = [coin.velocity.length() for coin in moving]
+        max_speed = max(speeds)
+        dt = max(base_dt, min(base_dt * MAX_STEP_GROWTH, self.get_wall_time(moving)))
+        """ Only the coins which can be reached within the step shorten it, the grid finds them """
+        margin = 2 * max_speed * dt
+        grid = SpatialHash(coins, 2 * max(coin.radius for coin in coins) + margin)
+        index = {id(coin): index for index, coin in enumerate(coins)}
+        moving_indices = {index[id(coin)] for coin in moving}
+        for coin, speed in zip(moving, speeds):
+            coin_index = index[id(coin)]
+            x, y, vx, vy, radius = coin.position.x, coin.position.y, coin.velocity.x, coin.velocity.y, coin.radius
+            for other_index in grid.neighbours(coin_index, margin):
+                if other_index < coin_index and other_index in moving_indices:
+                    """ A pair of moving coins which was already checked """
+                    continue
+                other = coins[other_index]
+                dx, dy = other.position.x - x, other.position.y - y
+                relative_x, relative_y = vx - other.velocity.x, vy - other.velocity.y
+                if relative_x * dx + relative_y * dy <= 0:
+                    """ Not approaching each other """
+                    continue
+                gap = sqrt(dx * dx + dy * dy) - radius - other.radius
+                closing_speed = sqrt(relative_x * relative_x + relative_y * relative_y)
+                if gap + tolerance < closing_speed * dt:
+                    dt = (max(gap, 0.0) + tolerance) / closing_speed
+            for center in carrom.board.pocket_centers:
+                dx, dy = center.x - x, center.y - y
+                gap = sqrt(dx * dx + dy * dy) - (carrom.board.pocket_radius - radius)
+                if gap + tolerance < speed * dt:
+                    dt = (max(gap, 0.0) + tolerance) / speed
+        return max(dt, base_dt * MIN_STEP_FRACTION)
+
+    def advance(self, duration, decelerate, e):
+        """ Proceeds the simulation by the given duration (or till all the coins stop moving), returns the number of
+        steps taken. The time a step goes beyond the duration is carried over, the following updates don't step
+        till the simulation is no longer ahead of them """
+        carrom = self.carrom
+        carrom.sync()
+        elapsed, num_steps = self.ahead, 0
+        while elapsed < duration * (1 - 1e-9) and carrom.check_moving():
+            dt = self.get_dt(duration)
+            carrom.step(dt, decelerate, e)
+            carrom.sync()
+            elapsed += dt
+            num_steps += 1
+        self.ahead = max(0.0, elapsed - duration) if carrom.check_moving() else 0.0
+        self.num_steps += num_steps
+        return num_steps
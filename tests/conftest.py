@@ -0,0 +1,7 @@
+import logging
+import os
+import sys
+
+""" The modules of the game live at the root of the repository """
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+logging.disable(logging.WARNING)
@@ -0,0 +1,71 @@
+from carrom import Carrom
+from geometry import Rect
+from anytime import heuristic_decisions, random_decisions, cross_entropy_decisions, mcts_decisions, \
+    lookahead_decisions, play
+from ai import get_shots
+from random import Random
+from time import perf_counter
+import rollout_pool
+import pytest
+
+""" Decisions cut short after any of their steps depend only on the rng given to them, and are cut short at the
+deadline whatever the player """
+
+MAX_ANGLE, MAX_SPEED, DECELERATE, E, DT = 80, 40, 0.3, 0.9, 0.1
+""" Budget of a turn, and how far beyond it a decision may end (a step of the slowest player, or starting the
+rollout pool), each of the players below needs many seconds to run to completion """
+TIME_BUDGET, SLACK = 0.1, 1.5
+
+
+@pytest.fixture
+def carrom():
+    carrom = Carrom(Rect(0, 0, 700, 700))
+    carrom.striker.position = carrom.board.get_striker_position(carrom.player_turn)
+    return carrom
+
+
+@pytest.mark.parametrize('decisions', [heuristic_decisions, random_decisions, cross_entropy_decisions])
+def test_first_decision_seeded(carrom, decisions):
+    first = []
+    for _ in range(2):
+        generator = decisions(carrom, MAX_ANGLE, MAX_SPEED, DECELERATE, E, DT, rng=Random(5))
+        first.append(next(generator))
+        generator.close()
+    assert first[0] == first[1]
+
+
+def test_first_heuristic_shot(carrom):
+    """ The first decision of the heuristic ai is its first shot, not a random one """
+    shot = next(get_shots(carrom, MAX_ANGLE, MAX_SPEED, DECELERATE, E, DT))
+    decisions = heuristic_decisions(carrom, MAX_ANGLE, MAX_SPEED, DECELERATE, E, DT, verify=10)
+    assert next(decisions) == ((shot[1].x, shot[3], shot[2], None), None)
+    decisions.close()
+
+
+PLAYERS = {
+    'ai': lambda args: heuristic_decisions(*args, verify=1000),
+    'random': lambda args: random_decisions(*args, rng=Random(1)),
+    'random batch': lambda args: random_decisions(*args, rng=Random(1), batch=True),
+    'random workers': lambda args: random_decisions(*args, rng=Random(1), workers=2),
+    'random variants': lambda args: random_decisions(*args, rng=Random(1), variants=4, risk=0.5),
+    'cross entropy batch': lambda args: cross_entropy_decisions(*args, num_choices=10000, iterations=10,
+                                                                rng=Random(1), batch=True),
+    'mcts': lambda args: mcts_decisions(*args, rng=Random(1)),
+    'lookahead': lambda args: lookahead_decisions(*args, rng=Random(1), num_choices=200, width=50),
+}
+
+
+@pytest.mark.parametrize('player', PLAYERS)
+def test_time_budget(carrom, player):
+    state = carrom.snapshot()
+    start = perf_counter()
+    try:
+        choice, _ = play(carrom, PLAYERS[player]((carrom, MAX_ANGLE, MAX_SPEED, DECELERATE, E, DT)), TIME_BUDGET)
+    finally:
+        if rollout_pool.pool is not None:
+            rollout_pool.pool.close()
+            rollout_pool.pool = None
+    assert perf_counter() - start < TIME_BUDGET + SLACK
+    assert choice is not None and carrom.striker.velocity.length() > 0
+    carrom.striker.velocity.update(0, 0)
+    assert carrom.snapshot()._replace(positions=None) == state._replace(positions=None)
@@ -0,0 +1,70 @@
+from carrom import Carrom
+from geometry import Rect, Vector2
+from batch import simulate_batch
+from random_ai import get_choices, set_choice
+from random import Random
+import pytest
+
+""" Every board of a batch has the same outcome as the shot simulated alone with the object engine: the same coins
+pocketed in the same order, the same pocketed striker and queen and the same first collision """
+
+DT, DECELERATE, E = 0.1, 0.3, 0.9
+MAX_ANGLE, MAX_SPEED = 80, 40
+
+
+def get_shots(carrom: Carrom, choices, permit_orientation):
+    """ Choices of the random ai as shots of simulate_batch """
+    y_position = carrom.board.get_striker_y_position(carrom.player_turn)
+    shots = []
+    for x_position, striker_angle, striker_speed, orientation in choices:
+        velocity = Vector2()
+        velocity.from_polar((striker_speed, striker_angle))
+        shots.append(((x_position, y_position), velocity, orientation if permit_orientation else None))
+    return shots
+
+
+def get_outcome(carrom: Carrom, state, shot):
+    """ Simulates the shot alone from the state with the object engine """
+    carrom.restore(state)
+    position, velocity, orientation = shot
+    if orientation is not None:
+        carrom.rotate_carrom_men(orientation)
+    carrom.striker.position, carrom.striker.velocity = Vector2(position), Vector2(velocity)
+    carrom.simulate(DT, DECELERATE, E)
+    return list(carrom.current_pocketed), carrom.pocketed_striker, carrom.pocketed_queen, carrom.first_collision
+
+
+def assert_equivalent(carrom, shots):
+    state = carrom.snapshot()
+    result = simulate_batch(carrom, shots, DT, DECELERATE, E)
+    assert carrom.snapshot() == state
+    for board, shot in enumerate(shots):
+        batch_outcome = result.get_outcome(board)
+        pocketed, pocketed_striker, pocketed_queen, first_collision = get_outcome(carrom, state, shot)
+        assert batch_outcome.pocketed == pocketed
+        assert (batch_outcome.pocketed_striker, batch_outcome.pocketed_queen) == (pocketed_striker, pocketed_queen)
+        assert batch_outcome.first_collision == first_collision
+    carrom.restore(state)
+
+
+@pytest.mark.parametrize('permit_orientation', [False, True])
+def test_opening(permit_orientation):
+    """ Opening shots, with the carrom men rotated by each board if permitted """
+    carrom = Carrom(Rect(0, 0, 700, 700))
+    carrom.striker.position = carrom.board.get_striker_position(carrom.player_turn)
+    choices = get_choices(carrom, MAX_ANGLE, MAX_SPEED, 24, Random(2))
+    assert_equivalent(carrom, get_shots(carrom, choices, permit_orientation))
+
+
+def test_random_boards():
+    """ Shots from boards reached by random shots """
+    carrom = Carrom(Rect(0, 0, 700, 700))
+    rng = Random(4)
+    for _ in range(6):
+        if carrom.game_over:
+            break
+        carrom.striker.position = carrom.board.get_striker_position(carrom.player_turn)
+        assert_equivalent(carrom, get_shots(carrom, get_choices(carrom, MAX_ANGLE, MAX_SPEED, 12, rng), False))
+        set_choice(carrom, get_choices(carrom, MAX_ANGLE, MAX_SPEED, 1, rng)[0][:3] + (None,), False)
+        carrom.simulate(DT, DECELERATE, E)
+        carrom.apply_rules()
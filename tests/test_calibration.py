@@ -0,0 +1,39 @@
+from board import Board
+from coin import Coin
+from geometry import Rect, Vector2
+from calibration import Calibration, get_calibration, TABLE_SPEED_FACTOR
+import logging
+
+""" The calibration tables against the stepped motion of a coin, and their range """
+
+DT, DECELERATE, E = 0.1, 0.3, 0.9
+
+
+def travel(board, speed):
+    """ Distance a coin travels from the speed under Coin.update """
+    coin = Coin(board.coin_radius, board.COIN_MASS, Vector2(0, 0), Rect(-1e9, -1e9, 2e9, 2e9))
+    coin.velocity = Vector2(speed, 0)
+    while coin.check_moving():
+        coin.update(DT, DECELERATE)
+    return coin.position.x
+
+
+def test_speed_for_distance():
+    board = Board(Rect(0, 0, 700, 700))
+    calibration = get_calibration(board, DT, DECELERATE, E)
+    for distance in (5.0, 50.0, 300.0, 900.0):
+        speed = calibration.get_speed(distance)
+        assert abs(travel(board, speed) - distance) < speed * DT
+    assert calibration.out_of_range == 0
+
+
+def test_table_range(caplog):
+    board = Board(Rect(0, 0, 700, 700))
+    calibration = get_calibration(board, DT, DECELERATE, E, max_speed=100)
+    assert calibration.speeds[-1] >= TABLE_SPEED_FACTOR * 100
+    calibration.get_distance(300)
+    assert calibration.out_of_range == 0
+    small = Calibration(board, DT, DECELERATE, E, max_speed=50.0)
+    with caplog.at_level(logging.WARNING):
+        small.get_speed(small.distances[-1] + 100)
+    assert small.out_of_range == 1 and "beyond the table" in caplog.text
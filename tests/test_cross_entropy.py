@@ -0,0 +1,50 @@
+from carrom import Carrom
+from geometry import Rect
+from random_ai import CrossEntropy
+from anytime import cross_entropy_decisions
+from random import Random
+from math import sqrt
+
+""" The cross entropy search narrows its distribution around the best choices, and never loses its best choice """
+
+DT, DECELERATE, E = 0.1, 0.3, 0.9
+MAX_ANGLE, MAX_SPEED = 80, 40
+ITERATIONS, BATCH_SIZE = 8, 40
+
+
+def test_narrows():
+    """ Smooth score with its best at a known choice, the deviations (as fractions of the ranges) shrink from those of
+    the uniform first batch and the best of the later batches beats the best of the first """
+    search = CrossEntropy(Carrom(Rect(0, 0, 700, 700)), MAX_ANGLE, MAX_SPEED, rng=Random(0))
+    limits = search.limits
+    target = (limits[0][0] + 0.3 * (limits[0][1] - limits[0][0]), 10.0, 30.0, 100.0)
+
+    def score(choice):
+        parameters = search.get_parameters(choice)
+        distance = sum(((value - best) / (high - low)) ** 2
+                       for value, best, (low, high) in zip(parameters[:3], target[:3], limits[:3]))
+        return -distance - (((parameters[3] - target[3] + 60) % 120 - 60) / 120) ** 2
+
+    max_scores, stds = [], []
+    for _ in range(ITERATIONS):
+        choices = search.sample(BATCH_SIZE)
+        scores = [score(choice) for choice in choices]
+        search.update(choices, scores)
+        max_scores.append(max(scores))
+        stds.append([std / (high - low) for std, (low, high) in zip(search.stds, limits)])
+    uniform = 1 / sqrt(12)
+    assert all(std < uniform / 5 for std in stds[-1])
+    for index in range(len(limits)):
+        assert max(iteration_stds[index] for iteration_stds in stds[3:]) < stds[0][index] < uniform
+    assert min(max_scores[ITERATIONS // 2:]) > max_scores[0]
+
+
+def test_best_kept():
+    """ Opening board, the best score yielded never decreases over the iterations """
+    carrom = Carrom(Rect(0, 0, 700, 700))
+    carrom.striker.position = carrom.board.get_striker_position(carrom.player_turn)
+    state = carrom.snapshot()
+    scores = [score for _, score in cross_entropy_decisions(carrom, MAX_ANGLE, MAX_SPEED, DECELERATE, E, DT,
+                                                            num_choices=32, iterations=4, rng=Random(1))]
+    assert len(scores) == 32 and scores == sorted(scores)
+    assert carrom.snapshot() == state
@@ -0,0 +1,31 @@
+from carrom import Carrom
+from geometry import Rect
+from decision_cache import DecisionCache
+import pickle
+
+""" Cached decisions are only served for the same board and simulation config, also after a save and load """
+
+CHOICE = (300.0, -90.0, 30.0, None)
+
+
+def test_config_in_key():
+    cache = DecisionCache()
+    carrom = Carrom(Rect(0, 0, 700, 700))
+    cache.put(cache.get_key(carrom, 'random', (80, 40)), CHOICE)
+    assert cache.get(cache.get_key(Carrom(Rect(0, 0, 700, 700)), 'random', (80, 40))) == CHOICE
+    for other in (Carrom(Rect(0, 0, 700, 700), engine='numpy'), Carrom(Rect(0, 0, 700, 700), tolerance=0.25),
+                  Carrom(Rect(0, 0, 800, 800))):
+        assert cache.get(cache.get_key(other, 'random', (80, 40))) is None
+
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / 'cache.pkl')
+    cache = DecisionCache(path=path)
+    carrom = Carrom(Rect(0, 0, 700, 700))
+    cache.put(cache.get_key(carrom, 'ai', ()), CHOICE)
+    cache.save()
+    assert DecisionCache(path=path).get(cache.get_key(carrom, 'ai', ())) == CHOICE
+    """ Files of earlier versions have keys without the config, they are ignored """
+    with open(path, 'wb') as file:
+        pickle.dump({'quantum': 1.0, 'entries': [(('ai', (), ()), CHOICE)]}, file)
+    assert len(DecisionCache(path=path)) == 0
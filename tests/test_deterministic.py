@@ -0,0 +1,59 @@
+from carrom import Carrom
+from geometry import Rect
+from deterministic import replay, state_hash
+from random import Random
+import subprocess
+import sys
+import os
+import pytest
+
+""" The deterministic engine gives the same states, bit for bit, for the same shots: in the same process, in another
+process, and with the positions and velocities quantized """
+
+DT, DECELERATE, E = 0.1, 0.3, 0.9
+NUM_SHOTS = 8
+
+
+def record(quantize_bits):
+    """ Plays random shots (numbers only, no trigonometry) from the opening, returns the shots, the state hash after
+    each of them and the hashes of the steps of the last shot """
+    carrom = Carrom(Rect(0, 0, 700, 700), engine='deterministic', quantize_bits=quantize_bits)
+    rng = Random(9)
+    shots, hashes = [], []
+    for index in range(NUM_SHOTS):
+        x_limits = carrom.board.get_striker_x_limits()
+        position = (rng.uniform(*x_limits), carrom.board.get_striker_y_position(carrom.player_turn))
+        velocity = (rng.uniform(-15, 15), rng.uniform(20, 35) * (-1 if carrom.player_turn == 0 else 1))
+        shots.append((position, velocity, 30 if index == 0 else None))
+        hashes += replay(carrom, shots[-1:], DT, DECELERATE, E)
+    return shots, hashes, list(carrom.physics.hashes)
+
+
+def replay_shots(shots, quantize_bits):
+    carrom = Carrom(Rect(0, 0, 700, 700), engine='deterministic', quantize_bits=quantize_bits)
+    return replay(carrom, shots, DT, DECELERATE, E), list(carrom.physics.hashes)
+
+
+@pytest.mark.parametrize('quantize_bits', [None, 16])
+def test_replay(quantize_bits):
+    shots, hashes, step_hashes = record(quantize_bits)
+    assert len(set(hashes)) == NUM_SHOTS and step_hashes
+    assert replay_shots(shots, quantize_bits) == (hashes, step_hashes)
+    """ Replayed in another process, which has its own string hash seed """
+    script = 'import sys; sys.path.insert(0, %r); import logging; logging.disable(logging.WARNING); ' \
+             'from tests.test_deterministic import replay_shots; print(replay_shots(%r, %r))' % \
+             (os.path.dirname(os.path.dirname(os.path.abspath(__file__))), shots, quantize_bits)
+    output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True,
+                            env=dict(os.environ, PYTHONHASHSEED='123')).stdout
+    assert output.strip().splitlines()[-1] == repr((hashes, step_hashes))
+
+
+def test_quantized():
+    """ Positions and velocities of the simulated coins are multiples of the quantum at the end of the shot """
+    shots, hashes, _ = record(16)
+    carrom = Carrom(Rect(0, 0, 700, 700), engine='deterministic', quantize_bits=16)
+    replay(carrom, shots, DT, DECELERATE, E)
+    assert state_hash(carrom) == hashes[-1]
+    for values in carrom.physics.state:
+        for value in values:
+            assert value * 2 ** 16 == int(value * 2 ** 16)
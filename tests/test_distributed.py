@@ -0,0 +1,117 @@
+from carrom import Carrom
+from geometry import Rect
+from distributed import Coordinator, RemoteRolloutPool, start_workers
+from rollout_pool import RolloutPool, get_config
+from random_ai import get_choices, ai
+from anytime import random_decisions, cross_entropy_decisions
+from random import Random
+import pytest
+import socket
+
+""" The distributed mode on localhost, with several worker processes of which one is lost during the run, and the
+random ai simulating its choices on the workers """
+
+DT, DECELERATE, E = 0.1, 0.3, 0.9
+
+
+@pytest.fixture
+def carrom():
+    carrom = Carrom(Rect(0, 0, 700, 700))
+    carrom.striker.position = carrom.board.get_striker_position(carrom.player_turn)
+    return carrom
+
+
+def test_worker_lost(carrom):
+    """ One of three workers is killed once the first results are in, its jobs are handed out again and the scores
+    are the same as of the local pool, in the order of the choices """
+    choices = [choice[:3] + (None,) for choice in get_choices(carrom, 80, 40, 24, Random(3))]
+    state = carrom.snapshot()
+    pool = RolloutPool(get_config(carrom), 2)
+    try:
+        expected = pool.evaluate(state, choices, False, DT, DECELERATE, E)
+    finally:
+        pool.close()
+    coordinator = Coordinator('127.0.0.1', 0, worker_timeout=10.0)
+    workers = start_workers('127.0.0.1', coordinator.address[1], 3)
+    try:
+        assert coordinator.wait_for_workers(3, 10.0)
+
+        def poll():
+            if coordinator.results and workers[0].is_alive():
+                workers[0].kill()
+        scores = RemoteRolloutPool(coordinator, get_config(carrom), chunk_size=2).evaluate(
+            state, choices, False, DT, DECELERATE, E, poll)
+        assert not workers[0].is_alive()
+        assert sum(coordinator.failures.values()) >= 1
+    finally:
+        coordinator.close()
+        for worker in workers:
+            worker.join(10.0)
+            worker.kill()
+    assert scores == expected
+
+
+def test_random_ai(carrom):
+    """ The random searches decide the same on the workers of the coordinator as on the carrom itself """
+    state = carrom.snapshot()
+    expected = [ai(carrom, 80, 40, DECELERATE, E, DT, num_choices=12, seed=4),
+                list(random_decisions(carrom, 80, 40, DECELERATE, E, DT, num_choices=24, rng=Random(4)))[-1],
+                list(cross_entropy_decisions(carrom, 80, 40, DECELERATE, E, DT, num_choices=24, rng=Random(4)))[-1]]
+    carrom.restore(state)
+    coordinator = Coordinator('127.0.0.1', 0, worker_timeout=10.0)
+    workers = start_workers('127.0.0.1', coordinator.address[1], 2)
+    try:
+        assert coordinator.wait_for_workers(2, 10.0)
+        decisions = [ai(carrom, 80, 40, DECELERATE, E, DT, num_choices=12, seed=4, coordinator=coordinator),
+                     list(random_decisions(carrom, 80, 40, DECELERATE, E, DT, num_choices=24, rng=Random(4),
+                                           coordinator=coordinator))[-1],
+                     list(cross_entropy_decisions(carrom, 80, 40, DECELERATE, E, DT, num_choices=24, rng=Random(4),
+                                                  coordinator=coordinator))[-1]]
+        """ A run for the ai, for each chunk of the random decisions (a job per worker) and for each iteration of
+        the cross entropy search """
+        assert coordinator.generation == 1 + 2 + 4
+    finally:
+        coordinator.close()
+        for worker in workers:
+            worker.join(10.0)
+            worker.kill()
+    assert decisions == expected
+
+
+def test_no_workers():
+    """ A run without workers fails instead of waiting forever """
+    coordinator = Coordinator(worker_timeout=0.5)
+    try:
+        with pytest.raises(RuntimeError, match="No workers"):
+            coordinator.map([('game',)])
+    finally:
+        coordinator.close()
+
+
+def test_all_workers_lost(carrom):
+    """ A run fails once its only worker is lost and no other connects """
+    choices = [choice[:3] + (None,) for choice in get_choices(carrom, 80, 40, 8, Random(3))]
+    coordinator = Coordinator(worker_timeout=0.5)
+    workers = start_workers('127.0.0.1', coordinator.address[1], 1)
+    try:
+        assert coordinator.wait_for_workers(1, 10.0)
+        with pytest.raises(RuntimeError, match="No workers"):
+            RemoteRolloutPool(coordinator, get_config(carrom), chunk_size=1).evaluate(
+                carrom.snapshot(), choices, False, DT, DECELERATE, E, workers[0].kill)
+    finally:
+        coordinator.close()
+        workers[0].join(10.0)
+
+
+def test_timeout():
+    """ A run fails once it took longer than its timeout, with the workers connected """
+    coordinator = Coordinator()
+    """ Connected, but never returns a result """
+    conn = socket.create_connection(coordinator.address)
+    try:
+        assert coordinator.wait_for_workers(1, 10.0)
+        with pytest.raises(RuntimeError, match="Timed out"):
+            coordinator.map([('game',)], timeout=0.5)
+    finally:
+        conn.close()
+        coordinator.close()
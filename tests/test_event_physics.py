@@ -0,0 +1,79 @@
+from carrom import Carrom
+from geometry import Rect, Vector2
+from random import Random
+import pytest
+
+""" The event engine against fine fixed steps, in the well conditioned cases: shots with wall contacts only, and the
+trajectories till shortly after a single contact of two coins. Shots with several contacts of the coins diverge
+between any two models (as between two step sizes), so only these are compared """
+
+DECELERATE, E = 0.3, 0.9
+STEP = 0.001
+TOLERANCE = 1.0
+
+
+def get_board(carrom, queen=True):
+    """ State of the carrom with all the carrom men pocketed, and the queen as well if not queen """
+    state = carrom.snapshot()
+    return state._replace(player_coins=((), ()), pocketed_coins=(tuple(range(0, 18, 2)), tuple(range(1, 18, 2))),
+                          pocketed_queen=not queen)
+
+
+def set_shot(carrom, state, position, velocity):
+    carrom.restore(state)
+    carrom.striker.position = Vector2(position)
+    carrom.striker.velocity = Vector2(velocity)
+    return carrom.snapshot()
+
+
+def run(carrom, state, duration):
+    """ Simulates the state for the duration with fine steps and with the event engine, returns both carroms """
+    event = Carrom(Rect(0, 0, 700, 700), engine='event')
+    event.restore(state)
+    event.update(duration, DECELERATE, E)
+    event.sync()
+    carrom.restore(state)
+    for _ in range(round(duration / STEP)):
+        if not carrom.check_moving():
+            break
+        carrom.update(STEP, DECELERATE, E)
+    return carrom, event
+
+
+@pytest.fixture
+def carrom():
+    return Carrom(Rect(0, 0, 700, 700))
+
+
+def test_walls_only(carrom):
+    """ The striker alone on the board, rebounding from the walls till it stops or gets pocketed """
+    rng = Random(11)
+    board = get_board(carrom, queen=False)
+    for _ in range(8):
+        velocity = Vector2()
+        velocity.from_polar((rng.uniform(10, 40), rng.uniform(0, 360)))
+        state = set_shot(carrom, board, carrom.board.get_striker_position(0), velocity)
+        stepped, event = run(carrom, state, 200.0)
+        assert not stepped.check_moving() and not event.check_moving()
+        assert event.pocketed_striker == stepped.pocketed_striker
+        if not event.pocketed_striker:
+            assert event.striker.position.distance_to(stepped.striker.position) < TOLERANCE
+
+
+def test_single_contact(carrom):
+    """ The striker shot at the queen, both coins are compared till well after the contact """
+    rng = Random(12)
+    board = get_board(carrom)
+    for _ in range(8):
+        carrom.restore(board)
+        position = Vector2(rng.uniform(*carrom.board.get_striker_x_limits()), carrom.board.get_striker_y_position(0))
+        angle = (carrom.queen.position - position).as_polar()[1] + rng.uniform(-5, 5)
+        velocity = Vector2()
+        velocity.from_polar((rng.uniform(30, 40), angle))
+        state = set_shot(carrom, board, position, velocity)
+        stepped, event = run(carrom, state, 20.0)
+        for simulated in (stepped, event):
+            assert {id(coin) for coin in simulated.first_collision or ()} == {id(simulated.striker),
+                                                                               id(simulated.queen)}
+        for coin, other in ((event.striker, stepped.striker), (event.queen, stepped.queen)):
+            assert coin.position.distance_to(other.position) < TOLERANCE
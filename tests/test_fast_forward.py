@@ -0,0 +1,123 @@
+from carrom import Carrom
+from geometry import Rect, Vector2
+from fast_forward import stepped_travel
+from random_ai import get_choices, set_choice
+from random import Random
+import pytest
+
+""" The fast forward must give the same outcome as stepping: the same coins pocketed in the same order, the same
+fouls and the same final positions (up to rounding) """
+
+DT, DECELERATE, E = 0.1, 0.3, 0.9
+MAX_ANGLE, MAX_SPEED = 80, 40
+TOLERANCE = 1e-9
+
+
+def get_outcome(carrom: Carrom, state, fast_forward):
+    """ Simulates the shot set up in the state, returns the outcome and whether it was fast forwarded """
+    carrom.restore(state)
+    carrom.fast_forward = fast_forward
+    calls = []
+    fast_forward_ = carrom.__fast_forward__
+
+    def counted(dt, decelerate):
+        calls.append(dt)
+        fast_forward_(dt, decelerate)
+    carrom.__fast_forward__ = counted
+    try:
+        carrom.simulate(DT, DECELERATE, E)
+    finally:
+        del carrom.__fast_forward__
+        carrom.fast_forward = False
+    coins = carrom.coins + [carrom.queen, carrom.striker]
+    pocketed = [coins.index(coin) for coin in carrom.current_pocketed]
+    pocketed_striker, pocketed_queen = carrom.pocketed_striker, carrom.pocketed_queen
+    carrom.apply_rules()
+    after = carrom.snapshot()
+    return (pocketed, pocketed_striker, pocketed_queen, after.foul_count, after.player_coins, after.pocketed_coins,
+            after.player_turn), after.positions, bool(calls)
+
+
+def assert_equivalent(carrom, state):
+    """ Asserts that the shot has the same outcome with and without the fast forward, returns whether the fast
+    forward was used """
+    stepped, stepped_positions, _ = get_outcome(carrom, state, False)
+    fast, fast_positions, used = get_outcome(carrom, state, True)
+    assert fast == stepped
+    for stepped_position, fast_position in zip(stepped_positions, fast_positions):
+        assert stepped_position == pytest.approx(fast_position, abs=TOLERANCE)
+    return used
+
+
+def striker_shot(carrom, position, velocity):
+    """ State of the opening board with the striker at the position moving with the velocity """
+    carrom.restore(carrom.snapshot())
+    carrom.striker.position = Vector2(position)
+    carrom.striker.velocity = Vector2(velocity)
+    state = carrom.snapshot()
+    carrom.striker.velocity = Vector2()
+    return state
+
+
+def speed_for_travel(travel):
+    """ Speed at which a coin comes to rest after travelling about the given distance """
+    low, high = 0.0, 1000.0
+    for _ in range(60):
+        speed = (low + high) / 2
+        low, high = (speed, high) if stepped_travel(speed, DECELERATE, DT) < travel else (low, speed)
+    return low
+
+
+@pytest.fixture
+def carrom():
+    return Carrom(Rect(0, 0, 700, 700))
+
+
+def test_wall_reflection(carrom):
+    """ Striker shot sideways from the right end of its line, it rebounds from the right wall far from the carrom
+    men, so the whole shot is fast forwarded """
+    x, y = carrom.board.get_striker_x_limits()[1], carrom.board.get_striker_y_position(0)
+    state = striker_shot(carrom, (x, y), (speed_for_travel(150), 0))
+    assert assert_equivalent(carrom, state)
+    carrom.restore(state)
+    carrom.simulate(DT, DECELERATE, E)
+    """ Rebounded, without the wall the striker would have ended 150 to the right, beyond the wall """
+    limit = carrom.board.container.right - carrom.striker.radius
+    assert x + 150 > limit and carrom.striker.position.x < limit - 30 and not carrom.pocketed_striker
+
+
+def test_pocket_on_the_way(carrom):
+    """ Striker shot from the right end of its line towards the nearest pocket, with more than enough speed, gets
+    pocketed while fast forwarded """
+    start = Vector2(carrom.board.get_striker_x_limits()[1], carrom.board.get_striker_y_position(0))
+    pocket = max(carrom.board.pocket_centers, key=lambda center: -start.distance_to(center))
+    direction = (pocket - start).normalize()
+    state = striker_shot(carrom, start, direction * speed_for_travel(start.distance_to(pocket) + 25))
+    assert assert_equivalent(carrom, state)
+    carrom.restore(state)
+    carrom.simulate(DT, DECELERATE, E)
+    assert carrom.pocketed_striker
+
+
+def test_random_shots(carrom):
+    """ Random shots from boards reached by random shots, the fast forward is used in most of them """
+    rng = Random(7)
+    used = 0
+    num_shots = 0
+    for _ in range(4):
+        carrom.restore(Carrom(Rect(0, 0, 700, 700)).snapshot())
+        for _ in range(6):
+            if carrom.game_over:
+                break
+            carrom.striker.position = carrom.board.get_striker_position(carrom.player_turn)
+            state = carrom.snapshot()
+            for choice in get_choices(carrom, MAX_ANGLE, MAX_SPEED, 3, rng):
+                carrom.restore(state)
+                set_choice(carrom, choice[:3] + (None,), False)
+                used += assert_equivalent(carrom, carrom.snapshot())
+                num_shots += 1
+            carrom.restore(state)
+            set_choice(carrom, get_choices(carrom, MAX_ANGLE, MAX_SPEED, 1, rng)[0][:3] + (None,), False)
+            carrom.simulate(DT, DECELERATE, E)
+            carrom.apply_rules()
+    assert used > num_shots // 2
@@ -0,0 +1,52 @@
+from carrom import Carrom
+from geometry import Rect
+from anytime import lookahead_decisions
+from lookahead_ai import Lookahead, ai
+from random import Random
+import pytest
+
+""" Pruning the replies saves nodes without changing the shot found, and the search sets up a shot even when it has
+no shots to search """
+
+MAX_ANGLE, MAX_SPEED, DECELERATE, E, DT = 80, 40, 0.3, 0.9, 0.1
+
+
+@pytest.fixture
+def carrom():
+    carrom = Carrom(Rect(0, 0, 700, 700))
+    carrom.striker.position = carrom.board.get_striker_position(carrom.player_turn)
+    return carrom
+
+
+@pytest.mark.parametrize('seed', [0, 3])
+def test_pruned(carrom, seed):
+    """ Every node skipped by the pruned search is counted as pruned """
+    searches, decisions = [], []
+    for prune in (True, False):
+        search = Lookahead(carrom, MAX_ANGLE, MAX_SPEED, DECELERATE, E, DT, rng=Random(seed), num_choices=12,
+                           width=6, prune=prune)
+        decisions.append(list(search.decisions())[-1])
+        searches.append(search)
+    pruned, unpruned = searches
+    assert decisions[0] == decisions[1]
+    assert unpruned.num_pruned == 0 and pruned.num_pruned > 0
+    assert pruned.num_nodes + pruned.num_pruned == unpruned.num_nodes
+
+
+def test_no_shots(carrom):
+    state = carrom.snapshot()
+    choice, value = ai(carrom, MAX_ANGLE, MAX_SPEED, DECELERATE, E, DT, seed=3, num_choices=0)
+    x_limits = carrom.board.get_striker_x_limits()
+    assert x_limits[0] <= choice[0] <= x_limits[1] and choice[3] is None and value is None
+    assert carrom.striker.velocity.length() > 0
+    carrom.restore(state)
+    decisions = list(lookahead_decisions(carrom, MAX_ANGLE, MAX_SPEED, DECELERATE, E, DT, rng=Random(3),
+                                         num_choices=0))
+    assert decisions == [(choice, None)]
+    assert carrom.snapshot() == state
+
+
+def test_no_width(carrom):
+    """ The best shot by its own score, none of them weighed against the replies """
+    choice, score = ai(carrom, MAX_ANGLE, MAX_SPEED, DECELERATE, E, DT, seed=3, num_choices=6, width=0)
+    assert choice is not None and score is not None and carrom.striker.velocity.length() > 0
@@ -0,0 +1,38 @@
+from carrom import Carrom
+from geometry import Rect
+from anytime import mcts_decisions
+from mcts_ai import MCTS, ai
+from random import Random
+import pytest
+
+""" The search returns a shot even when nothing was expanded at the root """
+
+MAX_ANGLE, MAX_SPEED, DECELERATE, E, DT = 80, 40, 0.3, 0.9, 0.1
+
+
+@pytest.fixture
+def carrom():
+    carrom = Carrom(Rect(0, 0, 700, 700))
+    carrom.striker.position = carrom.board.get_striker_position(carrom.player_turn)
+    return carrom
+
+
+def test_no_iterations(carrom):
+    search = MCTS(carrom, MAX_ANGLE, MAX_SPEED, DECELERATE, E, DT, rng=Random(3))
+    assert search.get_best_child() is None
+    x_position, angle_of_attack, speed, orientation = search.get_best_shot()
+    x_limits = carrom.board.get_striker_x_limits()
+    assert x_limits[0] <= x_position <= x_limits[1] and abs(angle_of_attack) <= MAX_ANGLE
+    assert 0 < speed <= MAX_SPEED and orientation is None
+
+
+def test_game_over(carrom):
+    """ Nothing is expanded from a finished game, the search still sets up a shot """
+    carrom.restore(carrom.snapshot()._replace(game_over=True))
+    state = carrom.snapshot()
+    ai(carrom, MAX_ANGLE, MAX_SPEED, DECELERATE, E, DT, max_iterations=3, seed=3)
+    assert carrom.striker.velocity.length() > 0
+    carrom.restore(state)
+    decisions = list(mcts_decisions(carrom, MAX_ANGLE, MAX_SPEED, DECELERATE, E, DT, rng=Random(3)))
+    assert len(decisions) == 1 and decisions[0][1] is None
+    assert carrom.snapshot() == state
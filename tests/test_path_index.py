@@ -0,0 +1,30 @@
+from carrom import Carrom
+from geometry import Rect, Vector2
+from path_index import PathIndex
+from ai import check_along_path
+from random import Random
+import pytest
+
+""" The path index gives the same answers as ai.check_along_path, for single segments and for arrays of them """
+
+
+@pytest.mark.parametrize('round_start,round_end', [(False, False), (False, True), (True, True)])
+def test_same_as_check_along_path(round_start, round_end):
+    carrom = Carrom(Rect(0, 0, 700, 700))
+    coins = carrom.coins + [carrom.queen]
+    path_index = PathIndex(coins)
+    rng = Random(4)
+    container = carrom.board.container
+    for exclude in (None, coins[3]):
+        others = [coin for coin in coins if coin is not exclude]
+        starts = [Vector2(rng.uniform(container.left, container.right), rng.uniform(container.top, container.bottom))
+                  for _ in range(200)]
+        """ Short segments as well, which end near the coins """
+        ends = [start.lerp(Vector2(carrom.center), rng.uniform(0.2, 1.0)) for start in starts]
+        distance = 2 * carrom.board.coin_radius
+        expected = [check_along_path(start, end, distance, others, round_start, round_end)
+                    for start, end in zip(starts, ends)]
+        assert any(expected) and not all(expected)
+        assert list(path_index.blocked(starts, ends, distance, exclude, round_start, round_end)) == expected
+        assert [path_index.is_blocked(start, end, distance, exclude, round_start, round_end)
+                for start, end in zip(starts, ends)] == expected
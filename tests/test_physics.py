@@ -0,0 +1,52 @@
+from carrom import Carrom
+from geometry import Rect
+from random_ai import get_choices, set_choice
+from random import Random
+import pytest
+
+""" The numpy engine models the same physics as the object engine: the same coins are pocketed in the same order,
+with the same first collision, fouls and final positions (up to rounding) """
+
+DT, DECELERATE, E = 0.1, 0.3, 0.9
+MAX_ANGLE, MAX_SPEED = 80, 40
+TOLERANCE = 1e-6
+
+
+def get_outcome(carrom: Carrom, state):
+    """ Simulates the shot set up in the state, returns its outcome and the final positions """
+    carrom.restore(state)
+    carrom.simulate(DT, DECELERATE, E)
+    coins = carrom.coins + [carrom.queen, carrom.striker]
+    pocketed = [coins.index(coin) for coin in carrom.current_pocketed]
+    first_collision = [coins.index(coin) for coin in carrom.first_collision or ()]
+    pocketed_striker, pocketed_queen = carrom.pocketed_striker, carrom.pocketed_queen
+    carrom.apply_rules()
+    after = carrom.snapshot()
+    return (pocketed, first_collision, pocketed_striker, pocketed_queen, after.foul_count, after.player_coins,
+            after.pocketed_coins, after.player_turn), after.positions
+
+
+def test_random_shots():
+    """ Random shots from boards reached by random shots """
+    carrom, numpy_carrom = Carrom(Rect(0, 0, 700, 700)), Carrom(Rect(0, 0, 700, 700), engine='numpy')
+    rng = Random(11)
+    for _ in range(3):
+        carrom.restore(Carrom(Rect(0, 0, 700, 700)).snapshot())
+        for _ in range(6):
+            if carrom.game_over:
+                break
+            carrom.striker.position = carrom.board.get_striker_position(carrom.player_turn)
+            state = carrom.snapshot()
+            for choice in get_choices(carrom, MAX_ANGLE, MAX_SPEED, 2, rng):
+                carrom.restore(state)
+                set_choice(carrom, choice[:3] + (None,), False)
+                shot = carrom.snapshot()
+                outcome, positions = get_outcome(carrom, shot)
+                numpy_outcome, numpy_positions = get_outcome(numpy_carrom, shot)
+                assert numpy_outcome == outcome
+                for position, numpy_position in zip(positions, numpy_positions):
+                    assert numpy_position == pytest.approx(position, abs=TOLERANCE)
+            carrom.restore(state)
+            set_choice(carrom, get_choices(carrom, MAX_ANGLE, MAX_SPEED, 1, rng)[0][:3] + (None,), False)
+            carrom.simulate(DT, DECELERATE, E)
+            carrom.apply_rules()
@@ -0,0 +1,61 @@
+from carrom import Carrom
+from geometry import Rect
+from random_ai import get_choices, set_choice, get_variants, get_noise, score_choices, robust_scores
+from random import Random
+from math import sqrt
+import pytest
+
+""" Robust scores are the plain scores without execution noise, and with it rank the choices by the mean of the scores
+of their variants less risk times their spread """
+
+DT, DECELERATE, E = 0.1, 0.3, 0.9
+MAX_ANGLE, MAX_SPEED = 80, 40
+NUM_CHOICES, NUM_VARIANTS = 10, 6
+
+
+@pytest.fixture
+def board():
+    """ Board after a few random shots, and random choices from it """
+    carrom = Carrom(Rect(0, 0, 700, 700))
+    rng = Random(0)
+    for _ in range(3):
+        carrom.striker.position = carrom.board.get_striker_position(carrom.player_turn)
+        set_choice(carrom, get_choices(carrom, MAX_ANGLE, MAX_SPEED, 1, rng)[0][:3] + (None,), False)
+        carrom.simulate(DT, DECELERATE, E)
+        carrom.apply_rules()
+    carrom.striker.position = carrom.board.get_striker_position(carrom.player_turn)
+    choices = [choice[:3] + (None,) for choice in get_choices(carrom, MAX_ANGLE, MAX_SPEED, NUM_CHOICES, rng)]
+    return carrom, carrom.snapshot(), choices
+
+
+def test_zero_noise(board):
+    carrom, state, choices = board
+    scores = score_choices(carrom, state, choices, False, DT, DECELERATE, E)
+    assert robust_scores(carrom, state, choices, False, DT, DECELERATE, E, NUM_VARIANTS, (0, 0, 0), 2.0,
+                         Random(7)) == scores
+
+
+def test_risk(board):
+    """ Noise of four times get_noise, simulated in batches, the best choice with a risk of 2 is not the one with the
+    best mean """
+    carrom, state, choices = board
+    noise = tuple(4 * deviation for deviation in get_noise(MAX_ANGLE, MAX_SPEED))
+    rng = Random(7)
+    variants = [variant for choice in choices for variant in get_variants(carrom, choice, NUM_VARIANTS, noise, rng)]
+    scores = score_choices(carrom, state, variants, False, DT, DECELERATE, E, batch=True)
+    means, spreads = [], []
+    for start in range(0, len(scores), NUM_VARIANTS):
+        samples = scores[start:start + NUM_VARIANTS]
+        means.append(sum(samples) / NUM_VARIANTS)
+        spreads.append(sqrt(sum((sample - means[-1]) ** 2 for sample in samples) / NUM_VARIANTS))
+    best = []
+    for risk in (0.0, 2.0):
+        robust = robust_scores(carrom, state, choices, False, DT, DECELERATE, E, NUM_VARIANTS, noise, risk, Random(7),
+                               batch=True)
+        expected = [mean - risk * spread for mean, spread in zip(means, spreads)]
+        assert robust == pytest.approx(expected)
+        order = sorted(range(NUM_CHOICES), key=lambda index: -robust[index])
+        assert [expected[index] for index in order] == sorted(expected, reverse=True)
+        best.append(order[0])
+    assert best[0] != best[1]
+    assert carrom.snapshot() == state
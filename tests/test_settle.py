@@ -0,0 +1,68 @@
+from carrom import Carrom
+from geometry import Rect, Vector2
+from random_ai import get_choices, set_choice
+from random import Random
+
+""" Settling a shot ends it early, but never changes its outcome: the same coins are pocketed in the same order, with
+the same first collision and the same fouls and turn after the rules are applied """
+
+DT, DECELERATE, E = 0.1, 0.3, 0.9
+MAX_ANGLE, MAX_SPEED = 80, 40
+
+
+def get_outcome(carrom: Carrom, state, settle):
+    carrom.restore(state)
+    carrom.simulate(DT, DECELERATE, E, settle)
+    coins = carrom.coins + [carrom.queen, carrom.striker]
+    pocketed = [coins.index(coin) for coin in carrom.current_pocketed]
+    first_collision = [coins.index(coin) for coin in carrom.first_collision or ()]
+    pocketed_striker, pocketed_queen = carrom.pocketed_striker, carrom.pocketed_queen
+    carrom.apply_rules()
+    after = carrom.snapshot()
+    return (pocketed, first_collision, pocketed_striker, pocketed_queen, after.foul_count, after.player_coins,
+            after.pocketed_coins, after.player_turn)
+
+
+def test_coin_set_moving_later():
+    """ Striker knocks coin 0 towards the top left pocket, coin 2 drifts slowly across the path and is out of the
+    way when coin 0 gets there. While the striker is moving coin 2 can reach nothing with its own travel, but it must
+    not be stopped on the path, as the coin 0 it gets hit by is still at rest """
+    carrom = Carrom(Rect(0, 0, 700, 700))
+    board = carrom.board
+    pocket = min(board.pocket_centers, key=lambda center: center.x + center.y)
+    direction = Vector2(1, 1).normalize()
+    coin = pocket + direction * 180
+    positions, velocities = list(carrom.snapshot().positions), [(0.0, 0.0)] * len(carrom.coins + [carrom.queen])
+    positions[0] = tuple(coin)
+    positions[2] = tuple(coin - direction * 180 * 0.6)
+    velocities[2] = tuple(Vector2(-direction.y, direction.x) * 1.6)
+    positions[-1] = tuple(coin + direction * (board.striker_radius + board.coin_radius + 5))
+    velocities.append(tuple(-direction * 8))
+    state = carrom.snapshot()._replace(
+        positions=tuple(positions), velocities=tuple(velocities), player_coins=((0, 2), ()), pocketed_queen=True,
+        pocketed_coins=(tuple(range(4, len(carrom.coins), 2)), tuple(range(1, len(carrom.coins), 2))))
+    outcome = get_outcome(carrom, state, False)
+    assert outcome[0] == [] and outcome[1] == [0, len(carrom.coins) + 1]
+    assert get_outcome(carrom, state, True) == outcome
+
+
+def test_random_shots():
+    """ Random shots from boards reached by random shots """
+    carrom = Carrom(Rect(0, 0, 700, 700))
+    rng = Random(5)
+    for _ in range(3):
+        carrom.restore(Carrom(Rect(0, 0, 700, 700)).snapshot())
+        for _ in range(6):
+            if carrom.game_over:
+                break
+            carrom.striker.position = carrom.board.get_striker_position(carrom.player_turn)
+            state = carrom.snapshot()
+            for choice in get_choices(carrom, MAX_ANGLE, MAX_SPEED, 4, rng):
+                carrom.restore(state)
+                set_choice(carrom, choice[:3] + (None,), False)
+                shot = carrom.snapshot()
+                assert get_outcome(carrom, shot, True) == get_outcome(carrom, shot, False)
+            carrom.restore(state)
+            set_choice(carrom, get_choices(carrom, MAX_ANGLE, MAX_SPEED, 1, rng)[0][:3] + (None,), False)
+            carrom.simulate(DT, DECELERATE, E)
+            carrom.apply_rules()
@@ -0,0 +1,69 @@
+from carrom import Carrom
+from geometry import Rect
+from random_ai import get_choices, set_choice
+from random import Random
+import copy
+
+""" Restoring a snapshot brings back the carrom as it was, whatever was played in between """
+
+DT, DECELERATE, E = 0.1, 0.3, 0.9
+MAX_ANGLE, MAX_SPEED = 80, 40
+
+
+def play(carrom: Carrom, rng, apply_rules=True):
+    carrom.striker.position = carrom.board.get_striker_position(carrom.player_turn)
+    set_choice(carrom, get_choices(carrom, MAX_ANGLE, MAX_SPEED, 1, rng)[0][:3] + (None,), False)
+    carrom.simulate(DT, DECELERATE, E)
+    if apply_rules:
+        carrom.apply_rules()
+
+
+def get_state(carrom: Carrom):
+    """ State of the carrom as plain values, coins by their index """
+    coins = carrom.coins + [carrom.queen, carrom.striker]
+
+    def indices(coins_):
+        return [coins.index(coin) for coin in coins_]
+    return ([(coin.position.x, coin.position.y, coin.velocity.x, coin.velocity.y) for coin in coins],
+            [indices(player_coins) for player_coins in carrom.player_coins],
+            [indices(pocketed_coins) for pocketed_coins in carrom.pocketed_coins],
+            indices(carrom.current_pocketed), indices(carrom.first_collision or []), list(carrom.foul_count),
+            list(carrom.has_queen), carrom.pocketed_queen, carrom.queen_on_hold, carrom.pocketed_striker,
+            carrom.player_turn, carrom.game_over, carrom.winner, carrom.reason)
+
+
+def test_round_trip():
+    """ Snapshot after a shot of a game in progress (coins pocketed and a first collision, before the rules are
+    applied), then turns with fouls or the queen pocketed and a shot left half way are played and undone """
+    carrom = Carrom(Rect(0, 0, 700, 700), tolerance=0.25)
+    rng = Random(3)
+    for _ in range(4):
+        play(carrom, rng)
+    while True:
+        play(carrom, rng, apply_rules=False)
+        if carrom.current_pocketed and carrom.first_collision:
+            break
+        carrom.apply_rules()
+    original, state = copy.deepcopy(carrom), carrom.snapshot()
+    expected = get_state(original)
+
+    turns = ahead = 0
+    for _ in range(200):
+        carrom.restore(state)
+        carrom.apply_rules()
+        foul_count, pocketed_queen = list(carrom.foul_count), carrom.pocketed_queen
+        play(carrom, rng)
+        if carrom.foul_count == foul_count and carrom.pocketed_queen == pocketed_queen:
+            continue
+        """ Another shot, stopped half way with the stepper ahead of the updates """
+        carrom.striker.position = carrom.board.get_striker_position(carrom.player_turn)
+        set_choice(carrom, get_choices(carrom, MAX_ANGLE, MAX_SPEED, 1, rng)[0][:3] + (None,), False)
+        for _ in range(7):
+            carrom.update(DT / 3, DECELERATE, E)
+        ahead += carrom.stepper.ahead > 0
+        carrom.restore(state)
+        turns += 1
+        assert carrom.stepper.ahead == 0.0 and carrom.awake_coins is None
+        assert get_state(carrom) == expected
+        assert carrom.snapshot() == state
+    assert turns and ahead
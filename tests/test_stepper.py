@@ -0,0 +1,57 @@
+from carrom import Carrom
+from geometry import Rect, Vector2
+from random import Random
+
+""" The adaptive stepper takes fewer steps than fixed steps of the update duration, and keeps the time of the
+updates """
+
+DT, DECELERATE, E = 0.1, 0.3, 0.9
+
+
+def get_shots(carrom, num_shots, rng):
+    """ States of the opening board with random striker shots """
+    start = carrom.snapshot()
+    states = []
+    for _ in range(num_shots):
+        carrom.restore(start)
+        carrom.striker.position = Vector2(rng.uniform(*carrom.board.get_striker_x_limits()),
+                                          carrom.board.get_striker_y_position(0))
+        carrom.striker.velocity.from_polar((rng.uniform(10, 40), -90 - rng.uniform(-60, 60)))
+        states.append(carrom.snapshot())
+        carrom.striker.velocity = Vector2()
+    carrom.restore(start)
+    return states
+
+
+def test_fewer_steps():
+    carrom = Carrom(Rect(0, 0, 700, 700), tolerance=0.25)
+    fixed = Carrom(Rect(0, 0, 700, 700))
+    num_steps = num_fixed_steps = 0
+    for state in get_shots(carrom, 10, Random(1)):
+        carrom.restore(state)
+        while carrom.check_moving():
+            num_steps += carrom.stepper.advance(DT, DECELERATE, E)
+        fixed.restore(state)
+        while fixed.check_moving():
+            fixed.update(DT, DECELERATE, E)
+            num_fixed_steps += 1
+    assert num_steps < num_fixed_steps / 2
+
+
+def test_time_carried_over():
+    """ Updates after a step longer than their duration don't step, till the updates caught up with the
+    simulation, and a restore drops the time carried over """
+    carrom = Carrom(Rect(0, 0, 700, 700), tolerance=0.25)
+    state = get_shots(carrom, 1, Random(2))[0]
+    carrom.restore(state)
+    stepper = carrom.stepper
+    while carrom.check_moving():
+        ahead = stepper.ahead
+        num_steps = stepper.advance(DT, DECELERATE, E)
+        assert (num_steps == 0) == (ahead >= DT * (1 - 1e-9))
+    assert stepper.ahead == 0.0
+    carrom.restore(state)
+    stepper.advance(DT, DECELERATE, E)
+    assert stepper.ahead > 0
+    carrom.restore(state)
+    assert stepper.ahead == 0.0
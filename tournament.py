@@ -0,0 +1,272 @@
+from carrom import Carrom
+from geometry import Rect
+from anytime import play, heuristic_decisions, random_decisions, cross_entropy_decisions, mcts_decisions, \
+    lookahead_decisions
+from collections import namedtuple
+from itertools import permutations
+from random import Random
+from time import perf_counter
+import argparse
+import logging
+import multiprocessing
+
+""" Headless self-play tournament, every pair of players plays the given number of games with each color, the games
+are played without rendering by a pool of worker processes. Each game gets its own seed, so a tournament is
+reproducible if the players are limited by steps instead of time. The players are given as specs, the name of a
+player type with options, for example 'random:num_choices=20' or 'mcts:steps=200,exploration=1.5'. The option
+steps limits the number of decisions (yields of the anytime generator) of each turn, the other options are passed
+to the decisions of the player type. """
+
+""" Parameters of the games, the same for all the games of a tournament """
+GameConfig = namedtuple('GameConfig', ['width', 'engine', 'fast_forward', 'tolerance', 'max_angle', 'max_speed',
+                                       'dt', 'decelerate', 'e', 'time_budget', 'max_turns', 'time_limit'])
+
+""" Outcome of a game, winner is the index of the winning spec (None for a draw) """
+GameResult = namedtuple('GameResult', ['index', 'specs', 'winner', 'reason', 'turns', 'duration'])
+
+
+def heuristic_player(carrom, config, permit_orientation, rng, **options):
+    return heuristic_decisions(carrom, config.max_angle, config.max_speed, config.decelerate, config.e, config.dt,
+                               rng=rng, **options)
+
+
+def random_player(carrom, config, permit_orientation, rng, num_choices=10, iterations=1):
+    if iterations > 1:
+        return cross_entropy_decisions(carrom, config.max_angle, config.max_speed, config.decelerate, config.e,
+                                       config.dt, permit_orientation, num_choices, iterations, rng)
+    return random_decisions(carrom, config.max_angle, config.max_speed, config.decelerate, config.e, config.dt,
+                            permit_orientation, num_choices, rng)
+
+
+def mcts_player(carrom, config, permit_orientation, rng, **options):
+    return mcts_decisions(carrom, config.max_angle, config.max_speed, config.decelerate, config.e, config.dt,
+                          permit_orientation, rng, **options)
+
+
+def lookahead_player(carrom, config, permit_orientation, rng, **options):
+    return lookahead_decisions(carrom, config.max_angle, config.max_speed, config.decelerate, config.e, config.dt,
+                               permit_orientation, rng, **options)
+
+
+""" Player types, each returns the anytime decisions of its turn, new ais are added here """
+PLAYERS = {'ai': heuristic_player, 'random': random_player, 'mcts': mcts_player, 'lookahead': lookahead_player}
+
+
+def parse_spec(spec):
+    """ Returns the player type and the options of the spec 'type:key=value,key=value' """
+    name, _, options = spec.partition(':')
+    if name not in PLAYERS:
+        raise ValueError("Unknown player type %s, choose from %s" % (name, ', '.join(PLAYERS)))
+    parsed = {}
+    for option in filter(None, options.split(',')):
+        key, _, value = option.partition('=')
+        for convert in (int, float):
+            try:
+                value = convert(value)
+                break
+            except ValueError:
+                pass
+        parsed[key] = value
+    return name, parsed
+
+
+def limit_steps(decisions, steps):
+    """ First steps decisions, the decisions are closed when done """
+    try:
+        for _, decision in zip(range(steps), decisions):
+            yield decision
+    finally:
+        decisions.close()
+
+
+def play_game(index, specs, seed, config: GameConfig):
+    """ Plays a game between the two specs (white first), returns the result. A game which exceeds max_turns or
+    the time limit (seconds) is a draw """
+    start = perf_counter()
+    rng = Random(seed)
+    players = [parse_spec(spec) for spec in specs]
+    carrom = Carrom(Rect(0, 0, config.width, config.width), engine=config.engine, fast_forward=config.fast_forward,
+                    tolerance=config.tolerance)
+    """ Orientation changes are only allowed for the first turn """
+    permit_orientation = True
+    turns = 0
+    while not carrom.game_over:
+        if turns >= config.max_turns:
+            return GameResult(index, specs, None, "turn limit", turns, perf_counter() - start)
+        if config.time_limit is not None and perf_counter() - start >= config.time_limit:
+            return GameResult(index, specs, None, "time limit", turns, perf_counter() - start)
+        carrom.striker.position = carrom.board.get_striker_position(carrom.player_turn)
+        name, options = players[carrom.player_turn]
+        options = dict(options)
+        steps = options.pop('steps', None)
+        decisions = PLAYERS[name](carrom, config, permit_orientation, rng, **options)
+        if steps is not None:
+            decisions = limit_steps(decisions, steps)
+        play(carrom, decisions, config.time_budget)
+        permit_orientation = False
+        carrom.simulate(config.dt, config.decelerate, config.e)
+        carrom.apply_rules()
+        turns += 1
+    return GameResult(index, specs, carrom.winner, carrom.reason, turns, perf_counter() - start)
+
+
+def play_game_star(args):
+    """ play_game with packed arguments, for the pool """
+    return play_game(*args)
+
+
+def init_worker():
+    """ The fouls of the games are not of interest """
+    logging.disable(logging.WARNING)
+
+
+def get_schedule(specs, games, seed):
+    """ games games for every ordered pair of specs (so each plays each color), with a seed for each game """
+    seeds = Random(seed)
+    pairs = list(permutations(specs, 2))
+    return [(index, pairs[index % len(pairs)], seeds.getrandbits(32)) for index in range(games * len(pairs))]
+
+
+def run(specs, games, config: GameConfig, seed=0, workers=0, progress=None, coordinator=None):
+    """ Plays the tournament, with a pool of workers if given, or on the workers of a distributed.Coordinator,
+    progress (if given) is called with each result as they complete. Returns the results in the order of the
+    schedule """
+    schedule = [(index, pair, game_seed, config) for index, pair, game_seed in get_schedule(specs, games, seed)]
+    results = []
+    if coordinator is not None:
+        results = coordinator.map([('game',) + game for game in schedule],
+                                  None if progress is None else lambda index, result: progress(result))
+    elif workers:
+        start_method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else None
+        with multiprocessing.get_context(start_method).Pool(workers, init_worker) as pool:
+            for result in pool.imap_unordered(play_game_star, schedule):
+                results.append(result)
+                if progress is not None:
+                    progress(result)
+    else:
+        for game in schedule:
+            results.append(play_game(*game))
+            if progress is not None:
+                progress(results[-1])
+    return sorted(results, key=lambda result: result.index)
+
+
+def get_ratings(specs, results, k=16, initial=1500.0):
+    """ Elo ratings of the specs, updated game by game in the order of the results """
+    ratings = {spec: initial for spec in specs}
+    for result in results:
+        white, black = result.specs
+        expected = 1 / (1 + 10 ** ((ratings[black] - ratings[white]) / 400))
+        score = 0.5 if result.winner is None else 1.0 if result.winner == 0 else 0.0
+        ratings[white] += k * (score - expected)
+        ratings[black] -= k * (score - expected)
+    return ratings
+
+
+def get_standings(specs, results):
+    """ Wins, draws and losses of each spec, and of each pair of specs (keyed by the pair) """
+    standings = {spec: [0, 0, 0] for spec in specs}
+    pairs = {}
+    for result in results:
+        for side, spec in enumerate(result.specs):
+            other = result.specs[1 - side]
+            outcome = 1 if result.winner is None else 0 if result.winner == side else 2
+            standings[spec][outcome] += 1
+            pairs.setdefault((spec, other), [0, 0, 0])[outcome] += 1
+    return standings, pairs
+
+
+def report(specs, results, elapsed):
+    """ Prints the standings, the head to head results and the throughput """
+    ratings = get_ratings(specs, results)
+    standings, pairs = get_standings(specs, results)
+    width = max(len(spec) for spec in specs)
+    print("%-*s %7s %6s %6s %6s %6s %8s" % (width, "player", "elo", "games", "wins", "draws", "losses", "win rate"))
+    for spec in sorted(specs, key=ratings.get, reverse=True):
+        wins, draws, losses = standings[spec]
+        games = wins + draws + losses
+        print("%-*s %7.1f %6d %6d %6d %6d %8.3f" % (width, spec, ratings[spec], games, wins, draws, losses,
+                                                   (wins + draws / 2) / games if games else 0.0))
+    print("Head to head (wins-draws-losses):")
+    for (spec, other), (wins, draws, losses) in sorted(pairs.items()):
+        if spec < other:
+            print("  %s vs %s: %d-%d-%d" % (spec, other, wins, draws, losses))
+    turns = sum(result.turns for result in results)
+    print("%d games, %d turns in %.2fs: %.3f games/s, %.2f turns/s" % (len(results), turns, elapsed,
+                                                                      len(results) / elapsed, turns / elapsed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless tournament between the carrom ais")
+    parser.add_argument('players', nargs='+',
+                        help="player specs, type[:key=value,...] with type one of %s" % ', '.join(PLAYERS))
+    parser.add_argument('--games', '-g', type=int, default=10, help="games per pair of players and color")
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count(),
+                        help="number of worker processes playing the games (0 plays them in this process)")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the game seeds")
+    parser.add_argument('--width', '-w', type=int, default=700, help="carrom board width")
+    parser.add_argument("--max_angle", type=float, default=80, help="maximum striker angle")
+    parser.add_argument("--max_speed", type=float, default=40, help="maximum striker speed")
+    parser.add_argument("--dt", type=float, default=0.1, help="simulation interval")
+    parser.add_argument("--decelerate", type=float, default=0.3, help="deceleration due to friction")
+    parser.add_argument("--e", type=float, default=0.9, help="co-efficient of restitution for collisions")
+    parser.add_argument("--engine", choices=Carrom.ENGINES, default='object', help="physics engine used for simulation")
+    parser.add_argument("--fast_forward", action="store_true",
+                        help="advance coins straight to rest once they can't collide (object engine)")
+    parser.add_argument("--tolerance", type=float, default=None,
+                        help="enable adaptive steps (of up to 4 dt), with the given collision tolerance (in pixels)")
+    parser.add_argument("--time_budget", type=float, default=None,
+                        help="thinking time (in seconds) of the players per turn (players limited by steps only "
+                             "if not given)")
+    parser.add_argument("--max_turns", type=int, default=300, help="turns after which a game is a draw")
+    parser.add_argument("--time_limit", type=float, default=None, help="seconds after which a game is a draw")
+    parser.add_argument("--listen", type=int, default=None,
+                        help="port to hand out the games on to distributed.py workers instead of the local pool")
+    parser.add_argument("--host", default='127.0.0.1',
+                        help="address to listen on with --listen, 0.0.0.0 for workers on other nodes")
+    parser.add_argument("--worker_timeout", type=float, default=60.0,
+                        help="seconds without any workers connected (with --listen) after which the tournament fails")
+    parser.add_argument("--local_workers", type=int, default=0,
+                        help="number of distributed.py workers to start on this node (with --listen)")
+    args = parser.parse_args()
+
+    specs = list(dict.fromkeys(args.players))
+    if len(specs) < 2:
+        parser.error("at least two different players are needed")
+    for spec in specs:
+        try:
+            parse_spec(spec)
+        except ValueError as error:
+            parser.error(str(error))
+    if args.time_budget is None and any(parse_spec(spec)[0] == 'mcts' and 'steps' not in parse_spec(spec)[1]
+                                        for spec in specs):
+        parser.error("mcts players need a --time_budget or the steps option")
+    init_worker()
+    config = GameConfig(args.width, args.engine, args.fast_forward, args.tolerance, args.max_angle, args.max_speed,
+                        args.dt, args.decelerate, args.e, args.time_budget, args.max_turns, args.time_limit)
+    total = args.games * len(specs) * (len(specs) - 1)
+    done = []
+
+    def progress(result):
+        done.append(result)
+        print("Game %d of %d: %s vs %s, winner %s (%s) in %d turns" % (
+            len(done), total, *result.specs, "draw" if result.winner is None else result.specs[result.winner],
+            result.reason, result.turns), flush=True)
+    coordinator = None
+    if args.listen is not None:
+        from distributed import Coordinator, start_workers
+        coordinator = Coordinator(args.host, args.listen, worker_timeout=args.worker_timeout)
+        print("Waiting for workers on port", coordinator.address[1])
+        start_workers('127.0.0.1' if args.host in ('', '0.0.0.0') else args.host, coordinator.address[1],
+                      args.local_workers)
+    start = perf_counter()
+    try:
+        results = run(specs, args.games, config, args.seed, args.workers, progress, coordinator)
+    finally:
+        if coordinator is not None:
+            coordinator.close()
+    report(specs, results, perf_counter() - start)
+
+
+if __name__ == '__main__':
+    main()
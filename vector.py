@@ -0,0 +1,345 @@
+from math import sqrt, sin, cos, atan2, pi, fmod, floor
+
+""" Pure python versions of the parts of pygame's Vector2 and Rect used by the simulation, so that the physics and
+the rules can run without pygame. The arithmetic follows pygame's implementation operation by operation, so the
+simulation gives the same results with either of them. """
+
+""" Tolerance used by pygame for comparisons and special casing rotations """
+EPSILON = 1e-6
+
+
+class Vector2:
+    __slots__ = ('x', 'y')
+
+    def __init__(self, x=0.0, y=None):
+        if y is None:
+            if isinstance(x, (int, float)):
+                self.x, self.y = float(x), float(x)
+            else:
+                self.x, self.y = float(x[0]), float(x[1])
+        else:
+            self.x, self.y = float(x), float(y)
+
+    def __reduce__(self):
+        return Vector2, (self.x, self.y)
+
+    def __repr__(self):
+        return '<Vector2(%g, %g)>' % (self.x, self.y)
+
+    def __str__(self):
+        return '[%g, %g]' % (self.x, self.y)
+
+    def __len__(self):
+        return 2
+
+    def __getitem__(self, index):
+        return (self.x, self.y)[index]
+
+    def __setitem__(self, index, value):
+        if index in (0, -2):
+            self.x = float(value)
+        elif index in (1, -1):
+            self.y = float(value)
+        else:
+            raise IndexError("subscript out of range.")
+
+    def __iter__(self):
+        yield self.x
+        yield self.y
+
+    def __bool__(self):
+        return self.x != 0 or self.y != 0
+
+    def __eq__(self, other):
+        try:
+            if len(other) != 2:
+                return False
+            return abs(self.x - other[0]) < EPSILON and abs(self.y - other[1]) < EPSILON
+        except TypeError:
+            return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    def __neg__(self):
+        return Vector2(-self.x, -self.y)
+
+    def __pos__(self):
+        return Vector2(self.x, self.y)
+
+    def __add__(self, other):
+        return Vector2(self.x + other[0], self.y + other[1])
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return Vector2(self.x - other[0], self.y - other[1])
+
+    def __rsub__(self, other):
+        return Vector2(other[0] - self.x, other[1] - self.y)
+
+    def __mul__(self, other):
+        """ Product with a vector is the dot product, as in pygame """
+        if isinstance(other, (int, float)):
+            return Vector2(self.x * other, self.y * other)
+        return self.x * other[0] + self.y * other[1]
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        """ Division multiplies by the reciprocal, as in pygame """
+        reciprocal = 1.0 / other
+        return Vector2(self.x * reciprocal, self.y * reciprocal)
+
+    def __floordiv__(self, other):
+        return Vector2(self.x // other, self.y // other)
+
+    """ In place operators modify the vector, which is visible through all the references to it (as in pygame) """
+
+    def __iadd__(self, other):
+        self.x, self.y = self.x + other[0], self.y + other[1]
+        return self
+
+    def __isub__(self, other):
+        self.x, self.y = self.x - other[0], self.y - other[1]
+        return self
+
+    def __imul__(self, other):
+        if not isinstance(other, (int, float)):
+            return NotImplemented
+        self.x, self.y = self.x * other, self.y * other
+        return self
+
+    def __itruediv__(self, other):
+        reciprocal = 1.0 / other
+        self.x, self.y = self.x * reciprocal, self.y * reciprocal
+        return self
+
+    def copy(self):
+        return Vector2(self.x, self.y)
+
+    def update(self, x=0.0, y=None):
+        self.__init__(x, y)
+
+    def dot(self, other):
+        return self.x * other[0] + self.y * other[1]
+
+    def cross(self, other):
+        return self.x * other[1] - self.y * other[0]
+
+    def length(self):
+        return sqrt(self.x * self.x + self.y * self.y)
+
+    magnitude = length
+
+    def length_squared(self):
+        return self.x * self.x + self.y * self.y
+
+    magnitude_squared = length_squared
+
+    def distance_to(self, other):
+        dx, dy = self.x - other[0], self.y - other[1]
+        return sqrt(dx * dx + dy * dy)
+
+    def distance_squared_to(self, other):
+        dx, dy = self.x - other[0], self.y - other[1]
+        return dx * dx + dy * dy
+
+    def normalize(self):
+        length = sqrt(self.x * self.x + self.y * self.y)
+        if length == 0:
+            raise ValueError("Can't normalize Vector of length Zero")
+        return Vector2(self.x / length, self.y / length)
+
+    def normalize_ip(self):
+        self.x, self.y = self.normalize()
+
+    def is_normalized(self):
+        return abs(self.x * self.x + self.y * self.y - 1) < EPSILON
+
+    def scale_to_length(self, length):
+        old_length = sqrt(self.x * self.x + self.y * self.y)
+        if old_length < EPSILON:
+            raise ValueError("Cannot scale a vector with zero length")
+        fraction = length / old_length
+        self.x, self.y = self.x * fraction, self.y * fraction
+
+    def rotate(self, angle):
+        """ Rotates counter clockwise by the angle (in degrees), multiples of 90 degrees are exact """
+        angle = fmod(angle * pi / 180.0, 2 * pi)
+        if angle < 0:
+            angle += 2 * pi
+        if fmod(angle + EPSILON, pi / 2) < 2 * EPSILON:
+            quarter = int((angle + EPSILON) / (pi / 2)) % 4
+            return Vector2(*((self.x, self.y), (-self.y, self.x), (-self.x, -self.y), (self.y, -self.x))[quarter])
+        sin_value, cos_value = sin(angle), cos(angle)
+        return Vector2(cos_value * self.x - sin_value * self.y, sin_value * self.x + cos_value * self.y)
+
+    def rotate_ip(self, angle):
+        self.x, self.y = self.rotate(angle)
+
+    def angle_to(self, other):
+        """ Angle (in degrees) from the current vector to the other """
+        return (atan2(other[1], other[0]) - atan2(self.y, self.x)) * 180.0 / pi
+
+    def as_polar(self):
+        return self.length(), atan2(self.y, self.x) * 180.0 / pi
+
+    def from_polar(self, polar):
+        """ Sets the vector from the (length, angle in degrees) """
+        length, angle = polar
+        angle = angle * pi / 180.0
+        self.x, self.y = length * cos(angle), length * sin(angle)
+
+    def reflect(self, normal):
+        normal_x, normal_y = normal[0], normal[1]
+        normal_length = normal_x * normal_x + normal_y * normal_y
+        if normal_length < EPSILON:
+            raise ValueError("Normal must not be of length zero.")
+        if normal_length != 1:
+            normal_length = sqrt(normal_length)
+            normal_x, normal_y = normal_x / normal_length, normal_y / normal_length
+        dot = self.x * normal_x + self.y * normal_y
+        return Vector2(self.x - 2 * normal_x * dot, self.y - 2 * normal_y * dot)
+
+    def reflect_ip(self, normal):
+        self.x, self.y = self.reflect(normal)
+
+    def lerp(self, other, t):
+        if not 0 <= t <= 1:
+            raise ValueError("Argument 2 must be in range [0, 1]")
+        return Vector2(self.x * (1 - t) + other[0] * t, self.y * (1 - t) + other[1] * t)
+
+    def elementwise(self):
+        raise NotImplementedError("elementwise operations are not supported")
+
+
+def round_half_away(value):
+    """ Rounds to the nearest integer, halves are rounded away from zero (as C's lround) """
+    return int(floor(value + 0.5)) if value >= 0 else -int(floor(0.5 - value))
+
+
+class Rect:
+    """ Integer rectangle, the constructor truncates and the attribute setters round the values, as in pygame """
+    __slots__ = ('x', 'y', 'w', 'h')
+
+    def __init__(self, left, top=None, width=None, height=None):
+        if top is None:
+            if len(left) == 2:
+                (left, top), (width, height) = left
+            else:
+                left, top, width, height = left
+        self.x, self.y, self.w, self.h = int(left), int(top), int(width), int(height)
+
+    def __reduce__(self):
+        return Rect, (self.x, self.y, self.w, self.h)
+
+    def __repr__(self):
+        return '<rect(%d, %d, %d, %d)>' % (self.x, self.y, self.w, self.h)
+
+    def __len__(self):
+        return 4
+
+    def __getitem__(self, index):
+        return (self.x, self.y, self.w, self.h)[index]
+
+    def __iter__(self):
+        return iter((self.x, self.y, self.w, self.h))
+
+    def __eq__(self, other):
+        try:
+            return tuple(self) == tuple(other)
+        except TypeError:
+            return NotImplemented
+
+    __hash__ = None
+
+    def copy(self):
+        return Rect(self.x, self.y, self.w, self.h)
+
+    @property
+    def left(self):
+        return self.x
+
+    @left.setter
+    def left(self, value):
+        self.x = round_half_away(value)
+
+    @property
+    def top(self):
+        return self.y
+
+    @top.setter
+    def top(self, value):
+        self.y = round_half_away(value)
+
+    @property
+    def width(self):
+        return self.w
+
+    @width.setter
+    def width(self, value):
+        self.w = round_half_away(value)
+
+    @property
+    def height(self):
+        return self.h
+
+    @height.setter
+    def height(self, value):
+        self.h = round_half_away(value)
+
+    @property
+    def right(self):
+        return self.x + self.w
+
+    @property
+    def bottom(self):
+        return self.y + self.h
+
+    @property
+    def size(self):
+        return self.w, self.h
+
+    @property
+    def topleft(self):
+        return self.x, self.y
+
+    @property
+    def centerx(self):
+        return self.x + self.w // 2
+
+    @property
+    def centery(self):
+        return self.y + self.h // 2
+
+    @property
+    def center(self):
+        return self.centerx, self.centery
+
+    @center.setter
+    def center(self, value):
+        self.x, self.y = round_half_away(value[0]) - self.w // 2, round_half_away(value[1]) - self.h // 2
+
+    def inflate(self, dx, dy):
+        """ Grows the rectangle around its center, halves are truncated towards zero as in pygame """
+        dx, dy = int(dx), int(dy)
+        return Rect(self.x - int(dx / 2), self.y - int(dy / 2), self.w + dx, self.h + dy)
+
+    def move(self, dx, dy):
+        return Rect(self.x + dx, self.y + dy, self.w, self.h)
+
+    def normalize(self):
+        """ Makes the width and height non negative, in place """
+        if self.w < 0:
+            self.x, self.w = self.x + self.w, -self.w
+        if self.h < 0:
+            self.y, self.h = self.y + self.h, -self.h
+
+    def collidepoint(self, x, y=None):
+        if y is None:
+            x, y = x
+        return self.x <= x < self.x + self.w and self.y <= y < self.y + self.h